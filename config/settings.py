@@ -319,6 +319,8 @@ if USE_WEASYPRINT:
     IMPORT_EXPORT_ENABLE_PDF = True
 else:
     IMPORT_EXPORT_ENABLE_PDF = False
+# Processes laying out PDF export chunks (core/pdf.py); default min(4, CPUs)
+PDF_EXPORT_WORKERS = int(os.getenv("PDF_EXPORT_WORKERS", "0")) or None
 
 print("DEBUG", DEBUG)
 # debug-toolbar
@@ -332,6 +334,31 @@ if DEBUG:
 LOGIN_URL = '/login/'
 
 KAVENEGAR_API = os.environ.get('KAVENEGAR_API')
+# SMS transport (core/sms.py); use "core.sms.LocmemBackend" in tests/dev
+SMS_BACKEND = os.environ.get('SMS_BACKEND', 'core.sms.KavenegarBackend')
+SMS_RATE_PER_SECOND = float(os.environ.get('SMS_RATE_PER_SECOND', '5'))
+
+# Shared by notification counters, the mentor inbox, analytics stamps and the
+# cached views (core/http_cache.py, core/view_cache.py). Invalidation deletes
+# keys, so every worker must see the same cache: Redis if REDIS_URL is set,
+# otherwise a file cache shared by the workers on this host.
+# CACHE_BACKEND=locmem keeps it in-process (tests, single-process dev).
+REDIS_URL = os.environ.get("REDIS_URL")
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "redis" if REDIS_URL else "file")
+if CACHE_BACKEND == "redis":
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": REDIS_URL}}
+elif CACHE_BACKEND == "locmem":
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.environ.get("CACHE_PATH", "/tmp/neurobit-cache"),
+            "OPTIONS": {"MAX_ENTRIES": 20000},
+        }
+    }
+# Bump on deploy to drop pages rendered from old templates
+CACHES["default"]["KEY_PREFIX"] = os.environ.get("CACHE_KEY_PREFIX", "")
 
 # CHANNEL_LAYERS = {
 #     "default": {
@@ -342,10 +369,19 @@ KAVENEGAR_API = os.environ.get('KAVENEGAR_API')
 #     },
 # }
 
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer"
+# CHANNEL_LAYER=unix fans out across all workers on this host over Unix sockets
+# (notifications/layers.py, POSIX only); the default keeps it in-process.
+CHANNEL_LAYER = os.environ.get("CHANNEL_LAYER", "memory")
+if CHANNEL_LAYER == "unix":
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "notifications.layers.UnixSocketChannelLayer",
+            "CONFIG": {
+                "path": os.environ.get("CHANNEL_LAYER_PATH", "/tmp/neurobit-channels"),
+            },
+        }
     }
-}
+else:
+    CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
 
 ASGI_APPLICATION = "config.asgi.application"
\ No newline at end of file
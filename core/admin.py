@@ -10,6 +10,7 @@ from django.contrib.auth.admin import (
 from django.contrib.auth.forms import UserCreationForm, AdminPasswordChangeForm
 from django.contrib.auth.models import Group
 from django.db import models
+from django.utils import timezone
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 
@@ -214,3 +215,22 @@ class SubscriptionNotificationConfigAdmin(ModelAdmin):
             cached = core_notify.SubscriptionNotificationConfig.objects.only("id").exists()
             setattr(request, "_cfg_sub_notif_exists", cached)
         return not cached
+
+
+# ──────────────────────────────────────────────────────
+#  Outbound messages (SMS / email outbox)
+# ──────────────────────────────────────────────────────
+@admin.register(core_notify.OutboundMessage)
+class OutboundMessageAdmin(ModelAdmin):
+    list_display = ("channel", "recipient", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status", "channel")
+    search_fields = ("recipient", "dedupe_key")
+    readonly_fields = ("dedupe_key", "attempts", "last_error", "created_at", "sent_at")
+    actions = ("retry_now",)
+
+    @admin.action(description="Retry now")
+    def retry_now(self, request, queryset):
+        n = queryset.exclude(status=core_notify.OutboundMessage.STATUS_SENT).update(
+            status=core_notify.OutboundMessage.STATUS_PENDING, next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f"{n} message(s) queued for retry.")
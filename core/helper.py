@@ -3,33 +3,18 @@ from random import randint
 from .models import CustomUser
 import logging
 import secrets
-from django.conf import settings
 from django.utils.translation import gettext_lazy as _
-try:
-    from kavenegar import KavenegarAPI
-    _kavenegar = KavenegarAPI(settings.KAVENEGAR_API)
-except Exception:  # nosec - best effort
-    _kavenegar = None
+from . import sms
+
 
-    
-# Optional SMS client (Kavenegar). Falls back silently in dev.
 def get_random_otp() -> str:
     """Generate a cryptographically secure 6-digit OTP."""
     return f"{secrets.randbelow(900000) + 100000}"
 
 def send_otp_code(phone_number: str, code: str) -> None:
-    if not _kavenegar:
-        logging.warning("Kavenegar client not available; SMS not sent (dev mode).")
-        return
-    params = {
-        "sender": '1000100175',
-        "receptor": phone_number,
-        "message": f"کد ورود شما: {code}",
-    }
-    try:
-        _kavenegar.sms_send(params)
-    except Exception as exc:  # nosec
-        logging.warning("Failed to send OTP via Kavenegar: %s", exc)
+    # Shared transport (core/sms.py): pooled connection + rate limit; logs on failure.
+    if not sms.send_sms([phone_number], f"کد ورود شما: {code}"):
+        logging.warning("Failed to send OTP SMS to %s.", phone_number)
 
 
 def check_otp_expiration(phone_number):
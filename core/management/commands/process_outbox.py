@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.notify import process_outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver queued SMS/email messages from the outbox (retries with backoff)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8, help="Concurrent senders.")
+        parser.add_argument("--batch-size", dest="batch_size", type=int, default=100)
+        parser.add_argument("--max-attempts", dest="max_attempts", type=int, default=6)
+        parser.add_argument("--loop", action="store_true", help="Keep polling instead of exiting when empty.")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds to sleep between polls with --loop.")
+
+    def handle(self, *args, **opts):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = process_outbox(
+                batch_size=opts["batch_size"], workers=opts["workers"], max_attempts=opts["max_attempts"],
+            )
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                continue
+            if not opts["loop"]:
+                break
+            time.sleep(opts["interval"])
+
+        self.stdout.write(self.style.SUCCESS(f"Outbox: sent {total_sent}, failed {total_failed}."))
@@ -8,18 +8,25 @@ configure SMS and email notifications when learner subscriptions expire.
 It was extended to support manager email notifications in addition to SMS.
 """
 
+import hashlib
 import logging
 import os
 import re
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
 from typing import Iterable, List, Optional
 
-import requests
 from django.conf import settings
+from django.core.cache import cache
 from django.db import models, transaction
 from django.template import Context, Template
 from django.utils import timezone
 from django.core.mail import send_mail
 
+from . import sms
+
 try:
     # jdatetime is in requirements; we use it to render Shamsi text like "1404-mordad-13"
     from jdatetime import datetime as jdt  # type: ignore
@@ -142,11 +149,25 @@ class SubscriptionNotificationConfig(models.Model):
     def __str__(self) -> str:  # pragma: no cover
         return "Subscription Notifications"
 
+    # The singleton is read for every notification run; keep it in the cache and
+    # drop it whenever the row changes. Queryset .update() bypasses this, use save().
+    CACHE_KEY = "core:subscription_notification_config"
+    CACHE_TIMEOUT = 300
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        cache.delete(self.CACHE_KEY)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        cache.delete(self.CACHE_KEY)
+        return result
+
     # ---- Singleton accessors ----
     @classmethod
     def load(cls) -> "SubscriptionNotificationConfig":
         """
-        Get or create the singleton row.
+        Get or create the singleton row (served from the cache after the first read).
 
         On first creation, bootstrap values from environment:
 
@@ -159,6 +180,14 @@ class SubscriptionNotificationConfig(models.Model):
 
         Environment variables should be comma-separated lists for phones/emails.
         """
+        obj = cache.get(cls.CACHE_KEY)
+        if obj is None:
+            obj = cls._get_or_bootstrap()
+            cache.set(cls.CACHE_KEY, obj, cls.CACHE_TIMEOUT)
+        return obj
+
+    @classmethod
+    def _get_or_bootstrap(cls) -> "SubscriptionNotificationConfig":
         with transaction.atomic():
             obj = cls.objects.first()
             if obj:
@@ -206,31 +235,79 @@ class SubscriptionNotificationConfig(models.Model):
 
 
 # ------------------------------------------------------------
-# Kavenegar client (safe, logged, timeouts)
+# Outbox: messages are queued in the DB and delivered by a worker
 # ------------------------------------------------------------
 
 
-def _get_api_key() -> Optional[str]:
-    return getattr(settings, "KAVENEGAR_API_KEY", None) or os.getenv("KAVENEGAR_API_KEY")
+class OutboundMessageQuerySet(models.QuerySet):
+    def due(self, at=None):
+        """Pending rows plus 'sending' rows whose lease ran out (crashed worker)."""
+        at = at or timezone.now()
+        return self.filter(
+            status__in=(OutboundMessage.STATUS_PENDING, OutboundMessage.STATUS_SENDING),
+            next_attempt_at__lte=at,
+        )
 
 
-def _get_sender() -> Optional[str]:
-    return getattr(settings, "KAVENEGAR_SENDER", None) or os.getenv("KAVENEGAR_SENDER") or "1000100175"
+class OutboundMessage(models.Model):
+    """
+    One SMS or email to one recipient.
+
+    ``dedupe_key`` is unique, so enqueuing the same event twice (re-run cron, retried
+    transaction) never sends the same message to the same recipient twice.
+    """
+
+    CHANNEL_SMS = "sms"
+    CHANNEL_EMAIL = "email"
+    CHANNEL_CHOICES = ((CHANNEL_SMS, "SMS"), (CHANNEL_EMAIL, "Email"))
+
+    STATUS_PENDING = "pending"
+    STATUS_SENDING = "sending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = (
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENDING, "Sending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_FAILED, "Failed"),
+    )
+
+    channel = models.CharField(max_length=5, choices=CHANNEL_CHOICES)
+    recipient = models.CharField(max_length=254)
+    subject = models.CharField(max_length=200, blank=True)
+    body = models.TextField()
+    dedupe_key = models.CharField(max_length=320, unique=True)
+
+    status = models.CharField(max_length=8, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    objects = OutboundMessageQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Outbound message"
+        verbose_name_plural = "Outbound messages"
+        indexes = [models.Index(fields=("status", "next_attempt_at"))]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.channel} → {self.recipient} ({self.status})"
+
+
+# ------------------------------------------------------------
+# Kavenegar client (see core/sms.py for the shared transport)
+# ------------------------------------------------------------
 
 
 def kavenegar_send_sms(to_receptors: Iterable[str] | str, message: str) -> bool:
     """
-    Send SMS via Kavenegar.
+    Send SMS through the shared transport in :mod:`core.sms`.
 
     - ``to_receptors``: iterable of numbers or a single comma-separated string.
-    - returns True if the HTTP call was attempted and succeeded (HTTP 200).
+    - returns True if the send was attempted and succeeded.
     """
-    api_key = _get_api_key()
-    sender = _get_sender()
-    if not api_key or not sender:
-        log.warning("SMS disabled: missing KAVENEGAR_API_KEY or KAVENEGAR_SENDER.")
-        return False
-
     if isinstance(to_receptors, str):
         receptor = coerce_recipients([to_receptors])
     else:
@@ -239,21 +316,7 @@ def kavenegar_send_sms(to_receptors: Iterable[str] | str, message: str) -> bool:
     if not receptor:
         log.info("SMS skipped: no valid recipients after normalization.")
         return False
-
-    url = f"https://api.kavenegar.com/v1/{api_key}/sms/send.json"
-    try:
-        resp = requests.post(
-            url,
-            data={"receptor": receptor, "sender": sender, "message": message},
-            timeout=10,
-        )
-        ok = resp.status_code == 200
-        if not ok:
-            log.error("Kavenegar non-200: %s %s", resp.status_code, resp.text[:300])
-        return ok
-    except Exception as e:  # pragma: no cover
-        log.exception("Kavenegar error: %s", e)
-        return False
+    return sms.send_sms(receptor.split(","), message)
 
 
 # ------------------------------------------------------------
@@ -261,9 +324,16 @@ def kavenegar_send_sms(to_receptors: Iterable[str] | str, message: str) -> bool:
 # ------------------------------------------------------------
 
 
+@lru_cache(maxsize=64)
+def _compile_template(tpl: str) -> Template:
+    # Keyed by the template text itself, so an edited template compiles once and
+    # the old entry simply ages out.
+    return Template(tpl)
+
+
 def _render_template(tpl: str, ctx: dict) -> str:
     try:
-        return Template(tpl).render(Context(ctx))
+        return _compile_template(tpl).render(Context(ctx))
     except Exception as e:  # pragma: no cover
         log.exception("Template render error: %s", e)
         return tpl  # best-effort fallback
@@ -276,7 +346,7 @@ def _extract_user_and_phone(subscription) -> tuple[Optional[object], Optional[st
     """
     user = None
     phone = None
-    enrol = getattr(subscription, "learner_enrolment", None)
+    enrol = getattr(subscription, "learner_enrollment", None)
     learner = getattr(enrol, "learner", None)
     if learner and hasattr(learner, "user"):
         user = learner.user
@@ -298,24 +368,40 @@ def _extract_user_and_phone(subscription) -> tuple[Optional[object], Optional[st
     return user, normalize_msisdn(phone) if phone else None
 
 
-def send_subscription_expired_sms(subscription) -> None:
-    """
-    Main entrypoint. Call this when a subscription transitions to EXPIRED.
+def _manager_phones(cfg: SubscriptionNotificationConfig) -> list:
+    # If admin list is empty but env has managers, we backfill once (auto-set requirement)
+    if not cfg.manager_phones:
+        env_nums = os.getenv("KAVENEGAR_MANAGERS", "")
+        mgrs = [m.strip() for m in env_nums.split(",") if m.strip()]
+        normalized = coerce_recipients(mgrs)
+        if normalized:
+            cfg.manager_phones = normalized.split(",")
+            cfg.save(update_fields=["manager_phones"])
+    return cfg.manager_phones or []
 
-    - Auto-bootstraps admin config on first use (populates manager list/templates from env).
-    - Renders templates with a simple Django Template context.
-    - Sends to user (if enabled + phone exists), to managers via SMS (if enabled),
-      and to managers via email (if enabled).
 
-    Context variables you can use in templates:
-      ``user``, ``plan``, ``subscription``, ``enrolment``, ``end``, ``end_jalali``, ``now``
-    """
-    cfg = SubscriptionNotificationConfig.load()  # auto-create + env bootstrap
+def _manager_emails(cfg: SubscriptionNotificationConfig) -> list:
+    # Backfill from environment if list is empty
+    if not cfg.manager_emails:
+        env_emails = os.getenv("MANAGER_EMAILS", "")
+        email_list = [e.strip() for e in env_emails.split(",") if e.strip()]
+        if email_list:
+            cfg.manager_emails = email_list
+            cfg.save(update_fields=["manager_emails"])
+    return cfg.manager_emails or []
+
+
+# Longer digests are cut here so the manager SMS stays a few parts long.
+DIGEST_MAX_LINES = 10
+
+
+def _expired_messages(cfg, subscription, manager_emails) -> tuple[List[OutboundMessage], str]:
+    """Per-subscription messages, plus the rendered manager SMS line for the digest."""
     user, user_phone = _extract_user_and_phone(subscription)
 
     plan = getattr(subscription, "subscription_plan", None)
-    end_dt = getattr(subscription, "end_datetime", None)
-    enrolment = getattr(subscription, "learner_enrolment", None)
+    end_dt = getattr(subscription, "effective_end_datetime", None) or getattr(subscription, "end_datetime", None)
+    enrolment = getattr(subscription, "learner_enrollment", None)
 
     ctx = {
         "user": user,
@@ -326,47 +412,188 @@ def send_subscription_expired_sms(subscription) -> None:
         "end_jalali": to_jalali_text(end_dt),
         "now": timezone.now(),
     }
+    key = f"sub_expired:{subscription.pk}"
+    out: List[OutboundMessage] = []
 
     # User SMS
     if cfg.enable_user_sms and user_phone:
-        msg = _render_template(cfg.user_sms_template, ctx)
-        kavenegar_send_sms([user_phone], msg)
-
-    # Managers SMS
-    if cfg.enable_manager_sms:
-        # If admin list is empty but env has managers, we backfill once (auto-set requirement)
-        if not cfg.manager_phones:
-            env_nums = os.getenv("KAVENEGAR_MANAGERS", "")
-            mgrs = [m.strip() for m in env_nums.split(",") if m.strip()]
-            normalized = coerce_recipients(mgrs)
-            if normalized:
-                cfg.manager_phones = normalized.split(",")
-                cfg.save(update_fields=["manager_phones"])
-
-        if cfg.manager_phones:
-            msg_mgr = _render_template(cfg.manager_sms_template, ctx)
-            kavenegar_send_sms(cfg.manager_phones, msg_mgr)
+        out.append(OutboundMessage(
+            channel=OutboundMessage.CHANNEL_SMS, recipient=user_phone,
+            body=_render_template(cfg.user_sms_template, ctx),
+            dedupe_key=f"{key}:user_sms:{user_phone}",
+        ))
 
     # Manager Emails
-    if getattr(cfg, "enable_manager_email", True):
-        # Backfill from environment if list is empty
-        if not cfg.manager_emails:
-            env_emails = os.getenv("MANAGER_EMAILS", "")
-            email_list = [e.strip() for e in env_emails.split(",") if e.strip()]
-            if email_list:
-                cfg.manager_emails = email_list
-                cfg.save(update_fields=["manager_emails"])
-
-        if cfg.manager_emails:
-            subject = _render_template(cfg.manager_email_subject, ctx)
-            body = _render_template(cfg.manager_email_template, ctx)
-            # Determine the from_email; use DEFAULT_FROM_EMAIL or env fallback
-            from_email = getattr(settings, "DEFAULT_FROM_EMAIL", None) or os.getenv("DEFAULT_FROM_EMAIL")
-            try:
-                send_mail(subject, body, from_email, cfg.manager_emails)
-            except Exception as e:
-                # Log and swallow to avoid interrupting the flow
-                log.exception("Subscription expiry email error: %s", e)
+    if getattr(cfg, "enable_manager_email", True) and manager_emails:
+        subject = _render_template(cfg.manager_email_subject, ctx)
+        body = _render_template(cfg.manager_email_template, ctx)
+        for email in manager_emails:
+            out.append(OutboundMessage(
+                channel=OutboundMessage.CHANNEL_EMAIL, recipient=email,
+                subject=subject[:200], body=body,
+                dedupe_key=f"{key}:manager_email:{email}",
+            ))
+
+    manager_line = _render_template(cfg.manager_sms_template, ctx) if cfg.enable_manager_sms else ""
+    return out, manager_line
+
+
+def _manager_digest(lines: List[str]) -> str:
+    if len(lines) == 1:
+        return lines[0]
+    body = [f"{len(lines)} اشتراک منقضی شد:"] + lines[:DIGEST_MAX_LINES]
+    if len(lines) > DIGEST_MAX_LINES:
+        body.append(f"و {len(lines) - DIGEST_MAX_LINES} مورد دیگر")
+    return "\n".join(body)
+
+
+def enqueue_subscription_expired(subscriptions: Iterable) -> int:
+    """
+    Queue the expiry SMS/emails for ``subscriptions`` in one bulk insert.
+
+    Managers get a single SMS digest covering every subscription in the call
+    instead of one SMS per expiry. Nothing is sent here; ``process_outbox``
+    (``manage.py process_outbox``) delivers. Messages already queued for the same
+    subscription/recipient are skipped. Returns the number of messages handed to the outbox.
+
+    Context variables you can use in templates:
+      ``user``, ``plan``, ``subscription``, ``enrolment``, ``end``, ``end_jalali``, ``now``
+    """
+    cfg = SubscriptionNotificationConfig.load()  # auto-create + env bootstrap
+    phones = _manager_phones(cfg) if cfg.enable_manager_sms else []
+    emails = _manager_emails(cfg) if getattr(cfg, "enable_manager_email", True) else []
+
+    messages: List[OutboundMessage] = []
+    manager_lines, pks = [], []
+    for subscription in subscriptions:
+        out, line = _expired_messages(cfg, subscription, emails)
+        messages.extend(out)
+        if line:
+            manager_lines.append(line)
+            pks.append(subscription.pk)
+
+    # Managers SMS (one digest per run)
+    if phones and manager_lines:
+        digest = _manager_digest(manager_lines)
+        run_key = hashlib.sha1(",".join(map(str, sorted(pks))).encode()).hexdigest()[:16]
+        for phone in phones:
+            messages.append(OutboundMessage(
+                channel=OutboundMessage.CHANNEL_SMS, recipient=phone, body=digest,
+                dedupe_key=f"sub_expired_digest:{run_key}:{phone}",
+            ))
+
+    OutboundMessage.objects.bulk_create(messages, batch_size=1000, ignore_conflicts=True)
+    return len(messages)
+
+
+def send_subscription_expired_sms(subscription) -> None:
+    """
+    Call this when a subscription transitions to EXPIRED.
+
+    Kept for existing callers; queues the user SMS, manager SMS and manager emails
+    through :func:`enqueue_subscription_expired`.
+    """
+    enqueue_subscription_expired([subscription])
+
+
+# ------------------------------------------------------------
+# Outbox worker
+# ------------------------------------------------------------
+
+
+def _deliver_email(message: OutboundMessage) -> str:
+    """Send one email. Returns an error string, or '' on success. No DB access here."""
+    # Determine the from_email; use DEFAULT_FROM_EMAIL or env fallback
+    from_email = getattr(settings, "DEFAULT_FROM_EMAIL", None) or os.getenv("DEFAULT_FROM_EMAIL")
+    try:
+        send_mail(message.subject, message.body, from_email, [message.recipient])
+    except Exception as e:
+        log.exception("Outbox email error: %s", e)
+        return str(e) or e.__class__.__name__
+    return ""
+
+
+def _deliver_group(group: List[OutboundMessage]) -> List[str]:
+    """
+    Deliver a group of messages, returning one error string ('' = ok) per message.
+    SMS groups share one body, so the transport sends them as a single multi-receptor call.
+    """
+    if group[0].channel == OutboundMessage.CHANNEL_EMAIL:
+        return [_deliver_email(m) for m in group]
+    failed = sms.send_many((m.recipient, m.body) for m in group)
+    return ["SMS send failed" if (m.recipient, m.body) in failed else "" for m in group]
+
+
+def _claim_batch(batch_size: int, lease_seconds: int) -> tuple[List[OutboundMessage], datetime]:
+    """Lock a due batch as 'sending'; returns it with the lease end, which identifies our claim."""
+    now = timezone.now()
+    lease_until = now + timezone.timedelta(seconds=lease_seconds)
+    with transaction.atomic():
+        # skip_locked lets several workers drain the outbox without picking the same rows
+        batch = list(
+            OutboundMessage.objects.due(now)
+            .select_for_update(skip_locked=True)
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        if batch:
+            OutboundMessage.objects.filter(pk__in=[m.pk for m in batch]).update(
+                status=OutboundMessage.STATUS_SENDING,
+                next_attempt_at=lease_until,
+            )
+    return batch, lease_until
+
+
+def process_outbox(*, batch_size: int = 100, workers: int = 8, max_attempts: int = 6,
+                   backoff_seconds: int = 60, lease_seconds: int = 300) -> tuple[int, int]:
+    """
+    Deliver one claimed batch with ``workers`` concurrent senders.
+
+    Failures are retried with exponential backoff (``backoff_seconds * 2**(attempts-1)``,
+    capped at 6 hours) and marked failed after ``max_attempts``.
+    Returns ``(sent, failed)`` for the batch; ``(0, 0)`` means nothing was due.
+    """
+    batch, lease_until = _claim_batch(batch_size, lease_seconds)
+    if not batch:
+        return 0, 0
+
+    groups = [[m] for m in batch if m.channel == OutboundMessage.CHANNEL_EMAIL]
+    sms_by_body = defaultdict(list)
+    for m in batch:
+        if m.channel == OutboundMessage.CHANNEL_SMS:
+            sms_by_body[m.body].append(m)
+    groups.extend(sms_by_body.values())
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(groups)))) as pool:
+        results = list(pool.map(_deliver_group, groups))
+    errors = {m.pk: error for group, errs in zip(groups, results) for m, error in zip(group, errs)}
+
+    now = timezone.now()
+    sent = failed = 0
+    for message in batch:
+        error = errors[message.pk]
+        message.attempts += 1
+        message.last_error = error[:1000]
+        if not error:
+            message.status = OutboundMessage.STATUS_SENT
+            message.sent_at = now
+            sent += 1
+        elif message.attempts >= max_attempts:
+            message.status = OutboundMessage.STATUS_FAILED
+            failed += 1
+        else:
+            delay = min(backoff_seconds * 2 ** (message.attempts - 1), 6 * 3600)
+            message.status = OutboundMessage.STATUS_PENDING
+            message.next_attempt_at = now + timezone.timedelta(seconds=delay)
+            failed += 1
+    # Only rows we still hold: if our lease ran out, another worker has re-claimed
+    # them (new lease end) and its result must not be overwritten by ours.
+    written = OutboundMessage.objects.filter(
+        status=OutboundMessage.STATUS_SENDING, next_attempt_at=lease_until,
+    ).bulk_update(batch, ["status", "attempts", "last_error", "sent_at", "next_attempt_at"])
+    if written < len(batch):
+        log.warning("Outbox lease expired for %s of %s messages; left to the worker that re-claimed them.",
+                    len(batch) - written, len(batch))
+    return sent, failed
 
 
 # Alias for the earlier typo so both names work
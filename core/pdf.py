@@ -0,0 +1,112 @@
+"""
+Chunked PDF rendering for admin exports.
+
+WeasyPrint lays out a document in one process, and its time/memory grow with
+the whole table. ``render_pdf`` instead splits the rows into fixed-size chunks,
+renders each chunk's HTML here (cheap), lays the chunks out in a process pool
+(the expensive part) and concatenates the resulting PDFs with pypdf.
+
+Every chunk PDF is cached by the hash of its HTML and the final document by the
+hash of all chunks, so re-exporting unchanged data costs no layout at all and a
+changed row only re-renders its own chunk.
+
+Rows can be any iterable (e.g. ``courses.exports.iter_rows``); only the chunks
+waiting for a worker are held in memory.
+"""
+
+import hashlib
+import io
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+ROWS_PER_CHUNK = 500
+TIMEOUT = 60 * 60 * 24
+TEMPLATE = "core/export_pdf.html"
+
+
+def _write_pdf(html):
+    # runs in a pool worker: no Django, just WeasyPrint
+    from weasyprint import HTML
+
+    return HTML(string=html).write_pdf()
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    yield list(islice(rows, size))  # even an empty table gets its header page
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def _merge(parts):
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for part in parts:
+        writer.append(io.BytesIO(part))
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def render_html(headers, rows, *, title="", start=0, template_name=TEMPLATE):
+    return render_to_string(template_name, {"title": title, "headers": headers, "rows": rows, "start": start})
+
+
+def render_pdf(headers, rows, *, title="", template_name=TEMPLATE, rows_per_chunk=ROWS_PER_CHUNK, workers=None):
+    """PDF bytes of a ``headers`` + ``rows`` table, ``rows_per_chunk`` rows per layout job."""
+    workers = workers or getattr(settings, "PDF_EXPORT_WORKERS", None) or min(4, os.cpu_count() or 1)
+    digest = hashlib.sha1(template_name.encode())
+    parts, keys = [], []          # parts[i]: PDF bytes, or a pending (html | Future)
+    pending, pool = deque(), None
+
+    def resolve(i):
+        part = parts[i]
+        parts[i] = part.result() if isinstance(part, Future) else _write_pdf(part)
+        cache.set(keys[i], parts[i], TIMEOUT)
+
+    try:
+        for n, chunk in enumerate(_chunks(rows, rows_per_chunk)):
+            html = render_html(headers, chunk, title=title if n == 0 else "",
+                               start=n * rows_per_chunk, template_name=template_name)
+            key = "pdf:chunk:" + hashlib.sha1(html.encode()).hexdigest()
+            digest.update(key.encode())
+            keys.append(key)
+            parts.append(cache.get(key))
+            if parts[n] is not None:
+                continue
+
+            parts[n] = html
+            if workers == 1:
+                resolve(n)
+                continue
+            # the first miss waits for a second one before paying for a pool
+            pending.append(n)
+            if len(pending) > 1:
+                if pool is None:
+                    pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+                for i in pending:
+                    if isinstance(parts[i], str):
+                        parts[i] = pool.submit(_write_pdf, parts[i])
+                # keep at most two chunks per worker in flight
+                while len(pending) > 2 * workers:
+                    resolve(pending.popleft())
+
+        doc_key = "pdf:doc:" + digest.hexdigest()
+        document = cache.get(doc_key)
+        if document is None:
+            while pending:
+                resolve(pending.popleft())
+            document = _merge(parts) if len(parts) != 1 else parts[0]
+            cache.set(doc_key, document, TIMEOUT)
+        return document
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
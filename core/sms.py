@@ -0,0 +1,148 @@
+"""
+SMS transport shared by OTP codes and subscription notifications.
+
+Pick the backend with ``settings.SMS_BACKEND`` (dotted path), the same way
+Django picks ``EMAIL_BACKEND``:
+
+  - ``core.sms.KavenegarBackend`` (default): one pooled ``requests.Session``,
+    identical messages sent to many receptors in a single call, rate limited
+    to ``SMS_RATE_PER_SECOND`` requests per second across threads.
+  - ``core.sms.LocmemBackend``: keeps messages in ``core.sms.outbox`` instead
+    of sending them; use it in tests and local development.
+"""
+
+from __future__ import annotations
+
+import abc
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Iterable, List, Optional
+
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+log = logging.getLogger(__name__)
+
+# Kavenegar accepts at most 200 comma-separated receptors per sms/send call.
+MAX_RECEPTORS_PER_CALL = 200
+
+# Filled by LocmemBackend, like django.core.mail.outbox.
+outbox: List[dict] = []
+
+
+class RateLimiter:
+    """Thread-safe limiter spacing calls at least ``1 / rate`` seconds apart."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            at = max(now, self._next)
+            self._next = at + self.interval
+        if at > now:
+            time.sleep(at - now)
+
+
+class BaseSMSBackend(abc.ABC):
+    @abc.abstractmethod
+    def send(self, receptors: List[str], message: str) -> bool:
+        """Send ``message`` to all ``receptors`` (already normalized). Return True on success."""
+
+    def send_many(self, messages: Iterable[tuple[str, str]]) -> set:
+        """
+        Send ``(receptor, message)`` pairs, grouping identical messages into as few
+        calls as possible. Returns the set of pairs that failed.
+        """
+        by_text = defaultdict(list)
+        for receptor, message in messages:
+            by_text[message].append(receptor)
+
+        failed = set()
+        for message, receptors in by_text.items():
+            for i in range(0, len(receptors), MAX_RECEPTORS_PER_CALL):
+                chunk = receptors[i:i + MAX_RECEPTORS_PER_CALL]
+                if not self.send(chunk, message):
+                    failed.update((r, message) for r in chunk)
+        return failed
+
+
+class KavenegarBackend(BaseSMSBackend):
+    def __init__(self):
+        self.api_key = (
+            getattr(settings, "KAVENEGAR_API_KEY", None)
+            or getattr(settings, "KAVENEGAR_API", None)
+            or os.getenv("KAVENEGAR_API_KEY")
+        )
+        self.sender = getattr(settings, "KAVENEGAR_SENDER", None) or os.getenv("KAVENEGAR_SENDER") or "1000100175"
+        self.limiter = RateLimiter(getattr(settings, "SMS_RATE_PER_SECOND", 5))
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=16, max_retries=1)
+        self.session.mount("https://", adapter)
+
+    def send(self, receptors: List[str], message: str) -> bool:
+        if not self.api_key:
+            log.warning("SMS disabled: missing KAVENEGAR_API_KEY.")
+            return False
+        if not receptors:
+            return False
+
+        self.limiter.wait()
+        url = f"https://api.kavenegar.com/v1/{self.api_key}/sms/send.json"
+        try:
+            resp = self.session.post(
+                url,
+                data={"receptor": ",".join(receptors), "sender": self.sender, "message": message},
+                timeout=10,
+            )
+        except requests.RequestException as e:
+            log.warning("Kavenegar error: %s", e)
+            return False
+        if resp.status_code != 200:
+            log.error("Kavenegar non-200: %s %s", resp.status_code, resp.text[:300])
+            return False
+        return True
+
+
+class LocmemBackend(BaseSMSBackend):
+    def send(self, receptors: List[str], message: str) -> bool:
+        outbox.append({"receptors": list(receptors), "message": message})
+        return True
+
+
+_backend: Optional[BaseSMSBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> BaseSMSBackend:
+    """Process-wide backend instance, so the HTTP pool and rate limit are shared."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                path = getattr(settings, "SMS_BACKEND", "core.sms.KavenegarBackend")
+                _backend = import_string(path)()
+    return _backend
+
+
+def send_sms(receptors: Iterable[str], message: str) -> bool:
+    receptors = list(receptors)
+    if not receptors:
+        return False
+    ok = True
+    for i in range(0, len(receptors), MAX_RECEPTORS_PER_CALL):
+        ok = get_backend().send(receptors[i:i + MAX_RECEPTORS_PER_CALL], message) and ok
+    return ok
+
+
+def send_many(messages: Iterable[tuple[str, str]]) -> set:
+    return get_backend().send_many(messages)
@@ -1,3 +1,88 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from core import notify
+from core.http_cache import cached_json
+from core.notify import OutboundMessage, enqueue_subscription_expired, process_outbox
+from courses.models import Learner, LearnerEnrollment, LearnerSubscribePlan, LearningPath, SubscriptionPlan
+
+
+class SubscriptionExpiredOutboxTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create_user(username="sara", password="x", phone_number="09121234567")
+        enrollment = LearnerEnrollment.objects.create(
+            learner=Learner.objects.create(user=user),
+            learning_path=LearningPath.objects.create(name="Backend"),
+        )
+        cls.subscription = LearnerSubscribePlan.objects.create(
+            learner_enrollment=enrollment,
+            subscription_plan=SubscriptionPlan.objects.create(name="Basic", price_amount=1000),
+            start_datetime=timezone.now() - timezone.timedelta(days=40),
+        )
+
+    def test_user_sms_goes_to_learner_phone(self):
+        # reads subscription.learner_enrollment (it used to probe "learner_enrolment" and never found a phone)
+        enqueue_subscription_expired([self.subscription])
+        self.assertTrue(
+            OutboundMessage.objects.filter(channel=OutboundMessage.CHANNEL_SMS, recipient="09121234567").exists()
+        )
+
+    def test_stale_worker_does_not_overwrite_reclaimed_rows(self):
+        message = OutboundMessage.objects.create(
+            channel=OutboundMessage.CHANNEL_SMS, recipient="09121234567", body="hi", dedupe_key="k",
+        )
+        claim = notify._claim_batch
+
+        def claim_then_lose_lease(*args, **kwargs):
+            batch, lease_until = claim(*args, **kwargs)
+            # another worker re-claims the rows after our lease ran out and delivers them
+            OutboundMessage.objects.filter(pk=message.pk).update(
+                status=OutboundMessage.STATUS_SENT, next_attempt_at=lease_until + timezone.timedelta(seconds=1),
+            )
+            return batch, lease_until
+
+        with mock.patch.object(notify, "_claim_batch", claim_then_lose_lease), \
+                mock.patch.object(notify.sms, "send_many", return_value={("09121234567", "hi")}):
+            process_outbox()
+
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboundMessage.STATUS_SENT)
+        self.assertEqual(message.attempts, 0)
+
+
+class CachedJsonTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+        @cached_json(LearningPath)
+        def view(request):
+            self.calls += 1
+            return JsonResponse({"paths": list(LearningPath.objects.values_list("name", flat=True))})
+
+        self.view = view
+        self.request = RequestFactory().get("/data/", {"chart": "x"})
+
+    def test_served_from_cache_until_a_tracked_model_saves(self):
+        first = self.view(self.request)
+        self.assertEqual(self.view(self.request).content, first.content)
+        self.assertEqual(self.calls, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            LearningPath.objects.create(name="Backend")
+        response = self.view(self.request)
+        self.assertEqual(self.calls, 2)
+        self.assertIn(b"Backend", response.content)
+        self.assertNotEqual(response["ETag"], first["ETag"])
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self.view(self.request)["ETag"]
+        request = RequestFactory().get("/data/", {"chart": "x"}, headers={"If-None-Match": etag})
+        self.assertEqual(self.view(request).status_code, 304)
+        self.assertEqual(self.calls, 1)
@@ -0,0 +1,144 @@
+"""
+Caching for class-based HTML views, on top of the version stamps in
+``core/http_cache.py``.
+
+``CachedContextMixin`` caches the expensive part of a view's context per user
+and per object (the URL kwargs by default). The view moves that work into
+``get_cached_context`` and lists what it reads::
+
+    class StepListView(CachedContextMixin, LoginRequiredMixin, ListView):
+        cache_depends_on = (EducationalStep, Task)
+
+        def get_cache_dependencies(self):
+            return [object_key(LearnerEnrollment, self.enrollment.pk)]
+
+``cache_depends_on`` entries are tracked models (see ``http_cache.track``);
+``get_cache_dependencies`` returns per-object keys that the writer bumps
+explicitly with ``http_cache.bump(object_key(...))``. Access checks, the header
+(notifications, messages, CSRF) and anything else in ``get_context_data`` stay
+live on every request.
+
+``CachedPageMixin`` serves a whole rendered page from the cache to anonymous
+visitors, or to everyone with ``cache_public = True`` when the template renders
+nothing per visitor (the marketing pages). Every form's CSRF token is swapped
+for the visitor's own on the way out, and non-public pages bypass the cache
+while messages are pending.
+"""
+
+import hashlib
+import re
+
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.translation import get_language
+
+from .http_cache import track, versions
+
+TIMEOUT = 60 * 15
+PAGE_TIMEOUT = 60 * 60 * 6
+
+_CSRF_INPUT = re.compile(rb'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+_CSRF_PLACEHOLDER = b"\x00csrf\x00"
+
+
+def object_key(model, pk):
+    """Dependency key of one row, e.g. ``courses.learnerenrollment:12``; pass it to ``http_cache.bump``."""
+    label = model if isinstance(model, str) else model._meta.label_lower
+    return f"{label.lower()}:{pk}"
+
+
+def _track_all(depends_on):
+    for dep in depends_on:
+        model, fields = dep if isinstance(dep, tuple) else (dep, None)
+        track(model, fields)
+
+
+def _digest(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:32]
+
+
+class CachedContextMixin:
+    cache_depends_on = ()
+    cache_timeout = TIMEOUT
+    cache_per_user = True
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        _track_all(cls.cache_depends_on)
+
+    def get_cache_object(self):
+        return sorted(self.kwargs.items())
+
+    def get_cache_dependencies(self):
+        return []
+
+    def get_cached_context(self):
+        return {}
+
+    def cached_context(self):
+        """``get_cached_context()``, computed at most once per request and ``cache_timeout`` across them."""
+        if not hasattr(self, "_cached_context"):
+            deps = [*self.cache_depends_on, *self.get_cache_dependencies()]
+            key = "view_cache:context:" + _digest(
+                type(self).__module__,
+                type(self).__qualname__,
+                self.request.user.pk if self.cache_per_user else None,
+                self.get_cache_object(),
+                sorted(self.request.GET.lists()),
+                get_language(),
+                versions(deps),
+            )
+            data = cache.get(key)
+            if data is None:
+                data = self.get_cached_context()
+                cache.set(key, data, self.cache_timeout)
+            self._cached_context = data
+        return self._cached_context
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx.update(self.cached_context())
+        return ctx
+
+
+class CachedPageMixin:
+    cache_depends_on = ()
+    cache_timeout = PAGE_TIMEOUT
+    cache_public = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        _track_all(cls.cache_depends_on)
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD") or not (self.cache_public or self._anonymous(request)):
+            return super().dispatch(request, *args, **kwargs)
+
+        key = "view_cache:page:" + _digest(
+            type(self).__module__,
+            type(self).__qualname__,
+            request.get_full_path(),
+            get_language(),
+            versions(self.cache_depends_on),
+        )
+        cached = cache.get(key)
+        if cached is None:
+            response = super().dispatch(request, *args, **kwargs)
+            if response.status_code != 200 or response.cookies:
+                return response
+            if hasattr(response, "render"):
+                response.render()
+            content = _CSRF_INPUT.sub(rb"\1" + _CSRF_PLACEHOLDER + rb"\2", response.content)
+            cached = (content, response["Content-Type"])
+            cache.set(key, cached, self.cache_timeout)
+
+        content = cached[0]
+        if _CSRF_PLACEHOLDER in content:
+            content = content.replace(_CSRF_PLACEHOLDER, get_token(request).encode())
+        return HttpResponse(content, content_type=cached[1])
+
+    @staticmethod
+    def _anonymous(request):
+        return not request.user.is_authenticated and not len(get_messages(request))
@@ -31,7 +31,7 @@ class LoginView(View):
                 user = CustomUser.objects.get(phone_number=phone_number)
                 helper.send_otp_code(phone_number, otp)
                 user.otp_code = otp
-                user.save()
+                user.save(update_fields=["otp_code", "otp_code_created"])
                 request.session['phone_number'] = phone_number
                 return redirect('verify')
 
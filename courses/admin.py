@@ -1,30 +1,34 @@
 # courses/admin.py  – Django 5.2 • Unfold • import-export
 from __future__ import annotations
 
+import logging
+import os
 from datetime import date as _d, datetime as _dt, time as _t, timezone as _tz
 from decimal import Decimal
 from typing import List, Type
 
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.options import IncorrectLookupParameters
 from django.contrib.humanize.templatetags.humanize import intcomma
 from django.contrib.postgres.fields import ArrayField
 from django.conf import settings
-from django.db import models
-from django.db.models import Sum, Count, Avg, Q
-from django.db.models.functions import TruncMonth, TruncDate, TruncDay
-from django.http import HttpResponse, JsonResponse, HttpRequest
+from django.db import models, transaction
+from django.db.models import Sum, Count, Avg
+from django.db.models.functions import TruncDay
+from django.http import FileResponse, HttpResponse, JsonResponse, HttpRequest
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 from django.urls import reverse, path
 from django.template.response import TemplateResponse
-from django.template.loader import render_to_string
 from django.shortcuts import redirect
 
 from simple_history.admin import SimpleHistoryAdmin
 from import_export.admin import ImportExportModelAdmin
-from import_export import resources, fields
+from import_export import resources, fields, widgets
 from import_export.formats.base_formats import CSV, JSON, XLSX, Format
+from import_export.results import RowResult
 
 from unfold.enums import ActionVariant
 from unfold.admin import ModelAdmin, TabularInline, StackedInline
@@ -39,12 +43,24 @@ from pages.templatetags.persian_calendar_convertor import (
 )
 
 from . import models as m
+from .analytics import current_year, period_label, jalali_range, progress_chart, revenue_chart
+from .exports import queue_export, streaming_response
+from .search import search_q
+from core.http_cache import cached_json
 from core.notify import send_subscription_expired_sms
+from core.pdf import render_html, render_pdf
+from notifications.signals import push_internal
 
 
+log = logging.getLogger(__name__)
+
 # ──────────────────────────────────────────────────────────────
 # Helpers
 # ──────────────────────────────────────────────────────────────
+# user columns the analytics dropdowns show (cached_json dependency)
+_USER_NAMES = (settings.AUTH_USER_MODEL, {"first_name", "last_name", "email"})
+
+
 def _jalali(val):
     if isinstance(val, _d) and not isinstance(val, _dt):
         val = _dt.combine(val, _t.min, tzinfo=_tz.utc)
@@ -122,22 +138,112 @@ class LearnerSubscribePlanResource(resources.ModelResource):
         return getattr(obj.subscription_plan, "name", str(obj.subscription_plan_id))
 
 
+class _PlanByNameWidget(widgets.ForeignKeyWidget):
+    """Resolves ``plan_name`` from one query per import instead of one per row."""
+
+    def __init__(self):
+        super().__init__(m.SubscriptionPlan, "name")
+        self._plans = None
+
+    def clean(self, value, row=None, **kwargs):
+        if not value:
+            return None
+        if self._plans is None:
+            self._plans = {p.name: p for p in m.SubscriptionPlan.objects.all()}
+        try:
+            return self._plans[value]
+        except KeyError:
+            raise ValueError(f"Unknown subscription plan {value!r}")
+
+
+class _IsoDateTimeWidget(widgets.DateTimeWidget):
+    """Also accepts the ISO values (with offset) the streaming exports write."""
+
+    def clean(self, value, row=None, **kwargs):
+        if isinstance(value, str) and (dt := parse_datetime(value.strip())):
+            return dt if timezone.is_aware(dt) else timezone.make_aware(dt)
+        return super().clean(value, row, **kwargs)
+
+
+class _BulkRowResult(RowResult):
+    def add_instance_info(self, instance):
+        # str(subscription) reads learner -> user: three queries per row
+        self.object_repr = f"#{instance.learner_enrollment_id} → {instance.subscription_plan}"
+
+
+class LearnerSubscribePlanImportResource(resources.ModelResource):
+    """
+    Bulk import of new subscriptions: ``learner_enrollment`` (id), ``plan_name``,
+    ``start_datetime``, optional ``end_datetime`` / ``discount_percent``.
+
+    Rows are collected ``batch_size`` at a time and written with
+    ``LearnerSubscribePlan.objects.bulk_purchase`` (no per-row ``save()`` or
+    signals); the notifications of the whole file are pushed once after commit.
+    """
+
+    learner_enrollment = fields.Field(
+        attribute="learner_enrollment_id", column_name="learner_enrollment", widget=widgets.IntegerWidget(),
+    )
+    plan = fields.Field(attribute="subscription_plan", column_name="plan_name", widget=_PlanByNameWidget())
+    start = fields.Field(attribute="start_datetime", column_name="start_datetime", widget=_IsoDateTimeWidget())
+    end = fields.Field(attribute="end_datetime", column_name="end_datetime", widget=_IsoDateTimeWidget())
+    discount = fields.Field(attribute="discount", column_name="discount_percent", widget=widgets.IntegerWidget())
+
+    class Meta:
+        model = m.LearnerSubscribePlan
+        name = "Subscriptions (bulk insert)"
+        fields = ("learner_enrollment", "plan", "start", "end", "discount")
+        import_id_fields = ()
+        force_init_instance = True
+        use_bulk = True
+        batch_size = 2000
+        skip_diff = True
+
+    def get_row_result_class(self):
+        return _BulkRowResult
+
+    def before_import(self, dataset, **kwargs):
+        self._user = kwargs.get("user")
+        self._notifications = []
+
+    def import_instance(self, instance, row, **kwargs):
+        super().import_instance(instance, row, **kwargs)
+        if instance.start_datetime is None:
+            instance.start_datetime = timezone.now()
+        if instance.discount is None:
+            instance.discount = 0
+
+    def bulk_create(self, using_transactions, dry_run, raise_errors, batch_size=None, result=None):
+        if self.create_instances and (using_transactions or not dry_run):
+            try:
+                self._notifications += m.LearnerSubscribePlan.objects.bulk_purchase(
+                    self.create_instances, batch_size=batch_size, user=self._user,
+                )
+            except Exception as e:
+                self.handle_import_error(result, e, raise_errors)
+            finally:
+                self.create_instances.clear()
+
+    def after_import(self, dataset, result, **kwargs):
+        notifications, self._notifications = self._notifications, []
+        if notifications and not kwargs.get("dry_run"):
+            transaction.on_commit(lambda: push_internal(notifications))
+
+
 class PDF(Format):
+    """PDF via WeasyPrint (chunked + cached, see core/pdf.py); an .html table when USE_WEASYPRINT is off."""
+    def _weasyprint(self): return getattr(settings, "USE_WEASYPRINT", False)
     def get_title(self): return "pdf"
-    def get_extension(self): return "pdf"
-    def get_content_type(self): return "application/pdf"
+    def get_extension(self): return "pdf" if self._weasyprint() else "html"
+    def get_content_type(self): return "application/pdf" if self._weasyprint() else "text/html; charset=utf-8"
     def export_data(self, dataset, **kwargs):
-        html = render_to_string(
-            "admin/courses/learner_subscribe_plan/export_pdf.html",
-            {"dataset": dataset, "generated_at": timezone.now()},
-        )
+        if not self._weasyprint():
+            return render_html(dataset.headers, list(dataset), title="Subscriptions Export").encode("utf-8")
         try:
-            if getattr(settings, "USE_WEASYPRINT", False):
-                from weasyprint import HTML
-                return HTML(string=html).write_pdf()
+            return render_pdf(dataset.headers, dataset, title="Subscriptions Export")
         except Exception:
-            pass
-        return html.encode("utf-8")
+            log.exception("PDF export of %s rows failed", len(dataset))
+            raise
 
 
 # ──────────────────────────────────────────────────────────────
@@ -241,6 +347,7 @@ class LearningPathAdmin(BaseAdmin):
         )
 
     # --- initial choices for dropdowns (used once on page load)
+    @cached_json(m.LearningPath, m.Mentor, m.Learner, m.LearnerEnrollment, m.MentorAssignment, _USER_NAMES)
     def progress_analytics_choices(self, request: HttpRequest):
         """
         Initial lists and re-population for LP, mentors, learners.
@@ -292,11 +399,7 @@ class LearningPathAdmin(BaseAdmin):
         if learner_id:
             qs = qs.filter(assignments__enrollment__learner_id=learner_id)
         if q:
-            qs = qs.filter(
-                Q(user__first_name__icontains=q) |
-                Q(user__last_name__icontains=q) |
-                Q(user__email__icontains=q)
-            )
+            qs = qs.filter(search_q(q, mentor="pk"))
 
         qs = qs.order_by("user__first_name", "user__last_name").distinct()[:20]
         data = [{"id": o.id, "name": (f"{o.user.first_name} {o.user.last_name}".strip() or o.user.email)} for o in qs]
@@ -315,22 +418,19 @@ class LearningPathAdmin(BaseAdmin):
         if mentor_id:
             qs = qs.filter(enrollments__mentor_assignments__mentor_id=mentor_id)
         if q:
-            qs = qs.filter(
-                Q(user__first_name__icontains=q) |
-                Q(user__last_name__icontains=q) |
-                Q(user__email__icontains=q)
-            )
+            qs = qs.filter(search_q(q, learner="pk"))
 
         qs = qs.order_by("user__first_name", "user__last_name").distinct()[:20]
         data = [{"id": o.id, "name": (f"{o.user.first_name} {o.user.last_name}".strip() or o.user.email)} for o in qs]
         return JsonResponse({"results": data})
 
     # --- Data endpoint for charts
+    @cached_json(m.StepProgressDaily, m.EducationalStep, m.StepProgress, m.TaskEvaluation, m.MentorAssignment, m.LearnerEnrollment)
     def progress_analytics_data(self, request: HttpRequest):
         """
         JSON API for progress analytics.
         chart: step_funnel | avg_score | completions_over_time | learner_progress
-        filters: lp (required), mentor, learner, year, month
+        filters: lp (required), mentor, learner, year, month, calendar (gregorian | jalali)
         """
         chart = (request.GET.get("chart") or "step_funnel").strip()
         lp_id = request.GET.get("lp")
@@ -338,10 +438,18 @@ class LearningPathAdmin(BaseAdmin):
         learner_id = request.GET.get("learner")
         year = request.GET.get("year")
         month = request.GET.get("month")
+        calendar = "jalali" if request.GET.get("calendar") == "jalali" else "gregorian"
 
         if not lp_id:
             return JsonResponse({"error": "lp required"}, status=400)
 
+        # learning-path/mentor wide charts come from the daily rollups (courses.analytics);
+        # learner-level charts stay on the raw rows, which are few per learner
+        if not learner_id:
+            payload = progress_chart(chart, lp_id, mentor_id=mentor_id, year=year, month=month, calendar=calendar)
+            if payload is not None:
+                return JsonResponse(payload)
+
         # base StepProgress filter (ensure we never defer fields we traverse)
         sp_base = m.StepProgress.objects.select_related(
             "educational_step",
@@ -408,10 +516,14 @@ class LearningPathAdmin(BaseAdmin):
         # COMPLETIONS OVER TIME: use StepProgress.task_completion_date
         if chart == "completions_over_time":
             sps = sp_base.filter(task_completion_date__isnull=False)
-            if year:
-                sps = sps.filter(task_completion_date__year=int(year))
-            if month:
-                sps = sps.filter(task_completion_date__month=int(month))
+            if calendar == "jalali":
+                if year:
+                    sps = sps.filter(task_completion_date__date__range=jalali_range(int(year), int(month) if month else None))
+            else:
+                if year:
+                    sps = sps.filter(task_completion_date__year=int(year))
+                if month:
+                    sps = sps.filter(task_completion_date__month=int(month))
 
             rows = (
                 sps.annotate(d=TruncDay("task_completion_date"))
@@ -419,7 +531,7 @@ class LearningPathAdmin(BaseAdmin):
                    .order_by("d")
                    .annotate(c=Count("id"))
             )
-            labels = [r["d"].date().isoformat() for r in rows]
+            labels = [period_label(r["d"].date(), "day", calendar) for r in rows]
             daily = [int(r["c"] or 0) for r in rows]
             cum = []
             t = 0
@@ -619,7 +731,9 @@ class StepProgressSessionAdmin(BaseAdmin):
 @admin.register(m.StepProgress)
 class StepProgressAdmin(BaseAdmin):
     skipped_badge = bool_badge("skipped", true="Skipped", false="On track")
-    list_display = ("mentor_assignment", "educational_step", "skipped_badge")
+    due_j = jalali_display("due_at", label="Due")
+    list_display = ("mentor_assignment", "educational_step", "skipped_badge", "due_j")
+    readonly_fields = ("due_at",)
     autocomplete_fields = ("mentor_assignment", "educational_step")
     list_filter = ("skipped", "educational_step__learning_path")
     inlines = (StepExtensionInline,)
@@ -773,6 +887,116 @@ class MentorGroupSessionAdmin(BaseAdmin):
     search_fields = ("mentor__user__email", "learning_path__name")
 
 
+# ──────────────────────────────────────────────────────────────
+# Streaming exports (courses.exports)
+# ──────────────────────────────────────────────────────────────
+class StreamingExportMixin:
+    """
+    "Export" dropdown for ``actions_list``: CSV/JSONL streamed straight from the
+    cursor, XLSX queued as a background ``ExportJob``. The links carry the
+    changelist's querystring, so rows follow its filters, search and ordering.
+    """
+    export_dataset = ""
+    export_actions = {
+        "title": _("Export"),
+        "icon": "download",
+        "items": ["export_csv_stream", "export_jsonl_stream", "export_xlsx_background", "export_pdf_background"],
+    }
+
+    def changelist_view(self, request, extra_context=None):
+        response = super().changelist_view(request, extra_context)
+        query = request.GET.urlencode()
+        if query and getattr(response, "context_data", None):
+            paths = {
+                reverse(f"{self.admin_site.name}:{self.opts.app_label}_{self.opts.model_name}_{name}")
+                for name in self.export_actions["items"]
+            }
+            for item in response.context_data.get("actions_list", []):
+                for link in item.get("items", [item]):
+                    if link.get("path") in paths:
+                        link["path"] = f"{link['path']}?{query}"
+        return response
+
+    def _export_queryset(self, request):
+        """The changelist's rows for the querystring the export link carried, or ``None`` if it is invalid."""
+        try:
+            return self.get_changelist_instance(request).queryset
+        except IncorrectLookupParameters:
+            return None
+
+    def _invalid_filters(self, request):
+        self.message_user(request, _("The changelist filters are invalid; nothing was exported."), messages.ERROR)
+        changelist = reverse(f"{self.admin_site.name}:{self.opts.app_label}_{self.opts.model_name}_changelist")
+        return redirect(f"{changelist}?{request.GET.urlencode()}")
+
+    def _stream(self, request, fmt):
+        queryset = self._export_queryset(request)
+        if queryset is None:
+            return self._invalid_filters(request)
+        return streaming_response(self.export_dataset, queryset, fmt)
+
+    @action(description=_("CSV (streamed)"), icon="csv", permissions=["view"])
+    def export_csv_stream(self, request: HttpRequest, queryset=None):
+        return self._stream(request, "csv")
+
+    @action(description=_("JSON Lines (streamed)"), icon="data_object", permissions=["view"])
+    def export_jsonl_stream(self, request: HttpRequest, queryset=None):
+        return self._stream(request, "jsonl")
+
+    def _queue_export(self, request, fmt):
+        queryset = self._export_queryset(request)
+        if queryset is None:
+            return self._invalid_filters(request)
+        # the worker replays the querystring through get_changelist_instance
+        job = queue_export(self.export_dataset, request.GET.urlencode(), fmt, user=request.user)
+        self.message_user(request, _("Export #%(id)s queued; download it here once it is done.") % {"id": job.pk})
+        return redirect(reverse("admin:courses_exportjob_changelist"))
+
+    def has_pdf_export_permission(self, request):
+        return getattr(settings, "USE_WEASYPRINT", False) and self.has_view_permission(request)
+
+    @action(description=_("XLSX (background)"), icon="table_view", permissions=["view"])
+    def export_xlsx_background(self, request: HttpRequest, queryset=None):
+        return self._queue_export(request, "xlsx")
+
+    @action(description=_("PDF (background)"), icon="picture_as_pdf", permissions=["pdf_export"])
+    def export_pdf_background(self, request: HttpRequest, queryset=None):
+        return self._queue_export(request, "pdf")
+
+
+@admin.register(m.ExportJob)
+class ExportJobAdmin(ModelAdmin):
+    list_display = ("__str__", "dataset", "fmt", "status", "rows", "requested_by", "created_at", "finished_at", "download")
+    list_filter = ("status", "dataset", "fmt")
+    list_select_related = ("requested_by",)
+    readonly_fields = ("dataset", "fmt", "querystring", "status", "rows", "requested_by", "file", "error",
+                       "created_at", "started_at", "finished_at")
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                "<int:pk>/download/",
+                self.admin_site.admin_view(self.download_view),
+                name="courses_exportjob_download",
+            ),
+        ] + super().get_urls()
+
+    def download_view(self, request: HttpRequest, pk: int):
+        job = m.ExportJob.objects.filter(pk=pk, status=m.ExportJob.STATUS_DONE).exclude(file="").first()
+        if job is None or not self.has_view_permission(request, job):
+            return HttpResponse(status=404)
+        return FileResponse(job.file.open("rb"), as_attachment=True, filename=os.path.basename(job.file.name))
+
+    @display(description=_("File"))
+    def download(self, obj: m.ExportJob) -> str:
+        if obj.status != m.ExportJob.STATUS_DONE or not obj.file:
+            return "-"
+        return format_html('<a href="{}">{}</a>', reverse("admin:courses_exportjob_download", args=[obj.pk]), _("Download"))
+
+
 # ──────────────────────────────────────────────────────────────
 # SUBSCRIPTIONS (financial analytics stay separate)
 # ──────────────────────────────────────────────────────────────
@@ -795,8 +1019,10 @@ class SubscriptionTransactionResource(resources.ModelResource):
 
 
 @admin.register(m.SubscriptionTransaction)
-class SubscriptionTransactionAdmin(SimpleHistoryAdmin, ModelAdmin):
+class SubscriptionTransactionAdmin(StreamingExportMixin, SimpleHistoryAdmin, ModelAdmin):
     resource_class = SubscriptionTransactionResource
+    export_dataset = "transactions"
+    actions_list = [StreamingExportMixin.export_actions]
     list_select_related = (
         "learner_enrollment__learner__user",
         "learner_enrollment__learning_path",
@@ -892,8 +1118,9 @@ class TransactionInline(admin.TabularInline):
 
 
 @admin.register(m.LearnerSubscribePlan)
-class LearnerSubscribePlanAdmin(ModelAdmin, ImportExportModelAdmin):
+class LearnerSubscribePlanAdmin(StreamingExportMixin, ModelAdmin, ImportExportModelAdmin):
     export_form_class = ExportForm
+    export_dataset = "subscriptions"
     resource_classes = [LearnerSubscribePlanResource]
     inlines = (TransactionInline,)
     autocomplete_fields = ['learner_enrollment', "subscription_plan"]
@@ -920,8 +1147,11 @@ class LearnerSubscribePlanAdmin(ModelAdmin, ImportExportModelAdmin):
     )
     ordering = ("-start_datetime", "-id")
     list_per_page = 50
-    readonly_fields = ("end_datetime", "expired_at")
-    actions_list = ["go_analytics_dropdown"]
+    readonly_fields = ("end_datetime", "effective_end_datetime", "frozen_until", "expired_at")
+    actions_list = ["go_analytics_dropdown", StreamingExportMixin.export_actions]
+
+    def get_import_resource_classes(self, request):
+        return [LearnerSubscribePlanImportResource]
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
@@ -961,9 +1191,9 @@ class LearnerSubscribePlanAdmin(ModelAdmin, ImportExportModelAdmin):
     def start_shamsi(self, obj: m.LearnerSubscribePlan) -> str:
         return _format_shamsi(obj.start_datetime)
 
-    @display(ordering="end_datetime", description=_("End (Shamsi)"))
+    @display(ordering="effective_end_datetime", description=_("End (Shamsi)"))
     def end_shamsi(self, obj: m.LearnerSubscribePlan) -> str:
-        return _format_shamsi(obj.end_datetime)
+        return _format_shamsi(obj.effective_end_datetime)
 
     @display(ordering="discount", description=_("Disc"))
     def discount_percent(self, obj: m.LearnerSubscribePlan) -> str:
@@ -982,6 +1212,10 @@ class LearnerSubscribePlanAdmin(ModelAdmin, ImportExportModelAdmin):
             return format_html(badge(_("Active"), "success"))
         elif obj.status == m.LearnerSubscribePlan.STATUS_EXPIRED:
             return format_html(badge(_("Expired"), "danger"))
+        elif obj.status == m.LearnerSubscribePlan.STATUS_FROZEN:
+            return format_html(badge(_("Frozen"), "info"))
+        elif obj.status == m.LearnerSubscribePlan.STATUS_RESERVED:
+            return format_html(badge(_("Reserved"), "warning"))
         return format_html(badge(str(obj.status), "default"))
 
     def get_export_formats(self) -> List[Type[Format]]:
@@ -1012,13 +1246,23 @@ class LearnerSubscribePlanAdmin(ModelAdmin, ImportExportModelAdmin):
             ctx,
         )
 
+    @cached_json(
+        m.RevenueDaily, m.LearnerSubscribePlan, m.SubscriptionPlan, m.LearningPath, m.Learner,
+        (settings.AUTH_USER_MODEL, {"birthdate"}),
+    )
     def analytics_data(self, request: HttpRequest):
         chart = (request.GET.get("chart") or "monthly_revenue").strip()
-        year = int(request.GET.get("year") or timezone.now().year)
+        calendar = "jalali" if request.GET.get("calendar") == "jalali" else "gregorian"
+        year = int(request.GET.get("year") or current_year(calendar))
         month_str = (request.GET.get("month") or "").strip()
         month = int(month_str) if month_str.isdigit() else None
         scope = (request.GET.get("scope") or "all").lower()
 
+        # revenue/count charts come from the pre-aggregated cube (courses.analytics)
+        payload = revenue_chart(chart, year, month=month, scope=scope, calendar=calendar)
+        if payload is not None:
+            return JsonResponse(payload)
+
         qs = m.LearnerSubscribePlan.objects.select_related(
             "subscription_plan",
             "learner_enrollment__learner__user",
@@ -1027,87 +1271,13 @@ class LearnerSubscribePlanAdmin(ModelAdmin, ImportExportModelAdmin):
         if scope == "active":
             qs = qs.filter(status=m.LearnerSubscribePlan.STATUS_ACTIVE)
 
-        if chart == "monthly_revenue":
-            if month:
-                rows = (
-                    qs.filter(start_datetime__year=year, start_datetime__month=month)
-                    .annotate(d=TruncDate("start_datetime"))
-                    .values("d")
-                    .order_by("d")
-                    .annotate(revenue=Sum("final_cost"), count=Count("id"))
-                )
-                labels, revenues, counts = [], [], []
-                for r in rows:
-                    dval = r["d"]
-                    labels.append(dval.strftime("%Y-%m-%d"))
-                    revenues.append(int(r["revenue"] or 0))
-                    counts.append(int(r["count"] or 0))
-                return JsonResponse(
-                    {
-                        "chart": chart,
-                        "year": year,
-                        "month": month,
-                        "labels": labels,
-                        "revenues": revenues,
-                        "counts": counts,
-                        "total_revenue": sum(revenues),
-                        "total_count": sum(counts),
-                    }
-                )
-            else:
-                rows = (
-                    qs.filter(start_datetime__year=year)
-                    .annotate(m=TruncMonth("start_datetime"))
-                    .values("m")
-                    .order_by("m")
-                    .annotate(revenue=Sum("final_cost"), count=Count("id"))
-                )
-                labels, revenues, counts = [], [], []
-                for r in rows:
-                    mval = r["m"]
-                    labels.append(mval.strftime("%Y-%m"))
-                    revenues.append(int(r["revenue"] or 0))
-                    counts.append(int(r["count"] or 0))
-                return JsonResponse(
-                    {
-                        "chart": chart,
-                        "year": year,
-                        "labels": labels,
-                        "revenues": revenues,
-                        "counts": counts,
-                        "total_revenue": sum(revenues),
-                        "total_count": sum(counts),
-                    }
-                )
-
-        if chart == "plan_counts":
-            base = qs.filter(start_datetime__year=year)
-            if month:
-                base = base.filter(start_datetime__month=month)
-            rows = base.values("subscription_plan__name").annotate(c=Count("id")).order_by("-c")
-            labels = [r["subscription_plan__name"] or "—" for r in rows]
-            counts = [int(r["c"] or 0) for r in rows]
-            return JsonResponse(
-                {"chart": chart, "year": year, "month": month, "labels": labels, "counts": counts, "total": sum(counts)}
-            )
-
-        if chart == "paths_pie":
-            base = qs.filter(start_datetime__year=year)
-            if month:
-                base = base.filter(start_datetime__month=month)
-            rows = (
-                base.values("learner_enrollment__learning_path__name")
-                .annotate(c=Count("id"))
-                .order_by("-c")
-            )
-            labels = [r["learner_enrollment__learning_path__name"] or "—" for r in rows]
-            values = [int(r["c"] or 0) for r in rows]
-            return JsonResponse({"chart": chart, "labels": labels, "values": values})
-
         if chart == "age_scatter":
-            base = qs.filter(start_datetime__year=year)
-            if month:
-                base = base.filter(start_datetime__month=month)
+            if calendar == "jalali":
+                base = qs.filter(start_datetime__date__range=jalali_range(year, month))
+            else:
+                base = qs.filter(start_datetime__year=year)
+                if month:
+                    base = base.filter(start_datetime__month=month)
             rev = base.values("learner_enrollment__learner_id").annotate(total=Sum("final_cost"))
             rev_map = {
                 r["learner_enrollment__learner_id"]: int(r["total"] or 0)
@@ -0,0 +1,401 @@
+"""
+Pre-aggregated data behind the admin analytics dashboards.
+
+Progress rollups
+----------------
+``StepProgressDaily`` holds one row per (local day, step, mentor) with
+
+- ``starts``       StepProgress rows whose ``initial_promise_date`` falls on the day
+- ``completions``  StepProgress rows whose ``task_completion_date`` falls on the day
+- ``evaluations`` / ``score_sum``  TaskEvaluations by ``evaluated_at``
+
+Signals mark the days a StepProgress/TaskEvaluation change touches in
+``RollupDirtyDay``; ``manage.py rollup_progress_analytics`` (hourly) recomputes
+those days (progress rollups and revenue cube), each in its own transaction that deletes the mark only after the
+rebuild, and ``--backfill`` rebuilds any date range. Days are recomputed as a
+whole (delete + insert), so the job is idempotent.
+
+``progress_chart`` answers the learning-path-wide charts of
+``LearningPathAdmin.progress_analytics_data`` from the rollups.
+
+Revenue cube
+------------
+``RevenueDaily`` holds one row per (local start day, plan, learning path, status)
+of LearnerSubscribePlan with the subscription count, the ``final_cost`` revenue
+and the paid/refunded amounts of their transactions. Saving or deleting a
+subscription or transaction marks its day(s) in ``RollupDirtyDay``, as do the
+bulk paths of ``LearnerSubscribePlanQuerySet``; ``refresh_dirty`` recomputes
+them and ``manage.py rebuild_revenue_cube`` rebuilds any range. ``revenue_chart`` serves
+``LearnerSubscribePlanAdmin.analytics_data``.
+
+Jalali calendar
+---------------
+``CalendarDay`` maps every Gregorian date to its Jalali (Shamsi) year, month, day
+and week (weeks start on Saturday), plus the first Gregorian date of that Jalali
+year/month/week. ``jalali_range`` turns a Jalali year/month into a date range for
+index-friendly filters and ``jalali_period`` is a subquery expression to group a
+date column by Jalali period in SQL. Charts take ``calendar="jalali"``.
+"""
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+import jdatetime as jd
+
+from django.db import models, transaction
+from django.db.models import Count, F, Max, Min, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from core import http_cache
+
+from .models import (
+    CalendarDay, EducationalStep, LearnerSubscribePlan, RevenueDaily, RollupDirtyDay, StepProgress,
+    StepProgressDaily, SubscriptionTransaction, TaskEvaluation, TransactionKind, TransactionStatus,
+)
+
+
+# ---------------------------------------------------------------------------
+# Dirty days
+# ---------------------------------------------------------------------------
+
+def local_day(value):
+    if value is None:
+        return None
+    return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+
+
+def mark_dirty(*values):
+    days = {local_day(v) for v in values} - {None}
+    if days:
+        # an upsert (not ignore_conflicts) blocks on a day refresh_dirty is rebuilding
+        RollupDirtyDay.objects.bulk_create(
+            [RollupDirtyDay(day=d) for d in days],
+            update_conflicts=True, unique_fields=["day"], update_fields=["marked_at"],
+        )
+
+
+# ---------------------------------------------------------------------------
+# Recompute
+# ---------------------------------------------------------------------------
+
+def _bounds(first_day, last_day):
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(first_day, time.min), tz)
+    end = timezone.make_aware(datetime.combine(last_day + timedelta(days=1), time.min), tz)
+    return start, end
+
+
+def rebuild_range(first_day, last_day):
+    """Recompute every rollup row of ``first_day..last_day`` (inclusive). Returns rows written."""
+    start, end = _bounds(first_day, last_day)
+    cells = defaultdict(lambda: {"starts": 0, "completions": 0, "evaluations": 0, "score_sum": 0})
+
+    def collect(rows, metric):
+        for r in rows:
+            cell = cells[(r["d"], r["step_key"], r["mentor_key"], r["lp_key"])]
+            for key, value in metric(r).items():
+                cell[key] += value or 0
+
+    sp_keys = dict(step_key=F("educational_step_id"), mentor_key=F("mentor_assignment__mentor_id"),
+                   lp_key=F("educational_step__learning_path_id"))
+    collect(
+        StepProgress.objects.filter(initial_promise_date__gte=start, initial_promise_date__lt=end)
+        .values(d=TruncDate("initial_promise_date"), **sp_keys).annotate(c=Count("id")).order_by(),
+        lambda r: {"starts": r["c"]},
+    )
+    collect(
+        StepProgress.objects.filter(task_completion_date__gte=start, task_completion_date__lt=end)
+        .values(d=TruncDate("task_completion_date"), **sp_keys).annotate(c=Count("id")).order_by(),
+        lambda r: {"completions": r["c"]},
+    )
+    collect(
+        TaskEvaluation.objects.filter(evaluated_at__gte=start, evaluated_at__lt=end)
+        .values(
+            d=TruncDate("evaluated_at"),
+            step_key=F("submission__step_progress__educational_step_id"),
+            mentor_key=F("submission__step_progress__mentor_assignment__mentor_id"),
+            lp_key=F("submission__step_progress__educational_step__learning_path_id"),
+        )
+        .annotate(c=Count("id"), s=Sum("score")).order_by(),
+        lambda r: {"evaluations": r["c"], "score_sum": r["s"]},
+    )
+
+    rows = [
+        StepProgressDaily(day=d, educational_step_id=step, mentor_id=mentor, learning_path_id=lp, **metrics)
+        for (d, step, mentor, lp), metrics in cells.items()
+    ]
+    with transaction.atomic():
+        StepProgressDaily.objects.filter(day__gte=first_day, day__lte=last_day).delete()
+        StepProgressDaily.objects.bulk_create(rows, batch_size=2000)
+        http_cache.bump(StepProgressDaily)
+    return len(rows)
+
+
+def refresh_dirty(limit=366):
+    """Recompute both rollups of the oldest ``limit`` dirty days. Returns ``(days, rows)``."""
+    days = rows = 0
+    while days < limit:
+        # Claim, rebuild and clear each day in one transaction: a failed rebuild
+        # leaves the day dirty, and the row lock makes a concurrent mark_dirty of
+        # that day wait and re-mark it after we commit instead of being lost.
+        with transaction.atomic():
+            dirty = RollupDirtyDay.objects.select_for_update(skip_locked=True).order_by("day").first()
+            if dirty is None:
+                break
+            rows += rebuild_range(dirty.day, dirty.day)
+            rows += rebuild_revenue_range(dirty.day, dirty.day)
+            dirty.delete()
+        days += 1
+    return days, rows
+
+
+def data_range():
+    """First and last local day that has any progress or evaluation data."""
+    bounds = [
+        StepProgress.objects.aggregate(a=Min("initial_promise_date"), b=Max("initial_promise_date")),
+        StepProgress.objects.aggregate(a=Min("task_completion_date"), b=Max("task_completion_date")),
+        TaskEvaluation.objects.aggregate(a=Min("evaluated_at"), b=Max("evaluated_at")),
+    ]
+    firsts = [local_day(b["a"]) for b in bounds if b["a"]]
+    lasts = [local_day(b["b"]) for b in bounds if b["b"]]
+    return (min(firsts), max(lasts)) if firsts else (None, None)
+
+
+# ---------------------------------------------------------------------------
+# Charts
+# ---------------------------------------------------------------------------
+
+def progress_chart(chart, lp_id, mentor_id=None, year=None, month=None, calendar="gregorian"):
+    """Payload for the learning-path-wide progress charts, or None for charts the rollups do not cover."""
+    rows = StepProgressDaily.objects.filter(learning_path_id=lp_id)
+    if mentor_id:
+        rows = rows.filter(mentor_id=mentor_id)
+
+    if chart == "step_funnel":
+        steps = list(
+            EducationalStep.objects.filter(learning_path_id=lp_id).order_by("sequence_no").values("id", "title")
+        )
+        sums = {
+            r["educational_step_id"]: r
+            for r in rows.values("educational_step_id").annotate(t=Sum("starts"), c=Sum("completions")).order_by()
+        }
+        return {
+            "chart": chart,
+            "labels": [s["title"] for s in steps],
+            "total": [int(sums.get(s["id"], {}).get("t") or 0) for s in steps],
+            "completed": [int(sums.get(s["id"], {}).get("c") or 0) for s in steps],
+        }
+
+    if chart == "avg_score":
+        per_step = (
+            rows.values("educational_step__title", "educational_step__sequence_no")
+            .annotate(n=Sum("evaluations"), s=Sum("score_sum"))
+            .filter(n__gt=0)
+            .order_by("educational_step__sequence_no")
+        )
+        return {
+            "chart": chart,
+            "labels": [r["educational_step__title"] for r in per_step],
+            "scores": [round(r["s"] / r["n"], 2) for r in per_step],
+        }
+
+    if chart == "completions_over_time":
+        rows = _in_period(rows, "day", year, month, calendar)
+        per_day = rows.values("day").annotate(c=Sum("completions")).filter(c__gt=0).order_by("day")
+        labels, daily, cumulative, total = [], [], [], 0
+        for r in per_day:
+            labels.append(period_label(r["day"], "day", calendar))
+            daily.append(int(r["c"]))
+            total += int(r["c"])
+            cumulative.append(total)
+        return {"chart": chart, "labels": labels, "daily": daily, "cumulative": cumulative}
+
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Revenue cube
+# ---------------------------------------------------------------------------
+
+def rebuild_revenue_range(first_day, last_day):
+    """Recompute the revenue cube of ``first_day..last_day`` (inclusive). Returns rows written."""
+    start, end = _bounds(first_day, last_day)
+    keys = dict(
+        d=TruncDate("start_datetime"),
+        plan_key=F("subscription_plan_id"),
+        lp_key=F("learner_enrollment__learning_path_id"),
+        status_key=F("status"),
+    )
+    subs = LearnerSubscribePlan.objects.filter(start_datetime__gte=start, start_datetime__lt=end)
+    cells = {
+        (r["d"], r["plan_key"], r["lp_key"], r["status_key"]): {
+            "subscriptions": r["n"], "revenue": r["revenue"] or 0, "paid": 0, "refunded": 0,
+        }
+        for r in subs.values(**keys).annotate(n=Count("id"), revenue=Sum("final_cost")).order_by()
+    }
+    paid = Q(status=TransactionStatus.PAID) & ~Q(kind=TransactionKind.REFUND)
+    refunded = Q(kind=TransactionKind.REFUND) | Q(status=TransactionStatus.REFUNDED)
+    tx = (
+        SubscriptionTransaction.objects
+        .filter(subscription__start_datetime__gte=start, subscription__start_datetime__lt=end)
+        .values(
+            d=TruncDate("subscription__start_datetime"),
+            plan_key=F("subscription__subscription_plan_id"),
+            lp_key=F("subscription__learner_enrollment__learning_path_id"),
+            status_key=F("subscription__status"),
+        )
+        .annotate(p=Sum("amount", filter=paid), r=Sum("amount", filter=refunded))
+        .order_by()
+    )
+    for r in tx:
+        cell = cells.get((r["d"], r["plan_key"], r["lp_key"], r["status_key"]))
+        if cell:
+            cell["paid"] += r["p"] or 0
+            cell["refunded"] += r["r"] or 0
+
+    rows = [
+        RevenueDaily(day=d, subscription_plan_id=plan, learning_path_id=lp, status=status, **measures)
+        for (d, plan, lp, status), measures in cells.items()
+    ]
+    with transaction.atomic():
+        RevenueDaily.objects.filter(day__gte=first_day, day__lte=last_day).delete()
+        RevenueDaily.objects.bulk_create(rows, batch_size=2000)
+        http_cache.bump(RevenueDaily)
+    return len(rows)
+
+
+def revenue_data_range():
+    bounds = LearnerSubscribePlan.objects.aggregate(a=Min("start_datetime"), b=Max("start_datetime"))
+    return local_day(bounds["a"]), local_day(bounds["b"])
+
+
+def revenue_chart(chart, year, month=None, scope="all", calendar="gregorian"):
+    """Payload of the subscription charts the cube covers, or None (e.g. ``age_scatter``)."""
+    cube = _in_period(RevenueDaily.objects.all(), "day", year, month, calendar)
+    if scope == "active":
+        cube = cube.filter(status=LearnerSubscribePlan.STATUS_ACTIVE)
+
+    if chart == "monthly_revenue":
+        by = "day" if month else "month"
+        rows = (
+            cube.values(b=_bucket("day", by, calendar))
+            .annotate(revenue=Sum("revenue"), count=Sum("subscriptions"))
+            .order_by("b")
+        )
+        labels, revenues, counts = [], [], []
+        for r in rows:
+            labels.append(period_label(r["b"], by, calendar))
+            revenues.append(int(r["revenue"] or 0))
+            counts.append(int(r["count"] or 0))
+        payload = {"chart": chart, "year": year}
+        if month:
+            payload["month"] = month
+        payload.update({
+            "labels": labels,
+            "revenues": revenues,
+            "counts": counts,
+            "total_revenue": sum(revenues),
+            "total_count": sum(counts),
+        })
+        return payload
+
+    if chart == "plan_counts":
+        rows = cube.values("subscription_plan__name").annotate(c=Sum("subscriptions")).order_by("-c")
+        labels = [r["subscription_plan__name"] or "—" for r in rows]
+        counts = [int(r["c"] or 0) for r in rows]
+        return {"chart": chart, "year": year, "month": month, "labels": labels, "counts": counts, "total": sum(counts)}
+
+    if chart == "paths_pie":
+        rows = cube.values("learning_path__name").annotate(c=Sum("subscriptions")).order_by("-c")
+        return {
+            "chart": chart,
+            "labels": [r["learning_path__name"] or "—" for r in rows],
+            "values": [int(r["c"] or 0) for r in rows],
+        }
+
+    return None
+
+
+
+# ---------------------------------------------------------------------------
+# Jalali calendar
+# ---------------------------------------------------------------------------
+
+JALALI_PERIODS = {"year": "year_start", "month": "month_start", "week": "week_start"}
+
+
+def calendar_rows(first_day, last_day):
+    """``CalendarDay`` field dicts for ``first_day..last_day`` (inclusive)."""
+    day = first_day
+    while day <= last_day:
+        j = jd.date.fromgregorian(date=day)
+        farvardin_1 = jd.date(j.year, 1, 1)
+        yield {
+            "date": day,
+            "jalali_year": j.year,
+            "jalali_month": j.month,
+            "jalali_day": j.day,
+            "jalali_week": (j.yday() - 1 + farvardin_1.weekday()) // 7 + 1,
+            "jalali_weekday": j.weekday(),
+            "year_start": farvardin_1.togregorian(),
+            "month_start": day - timedelta(days=j.day - 1),
+            "week_start": day - timedelta(days=j.weekday()),
+        }
+        day += timedelta(days=1)
+
+
+def fill_calendar(first_day, last_day, batch_size=2000):
+    """Insert the missing ``CalendarDay`` rows of the range. Returns rows generated."""
+    rows = [CalendarDay(**r) for r in calendar_rows(first_day, last_day)]
+    CalendarDay.objects.bulk_create(rows, batch_size=batch_size, ignore_conflicts=True)
+    return len(rows)
+
+
+def jalali_range(year, month=None):
+    """First and last Gregorian date of a Jalali year (or month of it)."""
+    first = jd.date(year, month or 1, 1)
+    if month:
+        last = jd.date(year + (month == 12), month % 12 + 1, 1)
+    else:
+        last = jd.date(year + 1, 1, 1)
+    return first.togregorian(), last.togregorian() - timedelta(days=1)
+
+
+def jalali_period(field, period="month"):
+    """Start date of the Jalali year/month/week of the date column ``field``, as a subquery."""
+    return Subquery(
+        CalendarDay.objects.filter(date=OuterRef(field)).values(JALALI_PERIODS[period])[:1],
+        output_field=models.DateField(),
+    )
+
+
+def current_year(calendar="gregorian"):
+    today = timezone.localdate()
+    return jd.date.fromgregorian(date=today).year if calendar == "jalali" else today.year
+
+
+def _in_period(qs, field, year=None, month=None, calendar="gregorian"):
+    if calendar == "jalali":
+        if year:
+            return qs.filter(**{f"{field}__range": jalali_range(int(year), int(month) if month else None)})
+        return qs
+    if year:
+        qs = qs.filter(**{f"{field}__year": int(year)})
+    if month:
+        qs = qs.filter(**{f"{field}__month": int(month)})
+    return qs
+
+
+def _bucket(field, by, calendar):
+    """Expression grouping the date ``field`` by "day" or "month" in the given calendar."""
+    if by == "day":
+        return F(field)
+    return jalali_period(field, "month") if calendar == "jalali" else TruncMonth(field)
+
+
+def period_label(value, by, calendar):
+    """``YYYY-MM-DD`` / ``YYYY-MM`` label of a date in the given calendar."""
+    if calendar == "jalali":
+        value = jd.date.fromgregorian(date=value)
+    return value.strftime("%Y-%m-%d" if by == "day" else "%Y-%m")
@@ -0,0 +1,127 @@
+"""
+Attendance timeline of one learner with one mentor.
+
+Group participations and private (step) sessions are merged with a SQL UNION and
+paged with a keyset on ``(datetime, type, id)`` descending, so each page is a
+single ``LIMIT`` query no matter how deep the mentor scrolls. Only the rows of the
+page are then loaded as objects.
+"""
+
+from datetime import datetime
+
+from django.db.models import Case, CharField, F, Q, Value, When
+
+from .models import MentorGroupSessionParticipant, StepProgressSession
+
+PAGE_SIZE = 30
+
+
+def encode_cursor(record):
+    return f"{record['datetime'].isoformat()}|{record['type']}|{record['source'].pk}"
+
+
+def decode_cursor(raw):
+    """``(datetime, type, id)`` or None for a missing/garbled cursor (= first page)."""
+    try:
+        dt, kind, pk = raw.split("|")
+        return datetime.fromisoformat(dt), kind, int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _before(kind, cursor):
+    """Keyset predicate for one UNION branch; ``kind`` is constant within a branch."""
+    dt, c_kind, c_pk = cursor
+    if kind < c_kind:
+        return Q(dt__lte=dt)
+    if kind > c_kind:
+        return Q(dt__lt=dt)
+    return Q(dt__lt=dt) | Q(dt=dt, obj__lt=c_pk)
+
+
+def attendance_timeline(mentor, learner_id, *, presence=None, kind=None, cursor=None, limit=PAGE_SIZE):
+    """
+    One page of records, newest first, plus the cursor of the next page (or None).
+
+    ``presence``: "present" | "absent"; ``kind``: "group" | "private".
+    Records are dicts with ``datetime, present, type, session_name, source``.
+    """
+    cursor = decode_cursor(cursor) if cursor else None
+    if kind not in ("group", "private"):
+        kind = None
+    branches = []
+
+    if kind in (None, "group"):
+        group = MentorGroupSessionParticipant.objects.filter(
+            mentor_assignment__mentor=mentor,
+            mentor_assignment__enrollment__learner_id=learner_id,
+        )
+        if presence in ("present", "absent"):
+            group = group.filter(learner_was_present=(presence == "present"))
+        group = group.annotate(
+            kind=Value("group", output_field=CharField()),
+            obj=F("pk"),
+            dt=Case(
+                When(
+                    mentor_group_session_occurence__occurence_datetime_changed=True,
+                    then=F("mentor_group_session_occurence__new_datetime"),
+                ),
+                default=F("mentor_group_session_occurence__occurence_datetime"),
+            ),
+            is_present=F("learner_was_present"),
+        )
+        if cursor:
+            group = group.filter(_before("group", cursor))
+        branches.append(group.values("kind", "obj", "dt", "is_present").order_by())
+
+    if kind in (None, "private"):
+        private = StepProgressSession.objects.filter(
+            step_progress__mentor_assignment__mentor=mentor,
+            step_progress__mentor_assignment__enrollment__learner_id=learner_id,
+        )
+        if presence in ("present", "absent"):
+            private = private.filter(present=(presence == "present"))
+        private = private.annotate(
+            kind=Value("private", output_field=CharField()),
+            obj=F("pk"),
+            dt=F("datetime"),
+            is_present=F("present"),
+        )
+        if cursor:
+            private = private.filter(_before("private", cursor))
+        branches.append(private.values("kind", "obj", "dt", "is_present").order_by())
+
+    rows = branches[0].union(*branches[1:], all=True) if len(branches) > 1 else branches[0]
+    rows = list(rows.order_by("-dt", "-kind", "-obj")[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    participants = MentorGroupSessionParticipant.objects.select_related(
+        "mentor_group_session_occurence__mentor_group_session__session_type",
+    ).in_bulk([r["obj"] for r in rows if r["kind"] == "group"])
+    sessions = StepProgressSession.objects.select_related(
+        "session_type", "step_progress__educational_step",
+    ).in_bulk([r["obj"] for r in rows if r["kind"] == "private"])
+
+    records = []
+    for r in rows:
+        if r["kind"] == "group":
+            p = participants[r["obj"]]
+            records.append({
+                "datetime": r["dt"],
+                "present": p.learner_was_present,
+                "type": "group",
+                "session_name": p.mentor_group_session_occurence.mentor_group_session.session_type.name_fa,
+                "source": p,
+            })
+        else:
+            s = sessions[r["obj"]]
+            records.append({
+                "datetime": r["dt"],
+                "present": s.present,
+                "type": "private",
+                "session_name": s.session_type.get_code_display(),
+                "source": s,
+            })
+
+    return records, (encode_cursor(records[-1]) if has_more else None)
@@ -0,0 +1,87 @@
+"""
+Per-mentor numbers of the feedback inbox, kept in Django's cache.
+
+- Pending-review count: built once with the ``Exists`` query, then kept current by
+  the TaskSubmission/TaskEvaluation signals (``incr``/``decr`` after commit on
+  create, dropped on anything else so the next read rebuilds it).
+- Learner filter options: ``(id, name)`` of the mentor's learners, dropped when one
+  of the mentor's assignments changes.
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+TIMEOUT = 300
+
+
+def _pending_key(mentor_id):
+    return f"courses:mentor_pending:{mentor_id}"
+
+
+def _learners_key(mentor_id):
+    return f"courses:mentor_learners:{mentor_id}"
+
+
+def mentor_pending_count(mentor_id):
+    """Submissions of the mentor's learners the mentor has not evaluated yet."""
+    count = cache.get(_pending_key(mentor_id))
+    if count is None:
+        from .models import TaskEvaluation, TaskSubmission
+
+        count = (
+            TaskSubmission.objects
+            .filter(step_progress__mentor_assignment__mentor_id=mentor_id)
+            .filter(~Exists(TaskEvaluation.objects.filter(submission=OuterRef("pk"), mentor_id=mentor_id)))
+            .count()
+        )
+        cache.set(_pending_key(mentor_id), count, TIMEOUT)
+    return count
+
+
+def mentor_learner_options(mentor_id):
+    """``[{"id", "name"}, ...]`` for the learner filter, ordered by name."""
+    options = cache.get(_learners_key(mentor_id))
+    if options is None:
+        from .models import Learner
+
+        rows = (
+            Learner.objects
+            .filter(enrollments__mentor_assignments__mentor_id=mentor_id)
+            .values_list("pk", "user__first_name", "user__last_name", "user__username")
+            .distinct()
+        )
+        options = sorted(
+            ({"id": pk, "name": f"{first} {last}".strip() or username} for pk, first, last, username in rows),
+            key=lambda o: o["name"].lower(),
+        )
+        cache.set(_learners_key(mentor_id), options, TIMEOUT)
+    return options
+
+
+def _adjust(key, delta):
+    try:
+        if delta > 0:
+            cache.incr(key, delta)
+        else:
+            cache.decr(key, -delta)
+    except ValueError:
+        # not cached right now; the next read counts from the database
+        pass
+
+
+def adjust_pending(mentor_id, delta):
+    key = _pending_key(mentor_id)
+    transaction.on_commit(lambda: _adjust(key, delta))
+
+
+def invalidate_pending(mentor_ids):
+    keys = [_pending_key(mid) for mid in set(mentor_ids) if mid]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_learner_options(mentor_ids):
+    keys = [_learners_key(mid) for mid in set(mentor_ids) if mid]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
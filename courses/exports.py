@@ -0,0 +1,206 @@
+"""
+Streaming exports of subscriptions and transactions.
+
+The import-export formats build a whole tablib ``Dataset`` in memory and call
+``dehydrate_*`` per row, touching related objects. Here a dataset is a flat list
+of ``values_list`` paths read with ``.iterator(chunk_size=...)`` (a server-side
+cursor on PostgreSQL), so memory stays flat whatever the row count:
+
+* CSV / JSONL are written straight into a ``StreamingHttpResponse``; the
+  download starts with the first chunk.
+* XLSX and PDF can't be streamed, so the admin queues an ``ExportJob`` holding
+  the changelist's querystring, and ``manage.py process_exports`` replays it
+  through the model admin and writes the rows to a file (openpyxl's write-only
+  workbook; chunked WeasyPrint for PDF, see ``core/pdf.py``), like
+  ``process_outbox`` drains the SMS outbox.
+
+The columns match ``LearnerSubscribePlanResource`` / ``SubscriptionTransactionResource``.
+"""
+
+import csv
+import json
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+
+from django.core.files import File
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpRequest, QueryDict, StreamingHttpResponse
+from django.utils import timezone
+
+from core.pdf import render_pdf
+
+from .models import ExportJob, LearnerSubscribePlan, SubscriptionTransaction
+
+CHUNK_SIZE = 2000
+
+
+@dataclass(frozen=True)
+class Dataset:
+    model: type
+    headers: tuple
+    paths: tuple
+    row: Callable = tuple  # values_list tuple -> output row (same length as headers)
+
+
+def _subscription_row(values):
+    enrollment_id, first, last, email, plan, *rest = values
+    return (f"{first} {last}".strip() or email or str(enrollment_id), plan, *rest)
+
+
+DATASETS = {
+    "subscriptions": Dataset(
+        model=LearnerSubscribePlan,
+        headers=("learner_full_name", "plan_name", "start_datetime", "end_datetime",
+                 "discount_percent", "final_cost_toman", "status"),
+        paths=("learner_enrollment_id", "learner_enrollment__learner__user__first_name",
+               "learner_enrollment__learner__user__last_name", "learner_enrollment__learner__user__email",
+               "subscription_plan__name", "start_datetime", "end_datetime", "discount", "final_cost", "status"),
+        row=_subscription_row,
+    ),
+    "transactions": Dataset(
+        model=SubscriptionTransaction,
+        headers=("id", "learner_enrollment__learner__user__username", "subscription_plan__name",
+                 "kind", "status", "amount", "paid_at", "gateway", "ref", "note"),
+        paths=("id", "learner_enrollment__learner__user__username", "subscription_plan__name",
+               "kind", "status", "amount", "paid_at", "gateway", "ref", "note"),
+    ),
+}
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "pdf": "application/pdf",
+}
+
+
+def iter_rows(name, queryset, chunk_size=CHUNK_SIZE):
+    """Output rows of dataset ``name`` for ``queryset``, read ``chunk_size`` at a time."""
+    ds = DATASETS[name]
+    for values in queryset.values_list(*ds.paths).iterator(chunk_size=chunk_size):
+        yield ds.row(values)
+
+
+def _local(value):
+    # openpyxl refuses tz-aware datetimes
+    return timezone.localtime(value).replace(tzinfo=None) if isinstance(value, datetime) else value
+
+
+class _Echo:
+    """File-like object whose ``write`` hands the line back, for ``csv.writer``."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(name, rows):
+    writer = csv.writer(_Echo())
+    # BOM so Excel opens the Persian names as UTF-8
+    yield "\ufeff" + writer.writerow(DATASETS[name].headers)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def jsonl_lines(name, rows):
+    headers = DATASETS[name].headers
+    for row in rows:
+        yield json.dumps(dict(zip(headers, row)), cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+WRITERS = {"csv": csv_lines, "jsonl": jsonl_lines}
+
+
+def filename(name, fmt):
+    return f"{name}-{timezone.localtime():%Y%m%d-%H%M}.{fmt}"
+
+
+def streaming_response(name, queryset, fmt):
+    """CSV/JSONL download of ``queryset`` that starts with the first chunk and holds one chunk in memory."""
+    response = StreamingHttpResponse(
+        (line.encode("utf-8") for line in WRITERS[fmt](name, iter_rows(name, queryset))),
+        content_type=CONTENT_TYPES[fmt],
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename(name, fmt)}"'
+    return response
+
+
+def write_xlsx(name, rows, fileobj):
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(name)
+    ws.append(DATASETS[name].headers)
+    for row in rows:
+        ws.append([_local(v) for v in row])
+    wb.save(fileobj)
+
+
+# ---------------------------------------------------------------------------
+# Background exports
+# ---------------------------------------------------------------------------
+
+def job_queryset(job):
+    """The rows of the changelist ``job`` was queued from, rebuilt by its model admin."""
+    from django.contrib import admin
+
+    request = HttpRequest()
+    request.method = "GET"
+    request.GET = QueryDict(job.querystring)
+    request.user = job.requested_by or AnonymousUser()
+    model_admin = admin.site.get_model_admin(DATASETS[job.dataset].model)
+    return model_admin.get_changelist_instance(request).queryset
+
+
+def queue_export(name, querystring="", fmt="xlsx", user=None):
+    return ExportJob.objects.create(dataset=name, fmt=fmt, querystring=querystring, requested_by=user)
+
+
+def _claim(lease_seconds):
+    with transaction.atomic():
+        job = ExportJob.objects.due(lease_seconds).select_for_update(skip_locked=True).order_by("created_at").first()
+        if job:
+            job.status = ExportJob.STATUS_RUNNING
+            job.started_at = timezone.now()
+            job.save(update_fields=["status", "started_at"])
+    return job
+
+
+def run_export(job):
+    """Write ``job``'s rows to its file. Memory stays at one chunk plus openpyxl's write-only buffer."""
+    job.rows = 0
+
+    def counted():
+        for row in iter_rows(job.dataset, job_queryset(job)):
+            job.rows += 1
+            yield row
+
+    with tempfile.TemporaryFile() as tmp:
+        if job.fmt == "xlsx":
+            write_xlsx(job.dataset, counted(), tmp)
+        elif job.fmt == "pdf":
+            tmp.write(render_pdf(DATASETS[job.dataset].headers, counted(), title=f"{job.dataset.title()} export"))
+        else:
+            for line in WRITERS[job.fmt](job.dataset, counted()):
+                tmp.write(line.encode("utf-8"))
+        tmp.seek(0)
+        job.file.save(filename(job.dataset, job.fmt), File(tmp), save=False)
+
+
+def process_exports(lease_seconds=3600):
+    """Run one due job. Returns it (done or failed), or ``None`` if nothing was queued."""
+    job = _claim(lease_seconds)
+    if job is None:
+        return None
+    try:
+        run_export(job)
+    except Exception as exc:
+        job.status, job.error = ExportJob.STATUS_FAILED, repr(exc)[:1000]
+    else:
+        job.status, job.error = ExportJob.STATUS_DONE, ""
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "error", "rows", "file", "finished_at"])
+    return job
@@ -4,11 +4,11 @@ from courses.models import LearnerSubscribePlan, SubscribePlanStatus
 from django.db import models
 
 class Command(BaseCommand):
-    help = "Backfill expired_at := end_datetime where status is expired and expired_at is null."
+    help = "Backfill expired_at := effective_end_datetime where status is expired and expired_at is null."
 
     def handle(self, *args, **opts):
         qs = LearnerSubscribePlan.objects.filter(
-            status=SubscribePlanStatus.EXPIRED, expired_at__isnull=True, end_datetime__isnull=False
+            status=SubscribePlanStatus.EXPIRED, expired_at__isnull=True, effective_end_datetime__isnull=False
         )
-        n = qs.update(expired_at=models.F("end_datetime"))
+        n = qs.update(expired_at=models.F("effective_end_datetime"))
         self.stdout.write(self.style.SUCCESS(f"Backfilled {n} rows."))
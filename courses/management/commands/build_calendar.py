@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.analytics import fill_calendar, jalali_range
+
+
+class Command(BaseCommand):
+    help = "Fill the Jalali calendar dimension (CalendarDay) for a range of Jalali years."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from-year", dest="from_year", type=int, default=1390, help="Jalali year, inclusive.")
+        parser.add_argument("--to-year", dest="to_year", type=int, default=1429, help="Jalali year, inclusive.")
+
+    def handle(self, *args, **opts):
+        if opts["from_year"] > opts["to_year"]:
+            raise CommandError("--from-year is after --to-year")
+        first, _ = jalali_range(opts["from_year"])
+        _, last = jalali_range(opts["to_year"])
+        n = fill_calendar(first, last)
+        self.stdout.write(self.style.SUCCESS(f"Calendar covers {first}..{last} ({n} days)."))
@@ -1,10 +1,41 @@
+import time
+
 from django.core.management.base import BaseCommand
 from django.utils import timezone
+
 from courses.models import LearnerSubscribePlan
 
+
 class Command(BaseCommand):
-    help = "Mark overdue subscriptions as expired and send notifications."
+    help = (
+        "Advance subscriptions by the clock: start reserved ones, unfreeze ended freezes, "
+        "expire overdue ones and queue their notifications."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", dest="chunk_size", type=int, default=1000,
+                            help="Subscriptions per UPDATE/transaction.")
+        parser.add_argument("--dry-run", dest="dry_run", action="store_true",
+                            help="Only count the subscriptions that are due.")
 
     def handle(self, *args, **opts):
-        n = LearnerSubscribePlan.objects.expire_and_notify(at=timezone.now())
-        self.stdout.write(self.style.SUCCESS(f"Expired & notified: {n}"))
+        started = time.monotonic()
+        now = timezone.now()
+        activated, unfrozen = LearnerSubscribePlan.objects.start_and_unfreeze(at=now, dry_run=opts["dry_run"])
+        expired = queued = chunks = 0
+        for n, q in LearnerSubscribePlan.objects.expire_chunks(
+            at=now, chunk_size=opts["chunk_size"], dry_run=opts["dry_run"],
+        ):
+            expired += n
+            queued += q
+            chunks += 1
+            if opts["verbosity"] > 1:
+                self.stdout.write(f"chunk {chunks}: {n} expired, {q} messages queued")
+
+        elapsed = time.monotonic() - started
+        rate = expired / elapsed if elapsed else 0
+        verb = "Would expire" if opts["dry_run"] else "Expired"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {expired} subscription(s) in {chunks} chunk(s), {queued} message(s) queued; "
+            f"{elapsed:.2f}s ({rate:.0f}/s). Started {activated}, unfrozen {unfrozen}."
+        ))
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from courses.exports import process_exports
+from courses.models import ExportJob
+
+
+class Command(BaseCommand):
+    help = "Generate the queued background exports (XLSX/PDF) requested from the admin."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lease", type=int, default=3600,
+                            help="Seconds after which a running job is considered crashed and retried.")
+        parser.add_argument("--loop", action="store_true", help="Keep polling instead of exiting when empty.")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds to sleep between polls with --loop.")
+
+    def handle(self, *args, **opts):
+        done = failed = 0
+        while True:
+            job = process_exports(lease_seconds=opts["lease"])
+            if job is not None:
+                if job.status == ExportJob.STATUS_DONE:
+                    done += 1
+                    self.stdout.write(f"{job}: {job.rows} rows -> {job.file.name}")
+                else:
+                    failed += 1
+                    self.stderr.write(f"{job}: {job.error}")
+                continue
+            if not opts["loop"]:
+                break
+            time.sleep(opts["interval"])
+
+        self.stdout.write(self.style.SUCCESS(f"Exports: {done} done, {failed} failed."))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from courses.models import LearnerEnrollment, EnrollmentProgress
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized EnrollmentProgress rows from StepProgress/TaskSubmission/TaskEvaluation."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", type=int, help="Only enrollments of this learning path id.")
+        parser.add_argument("--enrollment", type=int, help="Only this enrollment id.")
+        parser.add_argument("--batch-size", dest="batch_size", type=int, default=500)
+
+    def handle(self, *args, **opts):
+        qs = LearnerEnrollment.objects.order_by("pk")
+        if opts["path"]:
+            qs = qs.filter(learning_path_id=opts["path"])
+        if opts["enrollment"]:
+            qs = qs.filter(pk=opts["enrollment"])
+
+        n = EnrollmentProgress.objects.rebuild(qs, batch_size=opts["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt progress for {n} enrollments."))
@@ -0,0 +1,31 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.analytics import rebuild_revenue_range, revenue_data_range
+
+
+class Command(BaseCommand):
+    help = "Rebuild the subscription revenue cube for a date range (default: all subscriptions)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", type=date.fromisoformat, help="YYYY-MM-DD, inclusive.")
+        parser.add_argument("--until", type=date.fromisoformat, help="YYYY-MM-DD, inclusive.")
+        parser.add_argument("--chunk-days", dest="chunk_days", type=int, default=31)
+
+    def handle(self, *args, **opts):
+        first, last = revenue_data_range()
+        first = opts["since"] or first
+        last = opts["until"] or last
+        if first is None or last is None:
+            self.stdout.write(self.style.SUCCESS("No subscriptions to aggregate."))
+            return
+        if first > last:
+            raise CommandError("--since is after --until")
+
+        rows, day = 0, first
+        while day <= last:
+            chunk_end = min(day + timedelta(days=opts["chunk_days"] - 1), last)
+            rows += rebuild_revenue_range(day, chunk_end)
+            day = chunk_end + timedelta(days=1)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt revenue cube {first}..{last}: {rows} rows."))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from courses.models import SearchDocument
+from courses.search import SOURCES, reindex
+
+
+class Command(BaseCommand):
+    help = "Rebuild the learner/mentor/task search documents and drop orphaned ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--kind", choices=sorted(SOURCES), action="append",
+                            help="Only rebuild this kind (repeatable). Default: all.")
+        parser.add_argument("--batch-size", dest="batch_size", type=int, default=2000)
+
+    def handle(self, *args, **opts):
+        for kind in opts["kind"] or sorted(SOURCES):
+            model = SOURCES[kind][0]
+            indexed = reindex(kind, batch_size=opts["batch_size"])
+            orphans, _ = (
+                SearchDocument.objects.filter(kind=kind)
+                .exclude(object_id__in=model.objects.values("pk"))
+                .delete()
+            )
+            self.stdout.write(self.style.SUCCESS(f"{kind}: indexed {indexed}, removed {orphans} orphaned."))
@@ -0,0 +1,42 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.analytics import data_range, rebuild_range, refresh_dirty
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh the progress analytics rollups. By default recomputes the days marked dirty "
+        "since the last run, revenue cube included (run hourly); --backfill rebuilds a whole "
+        "date range of the progress rollups."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--backfill", action="store_true",
+                            help="Rebuild every day from --since to --until (default: all data).")
+        parser.add_argument("--since", type=date.fromisoformat, help="YYYY-MM-DD, inclusive.")
+        parser.add_argument("--until", type=date.fromisoformat, help="YYYY-MM-DD, inclusive.")
+        parser.add_argument("--chunk-days", dest="chunk_days", type=int, default=31)
+
+    def handle(self, *args, **opts):
+        if not opts["backfill"]:
+            days, rows = refresh_dirty()
+            self.stdout.write(self.style.SUCCESS(f"Recomputed {days} dirty day(s), {rows} rollup and revenue rows."))
+            return
+
+        first, last = data_range()
+        first = opts["since"] or first
+        last = opts["until"] or last
+        if first is None or last is None:
+            self.stdout.write(self.style.SUCCESS("No progress data to roll up."))
+            return
+        if first > last:
+            raise CommandError("--since is after --until")
+
+        rows, day = 0, first
+        while day <= last:
+            chunk_end = min(day + timedelta(days=opts["chunk_days"] - 1), last)
+            rows += rebuild_range(day, chunk_end)
+            day = chunk_end + timedelta(days=1)
+        self.stdout.write(self.style.SUCCESS(f"Backfilled {first}..{last}: {rows} rollup rows."))
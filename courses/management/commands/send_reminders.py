@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from courses.models import StepProgress, LearnerSubscribePlan
+from courses.signals import notify_deadlines_approaching, notify_subscriptions_expiring
+
+
+class Command(BaseCommand):
+    help = "Notify learners about step deadlines and subscriptions ending soon. Safe to re-run."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--deadline-hours", dest="deadline_hours", type=int, default=24)
+        parser.add_argument("--subscription-days", dest="subscription_days", type=int, default=3)
+        parser.add_argument("--chunk-size", dest="chunk_size", type=int, default=1000)
+
+    def handle(self, *args, **opts):
+        now = timezone.now()
+        chunk_size = opts["chunk_size"]
+
+        step_progresses = (
+            StepProgress.objects
+            .due_between(now, now + timezone.timedelta(hours=opts["deadline_hours"]))
+            .select_related("educational_step", "mentor_assignment__enrollment__learner")
+            .only("id", "due_at", "educational_step__title",
+                  "mentor_assignment__enrollment__learner__user_id")
+        )
+        plans = (
+            LearnerSubscribePlan.objects
+            .ending_between(now, now + timezone.timedelta(days=opts["subscription_days"]))
+            .select_related("learner_enrollment__learner")
+            .only("id", "effective_end_datetime", "learner_enrollment__learner__user_id")
+        )
+
+        deadlines = self._run(step_progresses, notify_deadlines_approaching, chunk_size)
+        expiring = self._run(plans, notify_subscriptions_expiring, chunk_size)
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {deadlines} deadline and {expiring} subscription-expiring notifications."
+        ))
+
+    def _run(self, qs, notify, chunk_size):
+        # Walk by primary key so each chunk is one indexed query and a crash can resume;
+        # dedupe keys make already-notified rows a no-op on the next run.
+        sent, last_pk = 0, 0
+        while True:
+            chunk = list(qs.filter(pk__gt=last_pk).order_by("pk")[:chunk_size])
+            if not chunk:
+                return sent
+            with transaction.atomic():
+                sent += len(notify(chunk))
+            last_pk = chunk[-1].pk
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0008_remove_mentorassignment_code_review_pro_session_datetime_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EnrollmentProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_steps', models.PositiveIntegerField(default=0)),
+                ('completed_steps', models.PositiveIntegerField(default=0)),
+                ('done_tasks', models.JSONField(blank=True, default=dict, help_text='{step_id: evaluated task count}')),
+                ('last_completed_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('enrollment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='progress', to='courses.learnerenrollment')),
+            ],
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:36
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import Q, Sum
+
+
+def backfill_due_at(apps, schema_editor):
+    StepProgress = apps.get_model("courses", "StepProgress")
+    rows = StepProgress.objects.annotate(
+        extra=Sum("extensions__extended_by_days", filter=Q(extensions__approved_by_mentor=True), default=0)
+    )
+    batch = []
+    for sp in rows.iterator(chunk_size=2000):
+        sp.due_at = sp.initial_promise_date + timedelta(days=sp.initial_promise_days + sp.extra)
+        batch.append(sp)
+        if len(batch) >= 2000:
+            StepProgress.objects.bulk_update(batch, ["due_at"])
+            batch = []
+    if batch:
+        StepProgress.objects.bulk_update(batch, ["due_at"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0009_enrollmentprogress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stepprogress',
+            name='due_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='stepprogress',
+            index=models.Index(condition=models.Q(('task_completion_date__isnull', True)), fields=['due_at'], name='courses_stepprogress_open_due'),
+        ),
+        migrations.RunPython(backfill_due_at, migrations.RunPython.noop),
+    ]
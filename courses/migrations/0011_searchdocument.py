@@ -0,0 +1,86 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:52
+
+import re
+
+from django.db import migrations, models
+
+# Frozen copy of courses.search.normalize as of this migration
+_FOLD = str.maketrans({
+    "ي": "ی", "ى": "ی", "ئ": "ی",
+    "ك": "ک",
+    "ة": "ه", "ۀ": "ه",
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ؤ": "و",
+    "\u200c": " ",   # ZWNJ (نیم‌فاصله)
+    "\u200d": None,  # ZWJ
+    "\u0640": None,  # tatweel
+    **{d: str(i) for i, d in enumerate("۰۱۲۳۴۵۶۷۸۹")},
+    **{d: str(i) for i, d in enumerate("٠١٢٣٤٥٦٧٨٩")},
+})
+_DIACRITICS = re.compile("[\u064b-\u065f\u0670]")  # harakat, superscript alef
+
+
+def normalize(text):
+    text = _DIACRITICS.sub("", str(text or "")).translate(_FOLD).lower()
+    return " ".join(text.split())
+
+
+def create_trigram_index(apps, schema_editor):
+    # LIKE '%term%' on the normalized text is served by a trigram GIN index on PostgreSQL;
+    # other backends (tests, local sqlite) just scan the narrow table.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS courses_searchdocument_text_trgm "
+        "ON courses_searchdocument USING gin (text gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS courses_searchdocument_text_trgm")
+
+
+def backfill_documents(apps, schema_editor):
+    SearchDocument = apps.get_model("courses", "SearchDocument")
+    user_fields = ("user__first_name", "user__last_name", "user__username", "user__email", "user__phone_number")
+    sources = (
+        ("learner", apps.get_model("courses", "Learner"), user_fields),
+        ("mentor", apps.get_model("courses", "Mentor"), user_fields),
+        ("task", apps.get_model("courses", "Task"), ("title",)),
+    )
+    for kind, model, fields in sources:
+        batch = []
+        for pk, *values in model.objects.values_list("pk", *fields).iterator(chunk_size=2000):
+            batch.append(SearchDocument(kind=kind, object_id=pk, text=normalize(" ".join(v for v in values if v))))
+            if len(batch) >= 2000:
+                SearchDocument.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            SearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0010_stepprogress_due_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('learner', 'learner'), ('mentor', 'mentor'), ('task', 'task')], max_length=8)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('text', models.TextField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='uniq_search_document')],
+            },
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+        migrations.RunPython(backfill_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0011_searchdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupDirtyDay',
+            fields=[
+                ('day', models.DateField(primary_key=True, serialize=False)),
+                ('marked_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StepProgressDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('starts', models.PositiveIntegerField(default=0)),
+                ('completions', models.PositiveIntegerField(default=0)),
+                ('evaluations', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='stepprogress',
+            index=models.Index(fields=['initial_promise_date'], name='courses_sp_started_at'),
+        ),
+        migrations.AddIndex(
+            model_name='stepprogress',
+            index=models.Index(fields=['task_completion_date'], name='courses_sp_completed_at'),
+        ),
+        migrations.AddIndex(
+            model_name='taskevaluation',
+            index=models.Index(fields=['evaluated_at'], name='courses_taskeval_evaluated_at'),
+        ),
+        migrations.AddField(
+            model_name='stepprogressdaily',
+            name='educational_step',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.educationalstep'),
+        ),
+        migrations.AddField(
+            model_name='stepprogressdaily',
+            name='learning_path',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.learningpath'),
+        ),
+        migrations.AddField(
+            model_name='stepprogressdaily',
+            name='mentor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.mentor'),
+        ),
+        migrations.AddIndex(
+            model_name='stepprogressdaily',
+            index=models.Index(fields=['learning_path', 'day'], name='courses_spdaily_lp_day'),
+        ),
+        migrations.AddConstraint(
+            model_name='stepprogressdaily',
+            constraint=models.UniqueConstraint(fields=('day', 'educational_step', 'mentor'), name='uniq_step_progress_daily'),
+        ),
+    ]
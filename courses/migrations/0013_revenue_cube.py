@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0012_progress_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevenueDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('active', 'Active'), ('expired', 'Expired')], max_length=12)),
+                ('subscriptions', models.PositiveIntegerField(default=0)),
+                ('revenue', models.PositiveBigIntegerField(default=0, help_text='Sum of final_cost (Toman)')),
+                ('paid', models.PositiveBigIntegerField(default=0, help_text='Paid purchase/adjust transactions (Toman)')),
+                ('refunded', models.PositiveBigIntegerField(default=0, help_text='Refund transactions (Toman)')),
+                ('learning_path', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.learningpath')),
+                ('subscription_plan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.subscriptionplan')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'status'], name='courses_revdaily_day_status')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'subscription_plan', 'learning_path', 'status'), name='uniq_revenue_daily')],
+            },
+        ),
+    ]
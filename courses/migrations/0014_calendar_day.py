@@ -0,0 +1,61 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:58
+
+from datetime import date, timedelta
+
+import jdatetime as jd
+from django.db import migrations, models
+
+
+def calendar_rows(first_day, last_day):
+    # Frozen copy of courses.analytics.calendar_rows as of this migration
+    day = first_day
+    while day <= last_day:
+        j = jd.date.fromgregorian(date=day)
+        farvardin_1 = jd.date(j.year, 1, 1)
+        yield {
+            "date": day,
+            "jalali_year": j.year,
+            "jalali_month": j.month,
+            "jalali_day": j.day,
+            "jalali_week": (j.yday() - 1 + farvardin_1.weekday()) // 7 + 1,
+            "jalali_weekday": j.weekday(),
+            "year_start": farvardin_1.togregorian(),
+            "month_start": day - timedelta(days=j.day - 1),
+            "week_start": day - timedelta(days=j.weekday()),
+        }
+        day += timedelta(days=1)
+
+
+def fill_calendar(apps, schema_editor):
+    # 1390-01-01 .. end of 1429 (Jalali); `manage.py build_calendar` extends it
+    CalendarDay = apps.get_model("courses", "CalendarDay")
+    rows = [CalendarDay(**r) for r in calendar_rows(date(2011, 3, 21), date(2051, 3, 20))]
+    CalendarDay.objects.bulk_create(rows, batch_size=2000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0013_revenue_cube'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalendarDay',
+            fields=[
+                ('date', models.DateField(primary_key=True, serialize=False)),
+                ('jalali_year', models.PositiveSmallIntegerField()),
+                ('jalali_month', models.PositiveSmallIntegerField()),
+                ('jalali_day', models.PositiveSmallIntegerField()),
+                ('jalali_week', models.PositiveSmallIntegerField(help_text='Week of the Jalali year; week 1 holds 1 Farvardin')),
+                ('jalali_weekday', models.PositiveSmallIntegerField(help_text='0 = Saturday')),
+                ('year_start', models.DateField(help_text='Gregorian date of 1 Farvardin of this Jalali year')),
+                ('month_start', models.DateField(help_text='Gregorian date of the 1st of this Jalali month')),
+                ('week_start', models.DateField(help_text='The Saturday starting this week')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['jalali_year', 'jalali_month'], name='courses_calday_jalali_ym')],
+            },
+        ),
+        migrations.RunPython(fill_calendar, migrations.RunPython.noop),
+    ]
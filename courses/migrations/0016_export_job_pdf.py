@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 19:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0015_export_job'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='exportjob',
+            name='fmt',
+            field=models.CharField(choices=[('csv', 'CSV'), ('jsonl', 'JSONL'), ('xlsx', 'XLSX'), ('pdf', 'PDF')], default='xlsx', max_length=5),
+        ),
+    ]
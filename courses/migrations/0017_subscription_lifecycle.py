@@ -0,0 +1,90 @@
+# Generated by Django 5.2.5 on 2026-10-17 19:24
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def backfill_lifecycle(apps, schema_editor):
+    Subscription = apps.get_model("courses", "LearnerSubscribePlan")
+    Freeze = apps.get_model("courses", "LearnerSubscribePlanFreeze")
+    Subscription.objects.update(effective_end_datetime=F("end_datetime"))
+
+    freezes = {}  # subscription id -> (freeze days, end of the latest freeze)
+    for sub_id, start, days in Freeze.objects.values_list("subscribe_plan_id", "start_date", "duration"):
+        total, until = freezes.get(sub_id, (0, start))
+        freezes[sub_id] = (total + days, max(until, start + timedelta(days=days)))
+
+    now = timezone.now()
+    batch = []
+    for sub in Subscription.objects.filter(pk__in=list(freezes)).iterator(chunk_size=2000):
+        days, until = freezes[sub.pk]
+        sub.effective_end_datetime = sub.end_datetime + timedelta(days=days)
+        if sub.status == "active" and until > now:
+            sub.status, sub.frozen_until = "freeze", until
+        batch.append(sub)
+    Subscription.objects.bulk_update(batch, ["effective_end_datetime", "status", "frozen_until"], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0016_export_job_pdf'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='learnersubscribeplan',
+            name='courses_lea_status_0453c6_idx',
+        ),
+        migrations.AddField(
+            model_name='historicallearnersubscribeplan',
+            name='effective_end_datetime',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='historicallearnersubscribeplan',
+            name='frozen_until',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='learnersubscribeplan',
+            name='effective_end_datetime',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='learnersubscribeplan',
+            name='frozen_until',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='historicallearnersubscribeplan',
+            name='status',
+            field=models.CharField(choices=[('reserved', 'Reserved'), ('active', 'Active'), ('freeze', 'Frozen'), ('expired', 'Expired')], db_index=True, default='active', max_length=12),
+        ),
+        migrations.AlterField(
+            model_name='learnersubscribeplan',
+            name='status',
+            field=models.CharField(choices=[('reserved', 'Reserved'), ('active', 'Active'), ('freeze', 'Frozen'), ('expired', 'Expired')], db_index=True, default='active', max_length=12),
+        ),
+        migrations.AlterField(
+            model_name='revenuedaily',
+            name='status',
+            field=models.CharField(choices=[('reserved', 'Reserved'), ('active', 'Active'), ('freeze', 'Frozen'), ('expired', 'Expired')], max_length=12),
+        ),
+        migrations.AddIndex(
+            model_name='learnersubscribeplan',
+            index=models.Index(fields=['status', 'effective_end_datetime'], name='courses_lsp_status_eff_end'),
+        ),
+        migrations.AddIndex(
+            model_name='learnersubscribeplan',
+            index=models.Index(fields=['learner_enrollment', 'effective_end_datetime'], name='courses_lsp_enrol_eff_end'),
+        ),
+        migrations.AddIndex(
+            model_name='learnersubscribeplan',
+            index=models.Index(fields=['status', 'frozen_until'], name='courses_lsp_status_frozen'),
+        ),
+        migrations.RunPython(backfill_lifecycle, migrations.RunPython.noop),
+    ]
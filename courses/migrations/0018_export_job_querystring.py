@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-17 19:31
+
+from django.db import migrations, models
+
+
+def fail_pending_jobs(apps, schema_editor):
+    # their pickled query is dropped below; without it they would export every row
+    ExportJob = apps.get_model("courses", "ExportJob")
+    ExportJob.objects.filter(status__in=("queued", "running")).update(
+        status="failed", error="Queued before exports stored the changelist querystring; please export again.",
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0017_subscription_lifecycle'),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_pending_jobs, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='exportjob',
+            name='query',
+        ),
+        migrations.AddField(
+            model_name='exportjob',
+            name='querystring',
+            field=models.TextField(blank=True, help_text='Querystring of the filtered admin changelist.'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+from django.db import migrations
+from django.db.models import Count, F, Max
+from django.utils import timezone
+
+
+def backfill_progress(apps, schema_editor):
+    # Same computation as EnrollmentProgressManager.rebuild at the time of writing
+    LearnerEnrollment = apps.get_model("courses", "LearnerEnrollment")
+    EnrollmentProgress = apps.get_model("courses", "EnrollmentProgress")
+    EducationalStep = apps.get_model("courses", "EducationalStep")
+    StepProgress = apps.get_model("courses", "StepProgress")
+    Task = apps.get_model("courses", "Task")
+
+    total_by_path = dict(
+        EducationalStep.objects.values("learning_path_id").annotate(c=Count("id"))
+        .values_list("learning_path_id", "c")
+    )
+    steps_by_enrollment = {
+        r["mentor_assignment__enrollment_id"]: r
+        for r in StepProgress.objects.filter(task_completion_date__isnull=False)
+        .values("mentor_assignment__enrollment_id")
+        .annotate(c=Count("educational_step", distinct=True), last=Max("task_completion_date"))
+    }
+    done_by_enrollment = {}
+    for r in (
+        Task.objects.filter(
+            submissions__evaluations__mentor__assignments__enrollment_id=F(
+                "submissions__step_progress__mentor_assignment__enrollment_id"
+            ),
+            submissions__evaluations__evaluated_at__isnull=False,
+        )
+        .values("submissions__step_progress__mentor_assignment__enrollment_id", "step_id")
+        .annotate(c=Count("id", distinct=True))
+    ):
+        enrollment_id = r["submissions__step_progress__mentor_assignment__enrollment_id"]
+        done_by_enrollment.setdefault(enrollment_id, {})[str(r["step_id"])] = r["c"]
+
+    now = timezone.now()
+    rows = []
+    missing = LearnerEnrollment.objects.filter(progress__isnull=True).values("id", "learning_path_id")
+    for e in missing.iterator(chunk_size=2000):
+        steps = steps_by_enrollment.get(e["id"], {})
+        rows.append(EnrollmentProgress(
+            enrollment_id=e["id"],
+            total_steps=total_by_path.get(e["learning_path_id"], 0),
+            completed_steps=steps.get("c", 0),
+            last_completed_at=steps.get("last"),
+            done_tasks=done_by_enrollment.get(e["id"], {}),
+            updated_at=now,
+        ))
+    EnrollmentProgress.objects.bulk_create(rows, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0018_export_job_querystring'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_progress, migrations.RunPython.noop),
+    ]
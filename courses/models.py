@@ -9,25 +9,30 @@
 # ➐  Progress & task workflow             │
 # ➑  Subscription plans                   │
 # ➒  Mentor‑group sessions  ← new block   │  **added to match ERD**
+# ➓  Search, analytics & exports          │  logic in search/analytics/exports.py
 
 import jdatetime as jd
+import math
 from decimal import Decimal
 
 from django.core.validators import (
     RegexValidator, MinValueValidator, MaxValueValidator
 )
 from django.db import models, transaction
-from django.db.models import Q, CheckConstraint, Count
+from django.db.models import F, Q, CheckConstraint, Count, Sum, Max, Exists, OuterRef, Case, When, Value, ExpressionWrapper
 from django.utils import timezone
 from django.conf import settings
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
 from simple_history.models import HistoricalRecords
+from simple_history.utils import bulk_create_with_history
 
 from core.utility import phone_re
-from core.notify import send_subscription_expired_sms
+from core import http_cache
+from core.view_cache import object_key
+from core.notify import enqueue_subscription_expired
 from pages.templatetags.custom_translation_tags import translate_number
 from pages.templatetags.persian_calendar_convertor import convert_to_persian_calendar, format_persian_datetime
 from django.utils.functional import cached_property
@@ -182,29 +187,49 @@ class LearningPath(models.Model):
     
 
 class EducationalStepQuerySet(models.QuerySet):
-    def with_progress(self, enrollment):
-        """Attach progress info for a specific learner enrollment."""
+    def with_progress(self, enrollment, progress=None):
+        """
+        Attach progress info for a specific learner enrollment.
+        Done-task counts come from the stored EnrollmentProgress row, so no submission joins are needed.
+        """
+        progress = progress or EnrollmentProgress.objects.for_enrollment(enrollment)
+        done_cases = [
+            When(pk=int(step_id), then=Value(n))
+            for step_id, n in (progress.done_tasks or {}).items()
+        ]
         return self.filter(learning_path=enrollment.learning_path).annotate(
-            total_tasks=Count("tasks", distinct=True),
-            done_tasks=Count(
-                "tasks__submissions",
-                filter=Q(
-                    tasks__submissions__step_progress__mentor_assignment__enrollment=enrollment,
-                    tasks__submissions__evaluations__mentor__assignments__enrollment=enrollment,
-                    tasks__submissions__evaluations__evaluated_at__isnull=False,
-                ),
-                distinct=True,
-            ),
-            completed=Count(
-                "step_progresses",
-                filter=Q(
-                    step_progresses__mentor_assignment__enrollment=enrollment,
-                    step_progresses__task_completion_date__isnull=False,
-                ),
-                distinct=True,
+            total_tasks=Count("tasks"),
+            done_tasks=Case(*done_cases, default=Value(0), output_field=models.IntegerField()),
+            completed=Exists(
+                StepProgress.objects.completed().filter(
+                    educational_step=OuterRef("pk"),
+                    mentor_assignment__enrollment=enrollment,
+                )
             ),
         )
 
+    def with_unlock_state(self, enrollment):
+        """
+        Annotate ``unlocked``: optional steps are always open, mandatory ones only
+        once every earlier mandatory step of the path is completed by ``enrollment``.
+        Same rule as ``EducationalStep.can_start`` but evaluated in the same query.
+        """
+        completed = StepProgress.objects.completed().filter(
+            educational_step=OuterRef("pk"),
+            mentor_assignment__enrollment=enrollment,
+        )
+        blocking = EducationalStep.objects.filter(
+            learning_path=OuterRef("learning_path"),
+            sequence_no__lt=OuterRef("sequence_no"),
+            is_mandatory=True,
+        ).exclude(Exists(completed))
+        return self.annotate(
+            unlocked=ExpressionWrapper(
+                Q(is_mandatory=False) | ~Exists(blocking),
+                output_field=models.BooleanField(),
+            )
+        )
+
     def ordered(self):
         return self.order_by("sequence_no")
 
@@ -239,8 +264,10 @@ class EducationalStep(models.Model):
             sequence_no__lt=self.sequence_no,
             is_mandatory=True,
         ).exclude(
-            step_progresses__mentor_assignment__enrollment=enrollment,
-            step_progresses__task_completion_date__isnull=False,
+            Exists(StepProgress.objects.completed().filter(
+                educational_step=OuterRef("pk"),
+                mentor_assignment__enrollment=enrollment,
+            ))
         ).exists()
 
 
@@ -279,16 +306,7 @@ class LearnerEnrollment(models.Model):
     
     def get_progress_percent(self) -> float:
         """Return the completion percentage of this enrollment."""
-        total_steps = self.learning_path.steps.count()
-        if not total_steps:
-            return 0.0
-
-        completed_steps = StepProgress.objects.filter(
-            mentor_assignment__enrollment=self,
-            task_completion_date__isnull=False
-        ).count()
-
-        return round((completed_steps / total_steps) * 100)
+        return EnrollmentProgress.objects.for_enrollment(self).percent
 
 
 class MentorAssignment(models.Model):
@@ -332,6 +350,23 @@ class SessionType(models.Model):
 # ────────────────────────────────────────────────────────────────
 # ➐  PROGRESS & TASKS
 # ────────────────────────────────────────────────────────────────
+class StepProgressQuerySet(models.QuerySet):
+    def completed(self):
+        return self.filter(task_completion_date__isnull=False)
+
+    def open(self):
+        return self.filter(task_completion_date__isnull=True)
+
+    def upcoming(self, now=None, limit=None):
+        """Open step progresses whose deadline is still ahead, nearest first."""
+        now = now or timezone.now()
+        qs = self.open().filter(due_at__gt=now).order_by("due_at")
+        return qs[:limit] if limit else qs
+
+    def due_between(self, start, end):
+        return self.open().filter(due_at__gt=start, due_at__lte=end)
+
+
 class StepProgress(models.Model):
     mentor_assignment = models.ForeignKey(MentorAssignment, on_delete=models.CASCADE, related_name="step_progresses")
     educational_step = models.ForeignKey(EducationalStep, on_delete=models.CASCADE, related_name="step_progresses")
@@ -340,14 +375,67 @@ class StepProgress(models.Model):
     initial_promise_days = models.PositiveSmallIntegerField(default=1)
     repromise_count = models.PositiveSmallIntegerField(default=0)
     task_completion_date = models.DateTimeField(blank=True, null=True)
+    # initial_promise_date + initial_promise_days + approved extensions; kept by save() and
+    # the StepExtension receiver in courses.signals
+    due_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = StepProgressQuerySet.as_manager()
 
     class Meta:
         unique_together = ("mentor_assignment", "educational_step")
         ordering = ("initial_promise_date",)
+        indexes = [
+            models.Index(
+                fields=("due_at",),
+                condition=Q(task_completion_date__isnull=True),
+                name="courses_stepprogress_open_due",
+            ),
+            # day-range scans of the analytics rollup job
+            models.Index(fields=("initial_promise_date",), name="courses_sp_started_at"),
+            models.Index(fields=("task_completion_date",), name="courses_sp_completed_at"),
+        ]
 
     def __str__(self):
         return f"{self.mentor_assignment} | {self.educational_step}"
 
+    def compute_due_at(self, extra_days=None):
+        if not self.initial_promise_date:
+            return None
+        if extra_days is None:
+            extra_days = self.extensions.filter(approved_by_mentor=True).aggregate(
+                s=Sum("extended_by_days")
+            )["s"] or 0
+        return self.initial_promise_date + timezone.timedelta(days=(self.initial_promise_days or 0) + extra_days)
+
+    def refresh_due_at(self, extra_days=None):
+        due_at = self.compute_due_at(extra_days)
+        if due_at != self.due_at:
+            self.due_at = due_at
+            StepProgress.objects.filter(pk=self.pk).update(due_at=due_at)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._due_at_inputs = instance._due_inputs()
+        return instance
+
+    def _due_inputs(self):
+        # __dict__ so deferred fields are not loaded just to compare them
+        fields = ("initial_promise_date", "initial_promise_days", "educational_step_id")
+        return tuple(self.__dict__.get(f) for f in fields)
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        # initial_promise_date is only set by auto_now_add inside super().save()
+        super().save(*args, **kwargs)
+        inputs = self._due_inputs()
+        if adding:
+            # a brand-new row cannot have extensions yet
+            self.refresh_due_at(extra_days=0)
+        elif inputs != getattr(self, "_due_at_inputs", None):
+            self.refresh_due_at()
+        self._due_at_inputs = inputs
+
 
 class StepProgressSession(models.Model):
     step_progress = models.ForeignKey(StepProgress, on_delete=models.CASCADE, related_name="step_progress_sessions")
@@ -372,6 +460,21 @@ class StepExtension(models.Model):
         return f"{self.extended_by_days} days for {self.step_progress}"
 
 
+class TaskQuerySet(models.QuerySet):
+    def evaluated_for(self, enrollment_ids):
+        """
+        Tasks having a submission within the given enrollments that was evaluated
+        by a mentor assigned to that same enrollment.
+        """
+        return self.filter(
+            submissions__step_progress__mentor_assignment__enrollment_id__in=enrollment_ids,
+            submissions__evaluations__mentor__assignments__enrollment_id=F(
+                "submissions__step_progress__mentor_assignment__enrollment_id"
+            ),
+            submissions__evaluations__evaluated_at__isnull=False,
+        )
+
+
 class Task(models.Model):
     step = models.ForeignKey(EducationalStep, on_delete=models.CASCADE, related_name="tasks")
     title = models.CharField(max_length=120)
@@ -379,6 +482,8 @@ class Task(models.Model):
     order_in_step = models.PositiveSmallIntegerField()
     is_required = models.BooleanField(default=True)
 
+    objects = TaskQuerySet.as_manager()
+
     class Meta:
         unique_together = ("step", "order_in_step")
         ordering = ("step", "order_in_step")
@@ -443,6 +548,7 @@ class TaskEvaluation(models.Model):
     class Meta:
         unique_together = ("submission", "mentor")
         ordering = ("-evaluated_at",)
+        indexes = [models.Index(fields=("evaluated_at",), name="courses_taskeval_evaluated_at")]
         constraints = [
             models.CheckConstraint(
                 check=models.Q(score__gte=1,
@@ -487,6 +593,152 @@ class SocialPost(models.Model):
         return f"{self.learner} posted on {self.platform} at {self.posted_at}"
 
 
+class EnrollmentProgressManager(models.Manager):
+    def for_enrollment(self, enrollment) -> "EnrollmentProgress":
+        """
+        Return the stored progress row. Rows are created with the enrollment
+        (courses.signals) and backfilled by migration 0019; an enrollment that
+        bypassed both gets an unsaved row computed on the fly, since reads never write.
+        """
+        try:
+            return enrollment.progress
+        except EnrollmentProgress.DoesNotExist:
+            return self._build_rows([{"id": enrollment.pk, "learning_path_id": enrollment.learning_path_id}])[0]
+
+    def rebuild(self, enrollments, batch_size=500) -> int:
+        """
+        Recompute progress rows for the given enrollments from the raw tables.
+        Uses three grouped queries per batch and an upsert, whatever the batch size.
+        """
+        total = 0
+        batch = []
+        for e in enrollments.values("id", "learning_path_id").iterator(chunk_size=batch_size):
+            batch.append(e)
+            if len(batch) >= batch_size:
+                total += self._rebuild_batch(batch)
+                batch = []
+        if batch:
+            total += self._rebuild_batch(batch)
+        return total
+
+    def _rebuild_batch(self, batch) -> int:
+        rows = self._build_rows(batch)
+        self.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["enrollment"],
+            update_fields=["total_steps", "completed_steps", "last_completed_at", "done_tasks", "updated_at"],
+        )
+        http_cache.bump(*(object_key(LearnerEnrollment, e["id"]) for e in batch))
+        return len(rows)
+
+    def _build_rows(self, batch) -> list["EnrollmentProgress"]:
+        """Unsaved progress rows for ``[{"id", "learning_path_id"}, ...]``."""
+        ids = [e["id"] for e in batch]
+        path_ids = {e["learning_path_id"] for e in batch}
+
+        total_by_path = dict(
+            EducationalStep.objects.filter(learning_path_id__in=path_ids)
+            .values("learning_path_id").annotate(c=Count("id"))
+            .values_list("learning_path_id", "c")
+        )
+        steps_by_enrollment = {
+            r["mentor_assignment__enrollment_id"]: r
+            for r in StepProgress.objects.completed()
+            .filter(mentor_assignment__enrollment_id__in=ids)
+            .values("mentor_assignment__enrollment_id")
+            .annotate(c=Count("educational_step", distinct=True), last=Max("task_completion_date"))
+        }
+        done_by_enrollment = {}
+        for r in (
+            Task.objects.evaluated_for(enrollment_ids=ids)
+            .values("submissions__step_progress__mentor_assignment__enrollment_id", "step_id")
+            .annotate(c=Count("id", distinct=True))
+        ):
+            enrollment_id = r["submissions__step_progress__mentor_assignment__enrollment_id"]
+            done_by_enrollment.setdefault(enrollment_id, {})[str(r["step_id"])] = r["c"]
+
+        rows = []
+        for e in batch:
+            steps = steps_by_enrollment.get(e["id"], {})
+            rows.append(EnrollmentProgress(
+                enrollment_id=e["id"],
+                total_steps=total_by_path.get(e["learning_path_id"], 0),
+                completed_steps=steps.get("c", 0),
+                last_completed_at=steps.get("last"),
+                done_tasks=done_by_enrollment.get(e["id"], {}),
+                updated_at=timezone.now(),
+            ))
+        return rows
+
+    # --- incremental updates (called from courses.signals) -------------------
+    def refresh_steps(self, enrollment_id) -> None:
+        """Recount completed steps of one enrollment. No-op if it has no row yet."""
+        agg = (
+            StepProgress.objects.completed()
+            .filter(mentor_assignment__enrollment_id=enrollment_id)
+            .aggregate(c=Count("educational_step", distinct=True), last=Max("task_completion_date"))
+        )
+        self.filter(enrollment_id=enrollment_id).update(
+            completed_steps=agg["c"] or 0,
+            last_completed_at=agg["last"],
+            updated_at=timezone.now(),
+        )
+        http_cache.bump(object_key(LearnerEnrollment, enrollment_id))
+
+    def refresh_step_tasks(self, enrollment_id, step_id) -> None:
+        """Recount evaluated tasks of one step for one enrollment."""
+        with transaction.atomic():
+            row = self.select_for_update().filter(enrollment_id=enrollment_id).first()
+            if row is None:
+                return
+            done = (
+                Task.objects.evaluated_for(enrollment_ids=[enrollment_id])
+                .filter(step_id=step_id)
+                .distinct()
+                .count()
+            )
+            done_tasks = dict(row.done_tasks or {})
+            if done:
+                done_tasks[str(step_id)] = done
+            else:
+                done_tasks.pop(str(step_id), None)
+            self.filter(pk=row.pk).update(done_tasks=done_tasks, updated_at=timezone.now())
+        http_cache.bump(object_key(LearnerEnrollment, enrollment_id))
+
+    def refresh_total_steps(self, learning_path_id) -> None:
+        """A step was added to / removed from a path: update every enrollment on it."""
+        total = EducationalStep.objects.filter(learning_path_id=learning_path_id).count()
+        self.filter(enrollment__learning_path_id=learning_path_id).update(total_steps=total)
+
+
+class EnrollmentProgress(models.Model):
+    """
+    Denormalized progress of one enrollment, kept in sync by courses.signals.
+    Dashboards read this single row instead of aggregating StepProgress/TaskSubmission/TaskEvaluation.
+    """
+    enrollment = models.OneToOneField(LearnerEnrollment, on_delete=models.CASCADE, related_name="progress")
+    total_steps = models.PositiveIntegerField(default=0)
+    completed_steps = models.PositiveIntegerField(default=0)
+    done_tasks = models.JSONField(default=dict, blank=True, help_text="{step_id: evaluated task count}")
+    last_completed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = EnrollmentProgressManager()
+
+    def __str__(self):
+        return f"{self.enrollment_id}: {self.completed_steps}/{self.total_steps}"
+
+    @property
+    def percent(self) -> int:
+        if not self.total_steps:
+            return 0
+        return round((self.completed_steps / self.total_steps) * 100)
+
+    def done_for(self, step_id) -> int:
+        return int((self.done_tasks or {}).get(str(step_id), 0))
+
+
 # ────────────────────────────────────────────────────────────────
 # ➑  SUBSCRIPTION PLANS
 # ────────────────────────────────────────────────────────────────
@@ -560,37 +812,175 @@ class LearnerSubscribePlanQuerySet(models.QuerySet):
         qs = self.filter(learner_enrollment=enrollment)
         if exclude_pk:
             qs = qs.exclude(pk=exclude_pk)
-        return qs.filter(start_datetime__lt=end, end_datetime__gt=start)
+        return qs.filter(start_datetime__lt=end, effective_end_datetime__gt=start)
 
-    def due_to_expire(self, at=None):
+    def current(self, at=None):
+        """Running subscriptions (active or frozen) at ``at``."""
         at = at or timezone.now()
-        return self.filter(status="active", end_datetime__lte=at)
+        return self.filter(
+            status__in=(self.model.STATUS_ACTIVE, self.model.STATUS_FROZEN), effective_end_datetime__gt=at,
+        )
 
-    def expire_and_notify(self, at=None):
+    def ending_between(self, start, end):
+        return self.filter(
+            status=self.model.STATUS_ACTIVE, effective_end_datetime__gt=start, effective_end_datetime__lte=end,
+        )
+
+    def due_to_start(self, at=None):
+        at = at or timezone.now()
+        return self.filter(status=self.model.STATUS_RESERVED, start_datetime__lte=at)
+
+    def due_to_unfreeze(self, at=None):
+        at = at or timezone.now()
+        return self.filter(status=self.model.STATUS_FROZEN, frozen_until__lte=at)
+
+    def due_to_expire(self, at=None):
         at = at or timezone.now()
-        rows = list(self.due_to_expire(at).select_related(
+        return self.filter(
+            status__in=(self.model.STATUS_ACTIVE, self.model.STATUS_FROZEN), effective_end_datetime__lte=at,
+        )
+
+    def _bulk_set(self, ids, at, reason, **changes):
+        """
+        One UPDATE of ``ids`` plus its history rows. A bulk UPDATE fires no
+        signals, so the revenue cube days (status is a dimension) are marked dirty
+        and the cache stamps bumped here. Returns the updated rows with learner and plan loaded.
+        """
+        from .analytics import mark_dirty
+
+        self.model.objects.filter(pk__in=ids).update(**changes)
+        rows = list(self.model.objects.filter(pk__in=ids).select_related(
             "learner_enrollment__learner__user", "subscription_plan"
         ))
-        if not rows: return 0
-        for s in rows:
-            s.status = "expired"
-            s.expired_at = s.end_datetime
-        type(self).bulk_update(rows, ["status", "expired_at"])
-        for s in rows:
-            try:
-                send_subscription_expired_sms(s)
-            except Exception:
-                pass
-        return len(rows)
+        self.model.history.bulk_history_create(rows, update=True, default_change_reason=reason, default_date=at)
+        mark_dirty(*(s.start_datetime for s in rows))
+        http_cache.bump(self.model)
+        return rows
+
+    def start_and_unfreeze(self, at=None, dry_run=False):
+        """
+        The clock-driven transitions other than expiry: reserved → active once
+        started, frozen → active once the freeze has run out. One UPDATE each;
+        returns ``(started, unfrozen)``. ``dry_run`` only counts.
+        """
+        at = at or timezone.now()
+        counts = []
+        for due, reason, changes in (
+            (self.due_to_start(at), "Started", {"status": self.model.STATUS_ACTIVE}),
+            (self.due_to_unfreeze(at), "Unfrozen", {"status": self.model.STATUS_ACTIVE, "frozen_until": None}),
+        ):
+            with transaction.atomic():
+                ids = list(
+                    (due if dry_run else due.select_for_update(skip_locked=True)).values_list("pk", flat=True)
+                )
+                if ids and not dry_run:
+                    self._bulk_set(ids, at, reason, **changes)
+            counts.append(len(ids))
+        return tuple(counts)
+
+    def expire_chunks(self, at=None, chunk_size=1000, dry_run=False):
+        """
+        Expire overdue subscriptions without loading them all: walk the due rows
+        in primary-key order, ``chunk_size`` at a time, and per chunk (one
+        transaction) flip status/expired_at with one UPDATE, write the history
+        rows in one INSERT and queue the chunk's notifications. Delivery happens
+        in ``manage.py process_outbox``.
+
+        Yields ``(expired, queued_messages)`` per chunk; ``dry_run`` only counts.
+        Rows locked by a concurrent run are skipped and left for the next one.
+        """
+        at = at or timezone.now()
+        due = self.due_to_expire(at).order_by("pk")
+        last = 0
+        while True:
+            with transaction.atomic():
+                ids = list(
+                    (due if dry_run else due.select_for_update(skip_locked=True))
+                    .filter(pk__gt=last).values_list("pk", flat=True)[:chunk_size]
+                )
+                queued = 0
+                if ids and not dry_run:
+                    rows = self._bulk_set(
+                        ids, at, "Expired",
+                        status=self.model.STATUS_EXPIRED, frozen_until=None,
+                        expired_at=F("effective_end_datetime"),
+                    )
+                    queued = enqueue_subscription_expired(rows)
+            if not ids:
+                return
+            last = ids[-1]
+            yield len(ids), queued
+
+    def expire_and_notify(self, at=None, chunk_size=1000):
+        """Expire overdue subscriptions (see ``expire_chunks``). Returns how many."""
+        return sum(n for n, _ in self.expire_chunks(at, chunk_size))
+
+    def bulk_purchase(self, subscriptions, batch_size=1000, user=None):
+        """
+        Create new subscriptions with what ``save()`` and the post_save receivers
+        do per row, set-based: derived fields in one pass, then one bulk insert
+        each for the subscriptions, their purchase transactions, the history of
+        both and the notifications.
+
+        Returns the new notifications; the caller pushes them (``push_internal``)
+        once, after its transaction commits.
+        """
+        from .analytics import mark_dirty
+        from notifications.models import Notification
+        from .signals import purchased_notification
+
+        subscriptions = list(subscriptions)
+        if not subscriptions:
+            return []
+        users = dict(LearnerEnrollment.objects.filter(
+            pk__in={s.learner_enrollment_id for s in subscriptions}
+        ).values_list("pk", "learner__user_id"))
+        missing = {s.learner_enrollment_id for s in subscriptions} - users.keys()
+        if missing:
+            raise ValueError(f"Unknown learner enrollment(s): {', '.join(map(str, sorted(missing)))}")
+        plans = SubscriptionPlan.objects.in_bulk({s.subscription_plan_id for s in subscriptions})
+
+        now = timezone.now()
+        for s in subscriptions:
+            s.subscription_plan = plans[s.subscription_plan_id]
+            s._derive(now, freeze_days=0)
+
+        with transaction.atomic():
+            subscriptions = bulk_create_with_history(
+                subscriptions, self.model, batch_size=batch_size, default_user=user,
+            )
+            bulk_create_with_history(
+                [_purchase_transaction(s) for s in subscriptions], SubscriptionTransaction,
+                batch_size=batch_size, default_user=user,
+            )
+            notifications = Notification.objects.create_batch(
+                [purchased_notification(users[s.learner_enrollment_id], s) for s in subscriptions],
+                batch_size=batch_size,
+            )
+            # bulk inserts fire no signals
+            mark_dirty(*(s.start_datetime for s in subscriptions))
+            http_cache.bump(self.model, SubscriptionTransaction)
+        return notifications
 
 
 class LearnerSubscribePlan(models.Model):
+    STATUS_RESERVED = "reserved"
     STATUS_ACTIVE = "active"
+    STATUS_FROZEN = "freeze"  # same value as SubscribePlanStatus.FROZEN
     STATUS_EXPIRED = "expired"
     STATUS_CHOICES = (
+        (STATUS_RESERVED, "Reserved"),
         (STATUS_ACTIVE, "Active"),
+        (STATUS_FROZEN, "Frozen"),
         (STATUS_EXPIRED, "Expired"),
     )
+    # reserved → active ⇄ frozen → expired
+    TRANSITIONS = {
+        STATUS_RESERVED: {STATUS_ACTIVE},
+        STATUS_ACTIVE: {STATUS_FROZEN, STATUS_EXPIRED},
+        STATUS_FROZEN: {STATUS_ACTIVE, STATUS_EXPIRED},
+        STATUS_EXPIRED: set(),
+    }
 
     learner_enrollment = models.ForeignKey(
         LearnerEnrollment, on_delete=models.CASCADE, related_name="subscriptions"
@@ -604,6 +994,11 @@ class LearnerSubscribePlan(models.Model):
     final_cost = models.PositiveIntegerField(default=0, help_text="Toman")
     status = models.CharField(max_length=12, choices=STATUS_CHOICES, default=STATUS_ACTIVE, db_index=True)
     expired_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    # end_datetime + freeze days; kept by save() and LearnerSubscribePlanFreeze signals
+    effective_end_datetime = models.DateTimeField(null=True, blank=True, editable=False)
+    frozen_until = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = LearnerSubscribePlanQuerySet.as_manager()
 
     # Auditing
     history = HistoricalRecords(inherit=True)
@@ -611,7 +1006,11 @@ class LearnerSubscribePlan(models.Model):
     class Meta:
         ordering = ("-start_datetime", "-id")
         indexes = [
-            models.Index(fields=("status", "end_datetime")),
+            # expiry / reminder scans
+            models.Index(fields=("status", "effective_end_datetime"), name="courses_lsp_status_eff_end"),
+            # current plan of an enrollment
+            models.Index(fields=("learner_enrollment", "effective_end_datetime"), name="courses_lsp_enrol_eff_end"),
+            models.Index(fields=("status", "frozen_until"), name="courses_lsp_status_frozen"),
             models.Index(fields=("start_datetime",)),
         ]
 
@@ -636,21 +1035,93 @@ class LearnerSubscribePlan(models.Model):
             from django.core.exceptions import ValidationError
             raise ValidationError({"end_datetime": "End must be after start."})
 
-    def save(self, *args, **kwargs):
+    def compute_effective_end(self, freeze_days=None):
+        if freeze_days is None:
+            freeze_days = (self.freezes.aggregate(s=Sum("duration"))["s"] or 0) if self.pk else 0
+        return self.end_datetime + timezone.timedelta(days=freeze_days)
+
+    def _derive(self, now=None, freeze_days=None):
         # derive end + final_cost
         self.end_datetime = self._calc_end()
         self.final_cost = self._calc_final_cost()
+        self.effective_end_datetime = self.compute_effective_end(freeze_days)
+
+        # the clock-driven transitions
+        now = now or timezone.now()
+        if self.status == self.STATUS_ACTIVE and self._state.adding and self.start_datetime > now:
+            self.status = self.STATUS_RESERVED
+        elif self.status == self.STATUS_RESERVED and self.start_datetime <= now:
+            self.status = self.STATUS_ACTIVE
+        if self.status == self.STATUS_FROZEN and (not self.frozen_until or now >= self.frozen_until):
+            self.status, self.frozen_until = self.STATUS_ACTIVE, None
 
         # auto-expire if past end
-        now = timezone.now()
-        if self.end_datetime and now >= self.end_datetime:
-            self.status = self.STATUS_EXPIRED
+        if self.status != self.STATUS_EXPIRED and now >= self.effective_end_datetime:
+            self.status, self.frozen_until = self.STATUS_EXPIRED, None
             if not self.expired_at:
                 # use the logical end as the expired_at moment
-                self.expired_at = self.end_datetime
+                self.expired_at = self.effective_end_datetime
 
+    def save(self, *args, **kwargs):
+        self._derive()
         super().save(*args, **kwargs)
 
+    # --- Lifecycle --------------------------------------------------------------
+    def can_transition(self, status) -> bool:
+        return status in self.TRANSITIONS[self.status]
+
+    def transition(self, status, at=None):
+        """Move to ``status`` along ``TRANSITIONS`` and save. Freezing goes through ``freeze()``."""
+        from django.core.exceptions import ValidationError
+
+        labels = dict(self.STATUS_CHOICES)
+        if status == self.STATUS_FROZEN or not self.can_transition(status):
+            raise ValidationError({"status": f"Cannot go from {labels[self.status]} to {labels[status]}."})
+        if status == self.STATUS_ACTIVE and self.status == self.STATUS_FROZEN:
+            return self.unfreeze(at)
+        self.status = status
+        if status == self.STATUS_EXPIRED:
+            self.frozen_until = None
+            self.expired_at = at or timezone.now()
+        self.save()
+
+    def freeze(self, days):
+        """Freeze an active subscription for ``days``; its effective end moves by as much."""
+        from django.core.exceptions import ValidationError
+
+        if not self.can_transition(self.STATUS_FROZEN):
+            raise ValidationError({"status": f"Cannot freeze a {self.get_status_display().lower()} subscription."})
+        # the freeze signal updates this row
+        freeze = LearnerSubscribePlanFreeze.objects.create(subscribe_plan=self, duration=days)
+        self.refresh_from_db()
+        return freeze
+
+    def unfreeze(self, at=None):
+        """End the running freeze early; only the days already used keep extending the end."""
+        at = at or timezone.now()
+        freeze = self.freezes.order_by("-start_date").first()
+        if freeze:
+            used = max(math.ceil((at - freeze.start_date) / timezone.timedelta(days=1)), 0)
+            LearnerSubscribePlanFreeze.objects.filter(pk=freeze.pk).update(duration=min(used, freeze.duration))
+        self.frozen_until = None
+        self.save()
+
+    def refresh_freezes(self, now=None):
+        """Re-derive the frozen state and effective end from the freeze rows."""
+        now = now or timezone.now()
+        until = max(
+            (start + timezone.timedelta(days=days) for start, days in self.freezes.values_list("start_date", "duration")),
+            default=None,
+        )
+        if self.status in (self.STATUS_ACTIVE, self.STATUS_FROZEN) and until and until > now:
+            self.status, self.frozen_until = self.STATUS_FROZEN, until
+        elif self.status == self.STATUS_FROZEN:
+            self.frozen_until = None
+        self.save()
+
+    def days_remaining(self, now=None) -> int:
+        return max((self.effective_end_datetime - (now or timezone.now())).days, 0)
+
     # --- Admin helpers (Shamsi) ----------------------------------------------
     @property
     def start_shamsi(self) -> str:
@@ -668,8 +1139,12 @@ class LearnerSubscribePlan(models.Model):
 def create_purchase_transaction(sender, instance: LearnerSubscribePlan, created, **kwargs):
     if not created:
         return
-    SubscriptionTransaction.objects.create(
-        learner_enrollment=instance.learner_enrollment,
+    _purchase_transaction(instance).save()
+
+
+def _purchase_transaction(instance: LearnerSubscribePlan) -> SubscriptionTransaction:
+    return SubscriptionTransaction(
+        learner_enrollment_id=instance.learner_enrollment_id,
         subscription=instance,
         subscription_plan=instance.subscription_plan,
         kind=TransactionKind.PURCHASE,
@@ -696,6 +1171,16 @@ class LearnerSubscribePlanFreeze(models.Model):
         return f"Freeze {self.duration} d from {self.start_date}"
 
 
+@receiver(post_save, sender=LearnerSubscribePlanFreeze)
+@receiver(post_delete, sender=LearnerSubscribePlanFreeze)
+def refresh_subscription_freezes(sender, instance: LearnerSubscribePlanFreeze, origin=None, **kwargs):
+    if isinstance(origin, LearnerSubscribePlan):
+        return  # cascading from the subscription's own delete
+    subscription = LearnerSubscribePlan.objects.filter(pk=instance.subscribe_plan_id).first()
+    if subscription:
+        subscription.refresh_freezes()
+
+
 # ────────────────────────────────────────────────────────────────
 # ➒  MENTOR‑GROUP SESSIONS  ← **NEW (missing in old file)**
 # ────────────────────────────────────────────────────────────────
@@ -745,6 +1230,26 @@ class MentorGroupSessionOccurrence(models.Model):
     def __str__(self):
         return f"{self.mentor_group_session} @ {self.occurence_datetime:%Y-%m-%d %H:%M}"
 
+class MentorGroupSessionParticipantQuerySet(models.QuerySet):
+    def record_attendance(self, occurrence, assignments, present_ids):
+        """
+        Create one participant row per assignment with a single INSERT.
+        bulk_create skips post_save, so callers notify absentees with
+        `courses.signals.notify_learners_absent` on the returned rows.
+        """
+        rows = [
+            self.model(
+                mentor_group_session_occurence=occurrence,
+                mentor_assignment=assignment,
+                learner_was_present=assignment.pk in present_ids,
+            )
+            for assignment in assignments
+        ]
+        self.bulk_create(rows)
+        http_cache.bump(self.model)
+        return rows
+
+
 class MentorGroupSessionParticipant(models.Model):
     "مشارکت فراگیران در جلسه گروهی"
     
@@ -752,8 +1257,158 @@ class MentorGroupSessionParticipant(models.Model):
     mentor_assignment = models.ForeignKey(MentorAssignment,on_delete=models.CASCADE, related_name="participants")
     learner_was_present = models.BooleanField(default=True, help_text="off -> absent, on -> present.")
 
+    objects = MentorGroupSessionParticipantQuerySet.as_manager()
+
     class Meta:
         unique_together = ("mentor_group_session_occurence", "mentor_assignment")
 
     def __str__(self):
         return f"{self.mentor_assignment} in {self.mentor_group_session_occurence}"
+
+
+# ────────────────────────────────────────────────────────────────
+# ➓  SEARCH, ANALYTICS & EXPORTS  (logic in search.py / analytics.py / exports.py)
+# ────────────────────────────────────────────────────────────────
+class SearchDocument(models.Model):
+    """Normalized searchable text of one learner, mentor or task; see courses.search."""
+    KIND_CHOICES = [(kind, kind) for kind in ("learner", "mentor", "task")]
+
+    kind = models.CharField(max_length=8, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    text = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "object_id"], name="uniq_search_document"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}#{self.object_id}"
+
+
+class StepProgressDaily(models.Model):
+    """Progress activity of one local day per step and mentor; see courses.analytics."""
+    day = models.DateField()
+    learning_path = models.ForeignKey(LearningPath, on_delete=models.CASCADE, related_name="+")
+    educational_step = models.ForeignKey(EducationalStep, on_delete=models.CASCADE, related_name="+")
+    mentor = models.ForeignKey(Mentor, on_delete=models.CASCADE, related_name="+")
+    starts = models.PositiveIntegerField(default=0)
+    completions = models.PositiveIntegerField(default=0)
+    evaluations = models.PositiveIntegerField(default=0)
+    score_sum = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "educational_step", "mentor"], name="uniq_step_progress_daily"),
+        ]
+        indexes = [
+            models.Index(fields=["learning_path", "day"], name="courses_spdaily_lp_day"),
+        ]
+
+    def __str__(self):
+        return f"{self.day} step={self.educational_step_id} mentor={self.mentor_id}"
+
+
+class RollupDirtyDay(models.Model):
+    """Local days whose rollups or revenue cube are stale; drained by ``rollup_progress_analytics``."""
+    day = models.DateField(primary_key=True)
+    marked_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return str(self.day)
+
+
+class RevenueDaily(models.Model):
+    """Subscriptions and their money per local start day, plan, path and status; see courses.analytics."""
+    day = models.DateField()
+    subscription_plan = models.ForeignKey(SubscriptionPlan, on_delete=models.CASCADE, related_name="+")
+    learning_path = models.ForeignKey(LearningPath, on_delete=models.CASCADE, related_name="+")
+    status = models.CharField(max_length=12, choices=LearnerSubscribePlan.STATUS_CHOICES)
+    subscriptions = models.PositiveIntegerField(default=0)
+    revenue = models.PositiveBigIntegerField(default=0, help_text="Sum of final_cost (Toman)")
+    paid = models.PositiveBigIntegerField(default=0, help_text="Paid purchase/adjust transactions (Toman)")
+    refunded = models.PositiveBigIntegerField(default=0, help_text="Refund transactions (Toman)")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "subscription_plan", "learning_path", "status"], name="uniq_revenue_daily",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["day", "status"], name="courses_revdaily_day_status"),
+        ]
+
+    def __str__(self):
+        return f"{self.day} plan={self.subscription_plan_id} lp={self.learning_path_id} {self.status}"
+
+
+class CalendarDay(models.Model):
+    """Jalali calendar dimension, one row per Gregorian date; see courses.analytics."""
+    date = models.DateField(primary_key=True)
+    jalali_year = models.PositiveSmallIntegerField()
+    jalali_month = models.PositiveSmallIntegerField()
+    jalali_day = models.PositiveSmallIntegerField()
+    jalali_week = models.PositiveSmallIntegerField(help_text="Week of the Jalali year; week 1 holds 1 Farvardin")
+    jalali_weekday = models.PositiveSmallIntegerField(help_text="0 = Saturday")
+    year_start = models.DateField(help_text="Gregorian date of 1 Farvardin of this Jalali year")
+    month_start = models.DateField(help_text="Gregorian date of the 1st of this Jalali month")
+    week_start = models.DateField(help_text="The Saturday starting this week")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["jalali_year", "jalali_month"], name="courses_calday_jalali_ym"),
+        ]
+
+    def __str__(self):
+        return f"{self.date} = {self.jalali_year}/{self.jalali_month:02d}/{self.jalali_day:02d}"
+
+
+class ExportJobQuerySet(models.QuerySet):
+    def due(self, lease_seconds):
+        """Queued jobs plus running ones older than the lease (their worker crashed)."""
+        stale = timezone.now() - timezone.timedelta(seconds=lease_seconds)
+        return self.filter(
+            models.Q(status=ExportJob.STATUS_QUEUED)
+            | models.Q(status=ExportJob.STATUS_RUNNING, started_at__lt=stale)
+        )
+
+
+class ExportJob(models.Model):
+    """A queued XLSX/PDF export of a filtered admin changelist; run by courses.exports."""
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = (
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    )
+    # keys of courses.exports.DATASETS / CONTENT_TYPES
+    DATASET_CHOICES = [(name, name) for name in ("subscriptions", "transactions")]
+    FORMAT_CHOICES = [(fmt, fmt.upper()) for fmt in ("csv", "jsonl", "xlsx", "pdf")]
+
+    dataset = models.CharField(max_length=20, choices=DATASET_CHOICES)
+    fmt = models.CharField(max_length=5, choices=FORMAT_CHOICES, default="xlsx")
+    querystring = models.TextField(blank=True, help_text="Querystring of the filtered admin changelist.")
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+",
+    )
+    status = models.CharField(max_length=8, choices=STATUS_CHOICES, default=STATUS_QUEUED, db_index=True)
+    rows = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to="exports/%Y/%m/", blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ExportJobQuerySet.as_manager()
+
+    class Meta:
+        ordering = ("-created_at",)
+
+    def __str__(self):
+        return f"{self.dataset}.{self.fmt} #{self.pk} ({self.status})"
@@ -0,0 +1,239 @@
+"""
+Session calendar for mentors.
+
+- Upcoming: weekly rules (``MentorGroupSession.suppused_day/suppoused_time`` and
+  ``MentorAssignment.code_review_session_day/time``) expanded into concrete
+  datetimes for the next N weeks. Search runs in the database (learner names via
+  ``courses.search``) and the latest StepProgress of every assignment is fetched
+  in one extra query. The datetimes only exist after the expansion, so sorting
+  happens in Python over one mentor's rules times N (at most 12) weeks.
+- Past: held group occurrences and 1:1 step sessions merged with a SQL UNION, so
+  search, sorting and pagination all happen in the database; only the rows of
+  the requested page are loaded as objects.
+
+Both produce the row dicts ``courses/mentor/session_list.html`` renders.
+"""
+
+from datetime import datetime, timedelta
+
+from django.db.models import F, OuterRef, Q, Subquery, Value, CharField
+from django.db.models.functions import Concat, Lower
+from django.utils import timezone
+
+from .models import (
+    MentorAssignment, MentorGroupSession, MentorGroupSessionOccurrence,
+    StepProgress, StepProgressSession,
+)
+from .search import search_q
+
+# ``type`` of the row dicts; session_list.html switches on these
+GROUP = "group"
+CODE_REVIEW = "code_review"
+GROUP_OCCURRENCE = "group_occurrence"
+STEP_SESSION = "step_session"
+
+# a search containing one of these words keeps every upcoming session of that kind
+GROUP_KEYWORD = "group"
+CODE_REVIEW_KEYWORD = "code"
+
+
+def weekly_occurrences(weekday, at_time, start, weeks=1):
+    """
+    The next ``weeks`` aware datetimes falling on ISO ``weekday`` (Mon=1) at local
+    ``at_time``, starting from ``start``. A slot earlier today rolls to next week.
+    """
+    local = timezone.localtime(start)
+    delta = (int(weekday) - local.isoweekday()) % 7
+    first = timezone.make_aware(datetime.combine(local.date() + timedelta(days=delta), at_time))
+    if first < start:
+        first += timedelta(days=7)
+    return [first + timedelta(weeks=i) for i in range(weeks)]
+
+
+def upcoming_sessions(mentor, *, now=None, weeks=1, search=""):
+    now = now or timezone.now()
+    search = search.strip()
+    sessions = []
+
+    groups = MentorGroupSession.objects.filter(mentor=mentor, suppoused_time__isnull=False)
+    assignments = MentorAssignment.objects.filter(mentor=mentor)
+    if search and GROUP_KEYWORD not in search.lower():
+        groups = groups.filter(
+            Q(learning_path__name__icontains=search) | Q(session_type__name_fa__icontains=search)
+        )
+    if search and CODE_REVIEW_KEYWORD not in search.lower():
+        assignments = assignments.filter(
+            search_q(search, learner="enrollment__learner_id")
+            | Q(enrollment__learning_path__name__icontains=search)
+        )
+
+    # ---------------------------------------------------------
+    # RECURRING GROUP SESSIONS (MentorGroupSession)
+    # ---------------------------------------------------------
+    for g in groups.select_related("learning_path", "session_type"):
+        for dt in weekly_occurrences(g.suppused_day, g.suppoused_time, now, weeks):
+            sessions.append({
+                "type": GROUP,
+                "datetime": dt,
+                "session": g,
+                "learning_path": g.learning_path,
+                "session_type": g.session_type,
+                "learner": None,
+                "pk": g.pk,
+            })
+
+    # ---------------------------------------------------------
+    # RECURRING CODE REVIEW SESSIONS (MentorAssignment)
+    # ---------------------------------------------------------
+    latest = (
+        StepProgress.objects.filter(mentor_assignment=OuterRef("pk"))
+        .order_by("-initial_promise_date", "-pk")
+        .values("pk")[:1]
+    )
+    assignments = list(
+        assignments.select_related("enrollment__learner__user", "enrollment__learning_path")
+        .annotate(latest_step_progress_id=Subquery(latest))
+    )
+    step_progresses = StepProgress.objects.select_related("educational_step").in_bulk(
+        [a.latest_step_progress_id for a in assignments if a.latest_step_progress_id]
+    )
+    for a in assignments:
+        for dt in weekly_occurrences(a.code_review_session_day, a.code_review_session_time, now, weeks):
+            sessions.append({
+                "type": CODE_REVIEW,
+                "datetime": dt,
+                "assignment": a,
+                "learning_path": a.enrollment.learning_path,
+                "learner": a.enrollment.learner,
+                "step_progress": step_progresses.get(a.latest_step_progress_id),
+                "session_type": None,
+                "pk": a.pk,
+            })
+    return sessions
+
+
+def _session_title(s):
+    if s["type"] == GROUP:
+        return f"{s['session'].session_type.name_fa} {s['learning_path'].name}".lower()
+    if s["type"] == CODE_REVIEW:
+        return f"code review {s['learner'].user.get_full_name()}".lower()
+    return ""
+
+
+def sort_sessions(sessions, sort):
+    """Same options as the list's sort dropdown; ties broken by type and id so pages are stable."""
+    if sort == "title_asc":
+        key, reverse = (lambda s: (_session_title(s), s["datetime"], s["type"], s["pk"])), False
+    elif sort == "title_desc":
+        key, reverse = (lambda s: (_session_title(s), s["datetime"], s["type"], s["pk"])), True
+    elif sort == "oldest":
+        key, reverse = (lambda s: (s["datetime"], s["type"], s["pk"])), False
+    else:
+        # sort newest (default)
+        key, reverse = (lambda s: (s["datetime"], s["type"], s["pk"])), True
+    return sorted(sessions, key=key, reverse=reverse)
+
+
+class PastSessions:
+    """
+    Lazy, sliceable list of past sessions for a Paginator.
+    ``count()`` and each page are one UNION query; the page rows are then loaded
+    with one query per session kind.
+    """
+
+    ORDERINGS = {
+        "oldest": ("dt", "kind", "obj"),
+        "title_asc": ("title", "dt", "kind", "obj"),
+        "title_desc": ("-title", "-dt", "-kind", "-obj"),
+        "": ("-dt", "-kind", "-obj"),
+    }
+
+    def __init__(self, mentor, *, now=None, search="", sort=""):
+        now = now or timezone.now()
+        search = search.strip()
+
+        groups = MentorGroupSessionOccurrence.objects.filter(
+            mentor_group_session__mentor=mentor, occurence_datetime__lt=now,
+        )
+        steps = StepProgressSession.objects.filter(
+            step_progress__mentor_assignment__mentor=mentor, datetime__lt=now,
+        )
+        if search:
+            groups = groups.filter(
+                Q(mentor_group_session__learning_path__name__icontains=search)
+                | Q(mentor_group_session__session_type__name_fa__icontains=search)
+            )
+            steps = steps.filter(
+                search_q(search, learner="step_progress__mentor_assignment__enrollment__learner_id")
+                | Q(step_progress__mentor_assignment__enrollment__learning_path__name__icontains=search)
+                | Q(session_type__name_fa__icontains=search)
+            )
+
+        groups = groups.annotate(
+            kind=Value(GROUP_OCCURRENCE, output_field=CharField()),
+            obj=F("pk"),
+            dt=F("occurence_datetime"),
+            title=Lower(Concat(
+                "mentor_group_session__session_type__name_fa", Value(" "),
+                "mentor_group_session__learning_path__name", output_field=CharField(),
+            )),
+        ).values("kind", "obj", "dt", "title").order_by()
+        steps = steps.annotate(
+            kind=Value(STEP_SESSION, output_field=CharField()),
+            obj=F("pk"),
+            dt=F("datetime"),
+            title=Lower(Concat(
+                Value("step session "),
+                "step_progress__mentor_assignment__enrollment__learner__user__first_name", Value(" "),
+                "step_progress__mentor_assignment__enrollment__learner__user__last_name",
+                output_field=CharField(),
+            )),
+        ).values("kind", "obj", "dt", "title").order_by()
+
+        self.rows = groups.union(steps, all=True).order_by(*self.ORDERINGS.get(sort, self.ORDERINGS[""]))
+
+    def count(self):
+        return self.rows.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        rows = list(self.rows[index]) if isinstance(index, slice) else [self.rows[index]]
+        ids = {GROUP_OCCURRENCE: [], STEP_SESSION: []}
+        for row in rows:
+            ids[row["kind"]].append(row["obj"])
+
+        occurrences = MentorGroupSessionOccurrence.objects.select_related(
+            "mentor_group_session__learning_path", "mentor_group_session__session_type",
+        ).in_bulk(ids[GROUP_OCCURRENCE])
+        step_sessions = StepProgressSession.objects.select_related(
+            "session_type",
+            "step_progress__mentor_assignment__enrollment__learner__user",
+            "step_progress__mentor_assignment__enrollment__learning_path",
+        ).in_bulk(ids[STEP_SESSION])
+
+        sessions = []
+        for row in rows:
+            if row["kind"] == GROUP_OCCURRENCE:
+                occ = occurrences[row["obj"]]
+                sessions.append({
+                    "type": GROUP_OCCURRENCE,
+                    "datetime": occ.occurence_datetime,
+                    "occurrence": occ,
+                    "learning_path": occ.mentor_group_session.learning_path,
+                    "session_type": occ.mentor_group_session.session_type,
+                    "learner": None,
+                })
+            else:
+                sess = step_sessions[row["obj"]]
+                enrollment = sess.step_progress.mentor_assignment.enrollment
+                sessions.append({
+                    "type": STEP_SESSION,
+                    "datetime": sess.datetime,
+                    "session": sess,
+                    "learning_path": enrollment.learning_path,
+                    "learner": enrollment.learner,
+                    "session_type": sess.session_type,
+                })
+        return sessions if isinstance(index, slice) else sessions[0]
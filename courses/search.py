@@ -0,0 +1,126 @@
+"""
+Search documents for the mentor and admin search boxes.
+
+Every learner, mentor and task has one ``SearchDocument`` row whose ``text`` is the
+searchable fields joined and normalized: lower-cased, Arabic letters folded to
+their Persian forms (ي→ی, ك→ک, ة→ه, …), diacritics/tatweel dropped, ZWNJ turned
+into a space and Persian/Arabic digits turned into ASCII. Queries are normalized
+the same way, so "علي" finds "علی" and "۰۹۱۲" finds "0912".
+
+On PostgreSQL ``text`` carries a ``gin_trgm_ops`` index (see the migration), so
+the ``LIKE '%term%'`` per term is an index lookup on one narrow table instead of
+an ``ILIKE`` scan across users joined to profiles.
+
+Views use ``search_q``::
+
+    qs.filter(search_q(q, learner="enrollment__learner_id", task="task_id"))
+
+Documents are kept in sync by the signals in ``courses/signals.py``;
+``manage.py rebuild_search_index`` rebuilds them from scratch.
+"""
+
+import re
+
+from django.db.models import Q
+
+from .models import Learner, Mentor, SearchDocument, Task
+
+USER_FIELD_NAMES = {"first_name", "last_name", "username", "email", "phone_number"}
+_USER_FIELDS = tuple(f"user__{name}" for name in sorted(USER_FIELD_NAMES))
+
+# kind -> (model, fields joined into the document); keys match SearchDocument.KIND_CHOICES
+SOURCES = {
+    "learner": (Learner, _USER_FIELDS),
+    "mentor": (Mentor, _USER_FIELDS),
+    "task": (Task, ("title",)),
+}
+
+_FOLD = str.maketrans({
+    "ي": "ی", "ى": "ی", "ئ": "ی",
+    "ك": "ک",
+    "ة": "ه", "ۀ": "ه",
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ؤ": "و",
+    "\u200c": " ",   # ZWNJ (نیم‌فاصله)
+    "\u200d": None,  # ZWJ
+    "\u0640": None,  # tatweel
+    **{d: str(i) for i, d in enumerate("۰۱۲۳۴۵۶۷۸۹")},
+    **{d: str(i) for i, d in enumerate("٠١٢٣٤٥٦٧٨٩")},
+})
+_DIACRITICS = re.compile("[\u064b-\u065f\u0670]")  # harakat, superscript alef
+
+
+def normalize(text):
+    text = _DIACRITICS.sub("", str(text or "")).translate(_FOLD).lower()
+    return " ".join(text.split())
+
+
+# ---------------------------------------------------------------------------
+# Query API
+# ---------------------------------------------------------------------------
+
+def matching_ids(kind, query):
+    """Subquery of ``object_id`` whose document contains every term of ``query``."""
+    qs = SearchDocument.objects.filter(kind=kind)
+    for term in normalize(query).split():
+        qs = qs.filter(text__contains=term)
+    return qs.values("object_id")
+
+
+def search_q(query, **lookups):
+    """
+    ``Q`` matching rows whose related learner/mentor/task matches ``query``;
+    ``lookups`` maps a kind to the id path on the filtered model. Empty (matches
+    everything) when the query normalizes to nothing.
+    """
+    if not normalize(query):
+        return Q()
+    q = Q()
+    for kind, path in lookups.items():
+        q |= Q(**{f"{path}__in": matching_ids(kind, query)})
+    return q
+
+
+# ---------------------------------------------------------------------------
+# Indexing
+# ---------------------------------------------------------------------------
+
+def reindex(kind, ids=None, batch_size=2000):
+    """Upsert the documents of ``kind`` (all of them, or only ``ids``). Returns the row count."""
+    model, fields = SOURCES[kind]
+    rows = model.objects.order_by("pk").values_list("pk", *fields)
+    if ids is not None:
+        rows = rows.filter(pk__in=list(ids))
+
+    done, batch = 0, []
+    for pk, *values in rows.iterator(chunk_size=batch_size):
+        batch.append(SearchDocument(kind=kind, object_id=pk, text=normalize(" ".join(v for v in values if v))))
+        if len(batch) >= batch_size:
+            done += _upsert(batch)
+            batch = []
+    if batch:
+        done += _upsert(batch)
+    return done
+
+
+def _upsert(docs):
+    SearchDocument.objects.bulk_create(
+        docs,
+        update_conflicts=True,
+        unique_fields=["kind", "object_id"],
+        update_fields=["text", "updated_at"],
+    )
+    return len(docs)
+
+
+def remove(kind, ids):
+    SearchDocument.objects.filter(kind=kind, object_id__in=list(ids)).delete()
+
+
+def reindex_user(user_id):
+    """A user's name/email/phone changed: refresh their learner and mentor documents."""
+    for kind in ("learner", "mentor"):
+        model = SOURCES[kind][0]
+        ids = list(model.objects.filter(user_id=user_id).values_list("pk", flat=True))
+        if ids:
+            reindex(kind, ids)
@@ -1,4 +1,5 @@
-from django.db.models.signals import post_save
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 from django.utils import formats
 
@@ -6,10 +7,15 @@ from courses.models import (
     TaskSubmission, TaskEvaluation,
     StepExtension, MentorGroupSessionOccurrence,
     MentorGroupSessionParticipant, MentorAssignment,
-    LearnerSubscribePlan, LearnerSubscribePlanFreeze
+    LearnerSubscribePlan, LearnerSubscribePlanFreeze,
+    StepProgress, EducationalStep, EnrollmentProgress,
+    Learner, Mentor, Task, SubscriptionTransaction, LearnerEnrollment,
 )
 
+from courses import analytics, search
+from courses.cache import adjust_pending, invalidate_learner_options, invalidate_pending
 from notifications.models import Event, Notification
+from notifications.signals import push_internal
 
 
 # -------------------------------------------------------
@@ -68,36 +74,53 @@ def notify_group_session_rescheduled(sender, instance, created, **kwargs):
     learning_path = session.learning_path
 
     # all learners assigned to this mentor within this learning path
-    mentor_assignments = mentor.assignments.filter(
+    user_ids = mentor.assignments.filter(
         enrollment__learning_path=learning_path,
         enrollment__status="active"
-    )
+    ).values_list("enrollment__learner__user_id", flat=True)
 
-    for ma in mentor_assignments:
-        user = ma.enrollment.learner.user
-        Notification.objects.create(
-            user=user,
+    message = (
+        f"The group session with {mentor.user} has been rescheduled. "
+        f"New datetime: {formats.date_format(instance.new_datetime, "m-d H:i") or instance.occurence_datetime}"
+    )
+    stamp = int(instance.new_datetime.timestamp()) if instance.new_datetime else 0
+    _send_batch(
+        Notification(
+            user_id=user_id,
             event=Event.GROUP_SESSION_RESCHEDULED,
             title="Group session rescheduled",
-            message=(
-                f"The group session with {mentor.user} has been rescheduled. "
-                f"New datetime: {formats.date_format(instance.new_datetime, "m-d H:i") or instance.occurence_datetime}"
-            ),
-            send_internal = True
+            message=message,
+            send_internal = True,
+            dedupe_key=f"rescheduled:{instance.pk}:{stamp}",
         )
+        for user_id in user_ids
+    )
 
 
 @receiver(post_save, sender=MentorGroupSessionParticipant)
 def notify_marked_absent(sender, instance, created, **kwargs):
     if not instance.learner_was_present:
-        user = instance.mentor_assignment.enrollment.learner.user
-        Notification.objects.create(
-            user=user,
+        notify_learners_absent([instance])
+
+
+def notify_learners_absent(participants):
+    """
+    One batched insert + one websocket fan-out for every absent participant.
+    Used directly after bulk attendance (bulk_create skips post_save); expects
+    `mentor_assignment__enrollment__learner` to be loaded.
+    """
+    return _send_batch(
+        Notification(
+            user_id=p.mentor_assignment.enrollment.learner.user_id,
             event=Event.MARKED_ABSENT,
             title="You were marked absent",
             message="You were marked absent for a group session.",
-            send_internal = True
+            send_internal = True,
+            dedupe_key=f"absent:{p.mentor_group_session_occurence_id}:{p.mentor_assignment_id}",
         )
+        for p in participants
+        if not p.learner_was_present
+    )
 
 
 @receiver(post_save, sender=MentorAssignment)
@@ -126,14 +149,17 @@ def notify_mentor_assigned(sender, instance, created, **kwargs):
 @receiver(post_save, sender=LearnerSubscribePlan)
 def notify_subscription_purchased(sender, instance, created, **kwargs):
     if created:
-        user = instance.learner_enrollment.learner.user
-        Notification.objects.create(
-            user=user,
-            event=Event.SUBSCRIPTION_PURCHASED,
-            title="Subscription activated",
-            message=f"Your subscription to {instance.subscription_plan.name} is now active.",
-            send_internal = True
-        )
+        purchased_notification(instance.learner_enrollment.learner.user_id, instance).save()
+
+
+def purchased_notification(user_id, subscription):
+    return Notification(
+        user_id=user_id,
+        event=Event.SUBSCRIPTION_PURCHASED,
+        title="Subscription activated",
+        message=f"Your subscription to {subscription.subscription_plan.name} is now active.",
+        send_internal = True
+    )
 
 
 @receiver(post_save, sender=LearnerSubscribePlanFreeze)
@@ -149,23 +175,55 @@ def notify_subscription_frozen(sender, instance, created, **kwargs):
         )
 
 
-def notify_deadline_approaching(user, step_progress):
-    Notification.objects.create(
-        user=user,
+def _send_batch(notifications):
+    created = Notification.objects.create_batch(list(notifications))
+    push_internal(created)
+    return created
+
+
+def _deadline_notification(user_id, step_progress):
+    due_at = step_progress.due_at
+    return Notification(
+        user_id=user_id,
         event=Event.DEADLINE_APPROACHING,
         title="Deadline approaching",
         message=f"Your deadline for step {step_progress.educational_step.title} is near.",
-        send_internal = True
+        send_internal = True,
+        dedupe_key=f"deadline:{step_progress.pk}:{int(due_at.timestamp()) if due_at else 0}",
     )
 
-def notify_subscription_expiring(plan):
-    user = plan.learner_enrollment.learner.user
-    Notification.objects.create(
-        user=user,
+
+def _expiring_notification(user_id, plan):
+    return Notification(
+        user_id=user_id,
         event=Event.SUBSCRIPTION_EXPIRING,
         title="Subscription expiring soon",
         message="Your subscription will expire soon. Consider renewing.",
-        send_internal = True
+        send_internal = True,
+        dedupe_key=f"sub_expiring:{plan.pk}:{int(plan.effective_end_datetime.timestamp())}",
+    )
+
+
+def notify_deadline_approaching(user, step_progress):
+    _send_batch([_deadline_notification(user.pk, step_progress)])
+
+def notify_subscription_expiring(plan):
+    _send_batch([_expiring_notification(plan.learner_enrollment.learner.user_id, plan)])
+
+
+# Batched variants used by the `send_reminders` command.
+# Both expect the user path select_related, see the command's querysets.
+
+def notify_deadlines_approaching(step_progresses):
+    return _send_batch(
+        _deadline_notification(sp.mentor_assignment.enrollment.learner.user_id, sp)
+        for sp in step_progresses
+    )
+
+def notify_subscriptions_expiring(plans):
+    return _send_batch(
+        _expiring_notification(plan.learner_enrollment.learner.user_id, plan)
+        for plan in plans
     )
 
 def notify_subscription_expired(plan):
@@ -176,4 +234,234 @@ def notify_subscription_expired(plan):
         title="Subscription expired",
         message="Your subscription has expired.",
         send_internal = True
-    )
\ No newline at end of file
+    )
+
+
+# -------------------------------------------------------
+# Step deadlines (StepProgress.due_at)
+# -------------------------------------------------------
+
+@receiver(post_save, sender=StepExtension)
+@receiver(post_delete, sender=StepExtension)
+def refresh_step_due_at(sender, instance, **kwargs):
+    step_progress = StepProgress.objects.filter(pk=instance.step_progress_id).first()
+    if step_progress:
+        step_progress.refresh_due_at()
+
+
+# -------------------------------------------------------
+# Signals to keep EnrollmentProgress in sync
+# -------------------------------------------------------
+# The row is built when the enrollment is created; the refresh_* updates below
+# leave enrollments without a row alone (`rebuild_enrollment_progress` fixes those).
+
+@receiver(post_save, sender=LearnerEnrollment)
+def create_progress_on_enrollment(sender, instance, created, **kwargs):
+    if created:
+        EnrollmentProgress.objects.rebuild(LearnerEnrollment.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=StepProgress)
+@receiver(post_delete, sender=StepProgress)
+def sync_progress_on_step_progress(sender, instance, **kwargs):
+    enrollment_id = (
+        MentorAssignment.objects.filter(pk=instance.mentor_assignment_id)
+        .values_list("enrollment_id", flat=True)
+        .first()
+    )
+    if enrollment_id is None:
+        return
+    EnrollmentProgress.objects.refresh_steps(enrollment_id)
+    if kwargs.get("signal") is post_delete:
+        # submissions of the deleted step progress are gone with it
+        EnrollmentProgress.objects.refresh_step_tasks(enrollment_id, instance.educational_step_id)
+
+
+def _refresh_tasks_for_submission(submission_id):
+    row = (
+        TaskSubmission.objects.filter(pk=submission_id)
+        .values_list("step_progress__mentor_assignment__enrollment_id", "task__step_id")
+        .first()
+    )
+    if row:
+        EnrollmentProgress.objects.refresh_step_tasks(*row)
+
+
+@receiver(post_save, sender=TaskEvaluation)
+@receiver(post_delete, sender=TaskEvaluation)
+def sync_progress_on_evaluation(sender, instance, **kwargs):
+    _refresh_tasks_for_submission(instance.submission_id)
+
+
+@receiver(post_delete, sender=TaskSubmission)
+def sync_progress_on_submission_delete(sender, instance, **kwargs):
+    row = (
+        StepProgress.objects.filter(pk=instance.step_progress_id)
+        .values_list("mentor_assignment__enrollment_id", "educational_step_id")
+        .first()
+    )
+    if row:
+        EnrollmentProgress.objects.refresh_step_tasks(*row)
+
+
+@receiver(post_save, sender=EducationalStep)
+@receiver(post_delete, sender=EducationalStep)
+def sync_progress_on_step_change(sender, instance, created=False, **kwargs):
+    if created or kwargs.get("signal") is post_delete:
+        EnrollmentProgress.objects.refresh_total_steps(instance.learning_path_id)
+
+
+# -------------------------------------------------------
+# Mentor feedback inbox counters (courses.cache)
+# -------------------------------------------------------
+
+def _submission_mentor_id(submission_id):
+    return (
+        TaskSubmission.objects.filter(pk=submission_id)
+        .values_list("step_progress__mentor_assignment__mentor_id", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=TaskSubmission)
+def count_pending_on_submission(sender, instance, created, **kwargs):
+    mentor_id = _submission_mentor_id(instance.pk)
+    if created:
+        adjust_pending(mentor_id, +1)
+    else:
+        invalidate_pending([mentor_id])
+
+
+@receiver(post_delete, sender=TaskSubmission)
+def count_pending_on_submission_delete(sender, instance, **kwargs):
+    mentor_id = (
+        StepProgress.objects.filter(pk=instance.step_progress_id)
+        .values_list("mentor_assignment__mentor_id", flat=True)
+        .first()
+    )
+    invalidate_pending([mentor_id])
+
+
+@receiver(post_save, sender=TaskEvaluation)
+@receiver(post_delete, sender=TaskEvaluation)
+def count_pending_on_evaluation(sender, instance, created=False, **kwargs):
+    # Only an evaluation by the assignment's own mentor takes a submission off that mentor's queue.
+    if created and instance.mentor_id == _submission_mentor_id(instance.submission_id):
+        adjust_pending(instance.mentor_id, -1)
+    elif kwargs.get("signal") is post_delete:
+        invalidate_pending([instance.mentor_id])
+
+
+@receiver(post_save, sender=MentorAssignment)
+@receiver(post_delete, sender=MentorAssignment)
+def refresh_mentor_inbox_on_assignment(sender, instance, **kwargs):
+    invalidate_pending([instance.mentor_id])
+    invalidate_learner_options([instance.mentor_id])
+
+
+# -------------------------------------------------------
+# Search documents (courses.search)
+# -------------------------------------------------------
+
+_SEARCH_KINDS = {Learner: "learner", Mentor: "mentor", Task: "task"}
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def index_user(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields and not set(update_fields) & search.USER_FIELD_NAMES):
+        return
+    search.reindex_user(instance.pk)
+
+
+@receiver(post_save, sender=Learner)
+@receiver(post_save, sender=Mentor)
+@receiver(post_save, sender=Task)
+def index_search_document(sender, instance, created, **kwargs):
+    # Profiles only change their user; tasks re-index on every save (the title may change)
+    if created or sender is Task:
+        search.reindex(_SEARCH_KINDS[sender], [instance.pk])
+
+
+@receiver(post_delete, sender=Learner)
+@receiver(post_delete, sender=Mentor)
+@receiver(post_delete, sender=Task)
+def remove_search_document(sender, instance, **kwargs):
+    search.remove(_SEARCH_KINDS[sender], [instance.pk])
+
+
+
+# -------------------------------------------------------
+# Progress analytics rollups (courses.analytics)
+# -------------------------------------------------------
+
+_ROLLUP_DATES = {
+    StepProgress: ("initial_promise_date", "task_completion_date"),
+    TaskEvaluation: ("evaluated_at",),
+}
+
+
+@receiver(pre_save, sender=StepProgress)
+@receiver(pre_save, sender=TaskEvaluation)
+def remember_rollup_days(sender, instance, **kwargs):
+    # A moved completion/evaluation date makes the old day stale as well
+    instance._rollup_old_dates = (
+        sender.objects.filter(pk=instance.pk).values_list(*_ROLLUP_DATES[sender]).first() or ()
+        if instance.pk else ()
+    )
+
+
+@receiver(post_save, sender=StepProgress)
+@receiver(post_delete, sender=StepProgress)
+@receiver(post_save, sender=TaskEvaluation)
+@receiver(post_delete, sender=TaskEvaluation)
+def mark_rollup_days(sender, instance, **kwargs):
+    current = [getattr(instance, f) for f in _ROLLUP_DATES[sender]]
+    analytics.mark_dirty(*current, *getattr(instance, "_rollup_old_dates", ()))
+
+
+@receiver(post_save, sender=MentorAssignment)
+def mark_rollup_days_on_reassign(sender, instance, created, **kwargs):
+    if created:
+        return
+    # the mentor may have changed: every day of this assignment moves between mentors
+    dates = StepProgress.objects.filter(mentor_assignment=instance).values_list(
+        "initial_promise_date", "task_completion_date",
+    )
+    evaluated = TaskEvaluation.objects.filter(
+        submission__step_progress__mentor_assignment=instance,
+    ).values_list("evaluated_at", flat=True)
+    analytics.mark_dirty(*(d for pair in dates for d in pair), *evaluated)
+
+
+# -------------------------------------------------------
+# Revenue cube (courses.analytics)
+# -------------------------------------------------------
+
+@receiver(pre_save, sender=LearnerSubscribePlan)
+def remember_revenue_day(sender, instance, **kwargs):
+    instance._revenue_old_start = (
+        sender.objects.filter(pk=instance.pk).values_list("start_datetime", flat=True).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=LearnerSubscribePlan)
+@receiver(post_delete, sender=LearnerSubscribePlan)
+def refresh_revenue_on_subscription(sender, instance, **kwargs):
+    analytics.mark_dirty(instance.start_datetime, getattr(instance, "_revenue_old_start", None))
+
+
+@receiver(post_save, sender=SubscriptionTransaction)
+@receiver(post_delete, sender=SubscriptionTransaction)
+def refresh_revenue_on_transaction(sender, instance, **kwargs):
+    if instance.subscription_id is None:
+        return
+    # the subscription is usually loaded already (inlines, bulk_purchase, refunds)
+    if SubscriptionTransaction.subscription.is_cached(instance):
+        start = instance.subscription.start_datetime
+    else:
+        start = (
+            LearnerSubscribePlan.objects.filter(pk=instance.subscription_id)
+            .values_list("start_datetime", flat=True).first()
+        )
+    analytics.mark_dirty(start)
@@ -1,3 +1,297 @@
+from datetime import date
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+
+from courses import analytics
+from courses.cache import mentor_learner_options, mentor_pending_count
+from courses.models import (
+    EducationalStep, EnrollmentProgress, Learner, LearnerEnrollment, LearnerSubscribePlan, LearningPath, Mentor,
+    MentorAssignment, RollupDirtyDay, StepProgress, StepProgressDaily, SubscriptionPlan, SubscriptionTransaction,
+    Task, TaskEvaluation, TaskSubmission, TransactionKind,
+)
+from core.notify import OutboundMessage
+from notifications.models import Event, Notification
+
+
+def make_user(username, **fields):
+    return get_user_model().objects.create_user(username=username, password="x", **fields)
+
+
+def make_enrollment(username, path, **user_fields):
+    learner = Learner.objects.create(user=make_user(username, **user_fields))
+    return LearnerEnrollment.objects.create(learner=learner, learning_path=path)
+
+
+class EnrollmentProgressTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.path = LearningPath.objects.create(name="Backend")
+        cls.steps = [
+            EducationalStep.objects.create(
+                learning_path=cls.path, sequence_no=n, title=f"Step {n}", expected_duration_days=7,
+            )
+            for n in (1, 2)
+        ]
+        cls.tasks = [
+            Task.objects.create(step=step, title=f"Task {n}", order_in_step=n)
+            for step in cls.steps for n in (1, 2)
+        ]
+        cls.mentor = Mentor.objects.create(user=make_user("mentor"))
+        cls.other_mentor = Mentor.objects.create(user=make_user("other"))
+
+    def _progress(self, enrollment):
+        row = EnrollmentProgress.objects.get(enrollment=enrollment)
+        return row.total_steps, row.completed_steps, row.done_tasks, row.last_completed_at
+
+    def test_signals_match_rebuild(self):
+        enrollment = make_enrollment("ali", self.path)
+        assignment = MentorAssignment.objects.create(enrollment=enrollment, mentor=self.mentor)
+        first = StepProgress.objects.create(mentor_assignment=assignment, educational_step=self.steps[0])
+        StepProgress.objects.create(mentor_assignment=assignment, educational_step=self.steps[1])
+        for task in self.tasks[:2]:
+            submission = TaskSubmission.objects.create(task=task, step_progress=first)
+            TaskEvaluation.objects.create(submission=submission, mentor=self.mentor)
+        first.task_completion_date = timezone.now()
+        first.save()
+
+        by_signals = self._progress(enrollment)
+        EnrollmentProgress.objects.rebuild(LearnerEnrollment.objects.filter(pk=enrollment.pk))
+        self.assertEqual(self._progress(enrollment), by_signals)
+        self.assertEqual(by_signals[:3], (2, 1, {str(self.steps[0].pk): 2}))
+
+    def test_evaluation_by_unassigned_mentor_is_not_counted(self):
+        enrollment = make_enrollment("reza", self.path)
+        assignment = MentorAssignment.objects.create(enrollment=enrollment, mentor=self.mentor)
+        progress = StepProgress.objects.create(mentor_assignment=assignment, educational_step=self.steps[0])
+        submission = TaskSubmission.objects.create(task=self.tasks[0], step_progress=progress)
+        TaskEvaluation.objects.create(submission=submission, mentor=self.other_mentor)
+
+        EnrollmentProgress.objects.rebuild(LearnerEnrollment.objects.filter(pk=enrollment.pk))
+        self.assertEqual(EnrollmentProgress.objects.get(enrollment=enrollment).done_tasks, {})
+
+    def test_for_enrollment_does_not_write(self):
+        enrollment = make_enrollment("sara", self.path)
+        EnrollmentProgress.objects.filter(enrollment=enrollment).delete()
+        enrollment = LearnerEnrollment.objects.get(pk=enrollment.pk)
+
+        progress = EnrollmentProgress.objects.for_enrollment(enrollment)
+        self.assertIsNone(progress.pk)
+        self.assertEqual(progress.total_steps, 2)
+        self.assertFalse(EnrollmentProgress.objects.filter(enrollment=enrollment).exists())
+
+
+class MentorInboxCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        path = LearningPath.objects.create(name="Backend")
+        step = EducationalStep.objects.create(learning_path=path, sequence_no=1, title="Step 1", expected_duration_days=7)
+        cls.task = Task.objects.create(step=step, title="Task 1", order_in_step=1)
+        cls.mentor = Mentor.objects.create(user=make_user("mentor"))
+        cls.other_mentor = Mentor.objects.create(user=make_user("other"))
+        assignment = MentorAssignment.objects.create(enrollment=make_enrollment("ali", path), mentor=cls.mentor)
+        cls.progress = StepProgress.objects.create(mentor_assignment=assignment, educational_step=step)
+        cls.path = path
+
+    def setUp(self):
+        cache.clear()
+
+    def test_pending_count_follows_submissions_and_evaluations(self):
+        self.assertEqual(mentor_pending_count(self.mentor.pk), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            submission = TaskSubmission.objects.create(task=self.task, step_progress=self.progress)
+        with self.assertNumQueries(0):
+            self.assertEqual(mentor_pending_count(self.mentor.pk), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TaskEvaluation.objects.create(submission=submission, mentor=self.other_mentor)
+        self.assertEqual(mentor_pending_count(self.mentor.pk), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TaskEvaluation.objects.create(submission=submission, mentor=self.mentor)
+        with self.assertNumQueries(0):
+            self.assertEqual(mentor_pending_count(self.mentor.pk), 0)
+
+    def test_learner_options_refresh_on_new_assignment(self):
+        self.assertEqual([o["name"] for o in mentor_learner_options(self.mentor.pk)], ["ali"])
+        with self.captureOnCommitCallbacks(execute=True):
+            MentorAssignment.objects.create(enrollment=make_enrollment("bahar", self.path), mentor=self.mentor)
+        self.assertEqual([o["name"] for o in mentor_learner_options(self.mentor.pk)], ["ali", "bahar"])
+
+
+class RollupDirtyDayTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        path = LearningPath.objects.create(name="Backend")
+        cls.step = EducationalStep.objects.create(
+            learning_path=path, sequence_no=1, title="Step 1", expected_duration_days=7,
+        )
+        mentor = Mentor.objects.create(user=make_user("mentor"))
+        cls.assignment = MentorAssignment.objects.create(enrollment=make_enrollment("ali", path), mentor=mentor)
+
+    def test_progress_change_marks_its_day_and_refresh_rebuilds_it(self):
+        RollupDirtyDay.objects.all().delete()
+        progress = StepProgress.objects.create(mentor_assignment=self.assignment, educational_step=self.step)
+        day = analytics.local_day(progress.initial_promise_date)
+        self.assertEqual(list(RollupDirtyDay.objects.values_list("day", flat=True)), [day])
+
+        self.assertEqual(analytics.refresh_dirty(), (1, 1))
+        self.assertFalse(RollupDirtyDay.objects.exists())
+        self.assertEqual(StepProgressDaily.objects.get(day=day).starts, 1)
+
+    def test_failed_rebuild_keeps_the_day_dirty(self):
+        analytics.mark_dirty(timezone.now())
+        with mock.patch.object(analytics, "rebuild_range", side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                analytics.refresh_dirty()
+        self.assertTrue(RollupDirtyDay.objects.filter(day=timezone.localdate()).exists())
+
+    def test_limit(self):
+        RollupDirtyDay.objects.all().delete()
+        analytics.mark_dirty(*(timezone.make_aware(timezone.datetime(2026, 1, d)) for d in (1, 2, 3)))
+        self.assertEqual(analytics.refresh_dirty(limit=2)[0], 2)
+        self.assertEqual(list(RollupDirtyDay.objects.values_list("day", flat=True)), [date(2026, 1, 3)])
+
+
+class BulkPurchaseTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        path = LearningPath.objects.create(name="Backend")
+        cls.enrollments = [make_enrollment(name, path) for name in ("ali", "sara")]
+        cls.plan = SubscriptionPlan.objects.create(name="Basic", price_amount=1000, duration_in_days=30)
+
+    def test_creates_what_save_and_the_receivers_would(self):
+        start = timezone.now() - timezone.timedelta(days=1)
+        notifications = LearnerSubscribePlan.objects.bulk_purchase([
+            LearnerSubscribePlan(learner_enrollment=e, subscription_plan=self.plan, start_datetime=start, discount=10)
+            for e in self.enrollments
+        ])
+
+        subscriptions = LearnerSubscribePlan.objects.order_by("pk")
+        self.assertEqual(len(subscriptions), 2)
+        for s in subscriptions:
+            self.assertEqual(s.final_cost, 900)
+            self.assertEqual(s.end_datetime, start + timezone.timedelta(days=30))
+            self.assertEqual(s.effective_end_datetime, s.end_datetime)
+            self.assertEqual(s.status, LearnerSubscribePlan.STATUS_ACTIVE)
+            self.assertEqual(s.history.count(), 1)
+            transaction = SubscriptionTransaction.objects.get(subscription=s)
+            self.assertEqual((transaction.kind, transaction.amount), (TransactionKind.PURCHASE, 900))
+            self.assertEqual(transaction.history.count(), 1)
+
+        self.assertEqual(len(notifications), 2)
+        self.assertEqual(
+            set(Notification.objects.filter(event=Event.SUBSCRIPTION_PURCHASED).values_list("user_id", flat=True)),
+            {e.learner.user_id for e in self.enrollments},
+        )
+
+    def test_unknown_enrollment_creates_nothing(self):
+        with self.assertRaises(ValueError):
+            LearnerSubscribePlan.objects.bulk_purchase([
+                LearnerSubscribePlan(learner_enrollment_id=0, subscription_plan=self.plan),
+            ])
+        self.assertFalse(LearnerSubscribePlan.objects.exists())
+
+
+class ExpireChunksTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        path = LearningPath.objects.create(name="Backend")
+        plan = SubscriptionPlan.objects.create(name="Basic", price_amount=1000, duration_in_days=30)
+        start = timezone.now() - timezone.timedelta(days=10)
+        cls.subscriptions = [
+            LearnerSubscribePlan.objects.create(
+                learner_enrollment=make_enrollment(name, path, phone_number=f"0912000000{i}"),
+                subscription_plan=plan, start_datetime=start,
+            )
+            for i, name in enumerate(("ali", "sara", "reza"))
+        ]
+        cls.at = start + timezone.timedelta(days=31)
+
+    def test_expires_in_chunks_once(self):
+        self.assertEqual([n for n, _ in LearnerSubscribePlan.objects.expire_chunks(self.at, chunk_size=2)], [2, 1])
+        messages = OutboundMessage.objects.count()
+        self.assertEqual(OutboundMessage.objects.filter(recipient__startswith="0912").count(), 3)
+
+        self.assertEqual(list(LearnerSubscribePlan.objects.expire_chunks(self.at, chunk_size=2)), [])
+        self.assertEqual(OutboundMessage.objects.count(), messages)
+        for s in self.subscriptions:
+            s.refresh_from_db()
+            self.assertEqual(s.status, LearnerSubscribePlan.STATUS_EXPIRED)
+            self.assertEqual(s.expired_at, s.effective_end_datetime)
+            self.assertEqual(s.history.filter(history_change_reason="Expired").count(), 1)
+
+    def test_dry_run_changes_nothing(self):
+        self.assertEqual(sum(n for n, _ in LearnerSubscribePlan.objects.expire_chunks(self.at, dry_run=True)), 3)
+        self.assertFalse(LearnerSubscribePlan.objects.filter(status=LearnerSubscribePlan.STATUS_EXPIRED).exists())
+
+
+class SubscriptionLifecycleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.enrollment = make_enrollment("ali", LearningPath.objects.create(name="Backend"))
+        cls.plan = SubscriptionPlan.objects.create(name="Basic", price_amount=1000, duration_in_days=30)
+
+    def subscribe(self, start):
+        return LearnerSubscribePlan.objects.create(
+            learner_enrollment=self.enrollment, subscription_plan=self.plan, start_datetime=start,
+        )
+
+    def test_future_start_is_reserved_until_started(self):
+        s = self.subscribe(timezone.now() + timezone.timedelta(days=2))
+        self.assertEqual(s.status, LearnerSubscribePlan.STATUS_RESERVED)
+        with self.assertRaises(ValidationError):
+            s.transition(LearnerSubscribePlan.STATUS_EXPIRED)
+
+        self.assertEqual(LearnerSubscribePlan.objects.start_and_unfreeze(at=s.start_datetime), (1, 0))
+        s.refresh_from_db()
+        self.assertEqual(s.status, LearnerSubscribePlan.STATUS_ACTIVE)
+
+    def test_freeze_moves_the_effective_end(self):
+        s = self.subscribe(timezone.now() - timezone.timedelta(days=1))
+        s.freeze(5)
+        self.assertEqual(s.status, LearnerSubscribePlan.STATUS_FROZEN)
+        self.assertEqual(s.effective_end_datetime, s.end_datetime + timezone.timedelta(days=5))
+        with self.assertRaises(ValidationError):
+            s.freeze(3)
+
+    def test_early_unfreeze_keeps_only_the_used_days(self):
+        s = self.subscribe(timezone.now() - timezone.timedelta(days=1))
+        freeze = s.freeze(10)
+        s.transition(LearnerSubscribePlan.STATUS_ACTIVE, at=freeze.start_date + timezone.timedelta(days=2))
+        s.refresh_from_db()
+        self.assertEqual(s.status, LearnerSubscribePlan.STATUS_ACTIVE)
+        self.assertIsNone(s.frozen_until)
+        self.assertEqual(s.effective_end_datetime, s.end_datetime + timezone.timedelta(days=2))
+
+    def test_expire(self):
+        s = self.subscribe(timezone.now() - timezone.timedelta(days=1))
+        at = timezone.now()
+        s.transition(LearnerSubscribePlan.STATUS_EXPIRED, at=at)
+        s.refresh_from_db()
+        self.assertEqual((s.status, s.expired_at), (LearnerSubscribePlan.STATUS_EXPIRED, at))
+        with self.assertRaises(ValidationError):
+            s.transition(LearnerSubscribePlan.STATUS_ACTIVE)
+
+    def test_past_end_expires_on_save(self):
+        s = self.subscribe(timezone.now() - timezone.timedelta(days=40))
+        self.assertEqual(s.status, LearnerSubscribePlan.STATUS_EXPIRED)
+        self.assertEqual(s.expired_at, s.effective_end_datetime)
+
+
+class AnalyticsCommandTests(TestCase):
+    def test_revenue_cube_with_only_since_and_no_subscriptions(self):
+        out = StringIO()
+        call_command("rebuild_revenue_cube", since=date(2025, 1, 1), stdout=out)
+        self.assertIn("No subscriptions to aggregate.", out.getvalue())
 
-# Create your tests here.
+    def test_progress_backfill_with_only_since_and_no_data(self):
+        out = StringIO()
+        call_command("rollup_progress_analytics", backfill=True, since=date(2025, 1, 1), stdout=out)
+        self.assertIn("No progress data to roll up.", out.getvalue())
@@ -3,9 +3,10 @@ from django.views.generic import View, ListView, UpdateView, DetailView, Templat
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from .models import (Learner, LearnerEnrollment, MentorAssignment, LearnerSubscribePlan, MentorGroupSessionOccurrence, 
                     StepProgress, EducationalStep, Task, TaskEvaluation, TaskSubmission, SocialPost, SocialMedia,
-                    MentorGroupSession, StepProgressSession, MentorGroupSessionParticipant, SessionType)
+                    MentorGroupSession, StepProgressSession, MentorGroupSessionParticipant, SessionType,
+                    EnrollmentProgress)
 from core.models import CustomUser
-from django.db.models import Max, Count, Q, Prefetch, Sum, Exists, OuterRef, Subquery
+from django.db.models import Max, Count, Q, Prefetch, Exists, OuterRef, Subquery
 from django.urls import reverse_lazy, reverse
 from .forms import ProfileForm
 from django.contrib import messages
@@ -15,6 +16,13 @@ from datetime import timedelta, datetime
 from django.utils.functional import cached_property
 from django.http import Http404, HttpResponse, HttpResponseForbidden
 from django.template.loader import render_to_string
+from django.db import transaction
+from .signals import notify_learners_absent
+from .schedule import upcoming_sessions, sort_sessions, PastSessions
+from .attendance import attendance_timeline
+from .cache import mentor_pending_count, mentor_learner_options
+from .search import search_q
+from core.view_cache import CachedContextMixin, object_key
 
 # Learner side Views
 class LearnerDashboardView(LoginRequiredMixin, TemplateView):
@@ -56,30 +64,22 @@ class LearnerDashboardView(LoginRequiredMixin, TemplateView):
                 )
             )
 
-            completed_steps = step_progresses.filter(task_completion_date__isnull=False).count()
-            total_steps = latest_enrollment.learning_path.steps.count()
-            progress_percent = round((completed_steps / total_steps) * 100) if total_steps else 0
+            # ✅ 1 query for the stored progress row
+            progress = EnrollmentProgress.objects.for_enrollment(latest_enrollment)
+            completed_steps = progress.completed_steps
+            total_steps = progress.total_steps
+            progress_percent = progress.percent
 
-            # ✅ Compute upcoming deadlines (Python-side)
+            # ✅ 1 query for the next deadlines (indexed on due_at)
             now = timezone.now()
-            upcoming_deadlines = []
-            for sp in step_progresses:
-                if sp.task_completion_date:
-                    continue
-
-                # Sum all extension days
-                extra_days = sum(ext.extended_by_days for ext in sp.extensions.all())
-                due_date = sp.initial_promise_date + timedelta(days=sp.initial_promise_days + extra_days)
-
-                if due_date > now:
-                    upcoming_deadlines.append({
-                        "step_title": sp.educational_step.title,
-                        "due_date": due_date,
-                        "days_left": (due_date - now).days,
-                    })
-
-            upcoming_deadlines.sort(key=lambda x: x["due_date"])
-            context["upcoming_deadlines"] = upcoming_deadlines[:5]
+            upcoming_deadlines = [
+                {
+                    "step_title": sp.educational_step.title,
+                    "due_date": sp.due_at,
+                    "days_left": (sp.due_at - now).days,
+                }
+                for sp in step_progresses.upcoming(now, limit=5)
+            ]
 
             # ✅ Recent submissions
             recent_submissions = (
@@ -119,9 +119,27 @@ class LearnerDashboardView(LoginRequiredMixin, TemplateView):
         return context
     
 
-class StepListView(LoginRequiredMixin, ListView):
+class StepListView(CachedContextMixin, LoginRequiredMixin, ListView):
     template_name = "courses/step_list.html"
     context_object_name = "steps"
+    # progress/unlock state changes bump the enrollment key (EnrollmentProgressManager)
+    cache_depends_on = (EducationalStep, Task)
+
+    def get_cache_dependencies(self):
+        return [object_key(LearnerEnrollment, self.enrollment.pk)]
+
+    def get_cached_context(self):
+        qs = (
+            EducationalStep.objects
+            .with_progress(self.enrollment)
+            .with_unlock_state(self.enrollment)
+            .ordered()
+        )
+
+        steps = list(qs)
+        for s in steps:
+            s.percentile = s.get_percentile()
+        return {"steps": steps}
 
     def get_queryset(self):
         self.enrollment = get_object_or_404(
@@ -129,12 +147,7 @@ class StepListView(LoginRequiredMixin, ListView):
             id=self.kwargs["pk"],
             learner__user=self.request.user,
         )
-        qs = EducationalStep.objects.with_progress(self.enrollment).ordered()
-
-        for s in qs:
-            s.percentile = s.get_percentile()
-            s.can_start = s.can_start(self.enrollment)
-        return qs
+        return self.cached_context()["steps"]
     
     def dispatch(self, request, *args, **kwargs):
         if not hasattr(request.user, "learner_profile"):
@@ -169,13 +182,6 @@ class TaskListView(LoginRequiredMixin, ListView):
                 educational_step_id=step_id,
                 mentor_assignment__enrollment__learner=learner,
             )
-            .annotate(
-                total_extension_days=Sum(
-                    "extensions__extended_by_days",
-                    filter=Q(extensions__approved_by_mentor=True),
-                    default=0,
-                )
-            )
             .select_related("educational_step")
             .first()
         )
@@ -290,9 +296,7 @@ class TaskListView(LoginRequiredMixin, ListView):
         if getattr(self, "step_progress", None):
             sp = self.step_progress
             step_progress_id = sp.id
-            due_date = sp.initial_promise_date + timedelta(
-                days=sp.initial_promise_days + (sp.total_extension_days or 0)
-            )
+            due_date = sp.due_at
 
         ctx.update(
             {
@@ -437,28 +441,13 @@ class ProfileView(LoginRequiredMixin, View):
             profile_user = user.learner_profile
             context["profile_user"] = profile_user
 
-            enrollments = (
-                profile_user.enrollments
-                .select_related("learning_path")
-                .annotate(
-                    total=Count("learning_path__steps", distinct=True),
-                    done=Count(
-                        "learning_path__steps__step_progresses",
-                        filter=Q(
-                            learning_path__steps__step_progresses__task_completion_date__isnull=False
-                        ),
-                        distinct=True,
-                    ),
-                    last_done=Max(
-                        "learning_path__steps__step_progresses__task_completion_date"
-                    )
-                )
-            )
+            enrollments = profile_user.enrollments.select_related("learning_path", "progress")
 
             ongoing, completed = [], []
 
             for e in enrollments:
-                p = round((e.done / e.total * 100)) if e.total else 0
+                progress = EnrollmentProgress.objects.for_enrollment(e)
+                p = progress.percent
                 p_offset = 100 - p
 
                 row = {
@@ -466,7 +455,7 @@ class ProfileView(LoginRequiredMixin, View):
                     "status": e.status,
                     "progress": p,
                     "progress_offset": p_offset,
-                    "completed_date": e.last_done or e.unenroll_date,
+                    "completed_date": progress.last_completed_at or e.unenroll_date,
                     "enrollment": e.id,
                 }
 
@@ -523,10 +512,6 @@ class LearningPathView(LoginRequiredMixin, DetailView):
             .prefetch_related(
                 Prefetch("mentor_assignments",
                          queryset=MentorAssignment.objects.select_related("mentor__user")),
-                Prefetch("subscriptions",
-                         queryset=LearnerSubscribePlan.objects
-                         .select_related("subscription_plan")
-                         .order_by("-end_datetime"))
             ),
             pk=self.kwargs["pk"],
             learner=learner
@@ -538,15 +523,21 @@ class LearningPathView(LoginRequiredMixin, DetailView):
         now = timezone.now()
 
         ma = e.mentor_assignments.first()
-        sub = e.subscriptions.first()
-        
+        # latest-ending plan, one index range read on (learner_enrollment, effective_end_datetime)
+        sub = (
+            LearnerSubscribePlan.objects.filter(learner_enrollment=e)
+            .select_related("subscription_plan")
+            .order_by("-effective_end_datetime")
+            .first()
+        )
+
 
         ctx.update({
             "mentor": ma.mentor.user.get_full_name() if ma else "-",
             "mentor_assignment": ma,
             "plan": sub.subscription_plan.name if sub else "-",
-            "plan_expires": sub.end_datetime if sub else None,
-            "days_remaining": max((sub.end_datetime - now).days, 0) if sub else None,
+            "plan_expires": sub.effective_end_datetime if sub else None,
+            "days_remaining": sub.days_remaining(now) if sub else None,
             "upcoming_sessions": MentorGroupSessionOccurrence.objects.filter(
                 mentor_group_session__mentor=ma.mentor if ma else None,
                 occurence_datetime__gte=now,
@@ -690,11 +681,9 @@ class MentorFeedbackListView(LoginRequiredMixin, ListView):
         # ---------------------
         q = self.request.GET.get("q")
         if q:
-            qs = qs.filter(
-                Q(task__title__icontains=q) |
-                Q(step_progress__mentor_assignment__enrollment__learner__user__first_name__icontains=q) |
-                Q(step_progress__mentor_assignment__enrollment__learner__user__last_name__icontains=q)
-            )
+            qs = qs.filter(search_q(
+                q, task="task_id", learner="step_progress__mentor_assignment__enrollment__learner_id",
+            ))
 
         # ---------------------
         # FILTERS
@@ -737,28 +726,10 @@ class MentorFeedbackListView(LoginRequiredMixin, ListView):
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
 
-        mentor = self.mentor
-        pending_count = (
-            TaskSubmission.objects
-            .filter(step_progress__mentor_assignment__mentor=mentor)
-            .annotate(
-                has_eval=Exists(
-                    TaskEvaluation.objects.filter(
-                        submission=OuterRef("pk"), mentor=mentor
-                    )
-                )
-            )
-            .filter(has_eval=False)
-            .count()
-        )
-        ctx["pending_count"] = pending_count
-
-        ctx["learners"] = (
-            Learner.objects
-            .filter(enrollments__mentor_assignments__mentor=self.mentor)
-            .select_related("user")
-            .distinct()
-        )
+        # ✅ HTMX filter requests only re-render the table; the page query is all they need
+        if not self.request.headers.get("HX-Request"):
+            ctx["pending_count"] = mentor_pending_count(self.mentor.pk)
+            ctx["learners"] = mentor_learner_options(self.mentor.pk)
 
         return ctx
     
@@ -895,15 +866,11 @@ class MentorLearnersView(LoginRequiredMixin, UserPassesTestMixin, ListView):
             qs = qs.filter(enrollment__learner__status="inactive")
 
         if search:
-            qs = qs.filter(
-                Q(enrollment__learner__user__first_name__icontains=search)
-                | Q(enrollment__learner__user__last_name__icontains=search)
-            )
+            qs = qs.filter(search_q(search, learner="enrollment__learner_id"))
 
-        active_plan = LearnerSubscribePlan.objects.filter(
+        active_plan = LearnerSubscribePlan.objects.current().filter(
             learner_enrollment=OuterRef("enrollment"),
-            status="active",
-        ).order_by("-start_datetime")
+        ).order_by("-effective_end_datetime")
 
         qs = qs.annotate(
             plan_name=Subquery(active_plan.values("subscription_plan__name")[:1])
@@ -927,6 +894,7 @@ class SessionListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
     """ Shows a list of upcoming and past sessions for a mentor """
     template_name = "courses/mentor/session_list.html"
     context_object_name = "sessions"
+    paginate_by = 25
 
     def test_func(self):
         return hasattr(self.request.user, "mentor_profile")
@@ -936,188 +904,28 @@ class SessionListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
         now = timezone.now()
 
         mode = self.request.GET.get("range", "upcoming")  # past/upcoming
-        search = self.request.GET.get("search", "").strip().lower()
+        search = self.request.GET.get("search", "").strip()
         sort = self.request.GET.get("sort", "")
 
-        # ---------------------------------------------------------
-        # UPCOMING SESSIONS (Recurring)
-        # ---------------------------------------------------------
-        if mode == "upcoming":
-            sessions = []
-
-            # ---------------------------------------------------------
-            # RECURRING GROUP SESSIONS (MentorGroupSession)
-            # ---------------------------------------------------------
-            for g in MentorGroupSession.objects.filter(mentor=mentor).select_related(
-                "learning_path", "session_type"
-            ):
-                today_weekday = now.isoweekday()
-                session_weekday = int(g.suppused_day)
-
-                delta_days = (session_weekday - today_weekday) % 7
-                next_date = (now + timedelta(days=delta_days)).date()
-
-                next_dt = datetime.combine(next_date, g.suppoused_time)
-                next_dt = timezone.make_aware(next_dt)
-
-                if next_dt >= now:
-                    sessions.append({
-                        "type": "group",
-                        "datetime": next_dt,
-                        "session": g,
-                        "learning_path": g.learning_path,
-                        "session_type": g.session_type,
-                        "learner": None,
-                    })
-
-            # ---------------------------------------------------------
-            # RECURRING CODE REVIEW SESSIONS (MentorAssignment)
-            # ---------------------------------------------------------
-            for a in MentorAssignment.objects.filter(mentor=mentor).select_related(
-                "enrollment__learner__user",
-                "enrollment__learning_path",
-            ):
-                # pick most recent StepProgress for this learner's current step
-                step_progress = (
-                    a.step_progresses
-                        .select_related("educational_step")
-                        .order_by("-initial_promise_date")
-                        .first()
-                )
-
-                today_weekday = now.isoweekday()
-                session_weekday = int(a.code_review_session_day)
-
-                delta_days = (session_weekday - today_weekday) % 7
-                next_date = (now + timedelta(days=delta_days)).date()
-
-                next_dt = datetime.combine(next_date, a.code_review_session_time)
-                next_dt = timezone.make_aware(next_dt)
-
-                if next_dt >= now:
-                    sessions.append({
-                        "type": "code_review",
-                        "datetime": next_dt,
-                        "assignment": a,
-                        "learning_path": a.enrollment.learning_path,
-                        "learner": a.enrollment.learner,
-                        "step_progress": step_progress,
-                        "session_type": None,
-                    })
+        # ✅ Past: one UNION query per page (search/sort/paginate in the DB)
+        if mode != "upcoming":
+            return PastSessions(mentor, now=now, search=search, sort=sort)
 
-            # Sort ascending
-            sessions.sort(key=lambda x: x["datetime"])
-
-        # ---------------------------------------------------------
-        # PAST SESSIONS (Actual Occurrences)
-        # ---------------------------------------------------------
-        else:
-            sessions = []
-
-            # Past group occurrences
-            group_occ = MentorGroupSessionOccurrence.objects.filter(
-                mentor_group_session__mentor=mentor,
-                occurence_datetime__lt=now,
-            ).select_related(
-                "mentor_group_session",
-                "mentor_group_session__learning_path",
-                "mentor_group_session__session_type",
-            )
-
-            for occ in group_occ:
-                sessions.append({
-                    "type": "group_occurrence",
-                    "datetime": occ.occurence_datetime,
-                    "occurrence": occ,
-                    "learning_path": occ.mentor_group_session.learning_path,
-                    "session_type": occ.mentor_group_session.session_type,
-                    "learner": None,
-                })
-
-            # Past 1:1 step sessions
-            step_occ = StepProgressSession.objects.filter(
-                step_progress__mentor_assignment__mentor=mentor,
-                datetime__lt=now,
-            ).select_related(
-                "session_type",
-                "step_progress",
-                "step_progress__mentor_assignment__enrollment__learner__user",
-                "step_progress__mentor_assignment__enrollment__learning_path",
-            )
-
-            for sess in step_occ:
-                sessions.append({
-                    "type": "step_session",
-                    "datetime": sess.datetime,
-                    "session": sess,
-                    "learning_path": sess.step_progress.mentor_assignment.enrollment.learning_path,
-                    "learner": sess.step_progress.mentor_assignment.enrollment.learner,
-                    "session_type": sess.session_type,
-                })
-
-            # Sort descending
-            sessions.sort(key=lambda x: x["datetime"], reverse=True)
-
-        # ---------------------------------------------------------
-        # SEARCH FILTER
-        # ---------------------------------------------------------
-        if search:
-            sessions = [
-                s for s in sessions
-                if (
-                    s.get("learner")
-                    and (
-                        search in s["learner"].user.first_name.lower()
-                        or search in s["learner"].user.last_name.lower()
-                    )
-                )
-                or (
-                    s.get("learning_path")
-                    and search in s["learning_path"].name.lower()
-                )
-                or (
-                    s.get("session_type")
-                    and search in s["session_type"].name_fa.lower()
-                )
-                or (
-                    s["type"] == "code_review" and "code" in search
-                )
-                or (
-                    s["type"] == "group" and "group" in search
-                )
-            ]
-
-        # ---------------------------------------------------------
-        # SORTING
-        # --------------------------------------------------------- 
-        def session_title(s):
-            if s["type"] == "group":
-                return f"{s['session'].session_type.name_fa} {s['learning_path'].name}".lower()
-            if s["type"] == "code_review":
-                return f"code review {s['learner'].user.get_full_name()}".lower()
-            if s["type"] == "group_occurrence":
-                return f"{s['session_type'].name_fa} {s['learning_path'].name}".lower()
-            if s["type"] == "step_session":
-                return f"step session {s['learner'].user.get_full_name()}".lower()
-            return ""
-
-        if sort == "oldest":
-            sessions.sort(key=lambda s: s["datetime"])
-        elif sort == "title_asc":
-            sessions.sort(key=lambda s: session_title(s))
-        elif sort == "title_desc":
-            sessions.sort(key=lambda s: session_title(s), reverse=True)
-        else:
-            # sort newest (default)
-            sessions.sort(key=lambda s: s["datetime"], reverse=True)
-
-        return sessions
+        # ✅ Upcoming: weekly rules expanded for the next N weeks
+        try:
+            weeks = min(max(int(self.request.GET.get("weeks", 1)), 1), 12)
+        except ValueError:
+            weeks = 1
+        return sort_sessions(upcoming_sessions(mentor, now=now, weeks=weeks, search=search), sort)
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         ctx["range"] = self.request.GET.get("range", "upcoming")
         ctx["search"] = self.request.GET.get("search", "")
         ctx["sort"] = self.request.GET.get("sort", "")
+        params = self.request.GET.copy()
+        params.pop("page", None)
+        ctx["querystring"] = params.urlencode()
         return ctx
     
 
@@ -1184,31 +992,27 @@ class GroupSessionAttendanceView(TemplateView, LoginRequiredMixin):
         else:
             dt = self.get_initial_occurrence_datetime()
 
-        # Create occurrence
-        occurrence = MentorGroupSessionOccurrence.objects.create(
-            mentor_group_session=self.group_session,
-            occurence_datetime=dt,
-            occurence_datetime_changed=time_changed,
-            new_datetime=dt if time_changed else None,
-            session_video_record=request.POST.get("session-recording-link"),
-        )
-
-        # ---------------------------------------------------------
-        # Create GroupSessionParticipants inside POST
-        # ---------------------------------------------------------
-        learner_assignments = MentorAssignment.objects.filter(
+        learner_assignments = list(MentorAssignment.objects.filter(
             enrollment__learning_path=self.group_session.learning_path,
             mentor=request.user.mentor_profile
-        )
-
-        for assignment in learner_assignments:
-            present = request.POST.get(f"presence-{assignment.id}") == "on"
-
-            MentorGroupSessionParticipant.objects.create(
-                mentor_group_session_occurence=occurrence,
-                mentor_assignment=assignment,
-                learner_was_present=present,
+        ).select_related("enrollment__learner"))
+        present_ids = {a.id for a in learner_assignments if request.POST.get(f"presence-{a.id}") == "on"}
+
+        # ✅ Occurrence + every participant row in one transaction (single bulk INSERT)
+        with transaction.atomic():
+            occurrence = MentorGroupSessionOccurrence.objects.create(
+                mentor_group_session=self.group_session,
+                occurence_datetime=dt,
+                occurence_datetime_changed=time_changed,
+                new_datetime=dt if time_changed else None,
+                session_video_record=request.POST.get("session-recording-link"),
             )
+            participants = MentorGroupSessionParticipant.objects.record_attendance(
+                occurrence, learner_assignments, present_ids
+            )
+
+        # ✅ Absence notifications: one batched insert + one fan-out
+        notify_learners_absent(participants)
 
         # Redirect back to same page
         messages.success(request, "جلسه برگذار شده با موفقیت اضافه شد")
@@ -1361,7 +1165,6 @@ class LearnerAttendanceHistoryView(LoginRequiredMixin, ListView):
     template_name = "courses/mentor/learner_attendance_history.html"
     partial_template_name = "courses/partials/learner_attend_history_table.html"
     context_object_name = "records"
-    paginate_by = 30 
 
     def dispatch(self, request, *args, **kwargs):
         user = request.user
@@ -1392,97 +1195,23 @@ class LearnerAttendanceHistoryView(LoginRequiredMixin, ListView):
         return super().dispatch(request, *args, **kwargs)
 
     def get_queryset(self):
-        presence_filter = self.request.GET.get("presence")   # present | absent
-        session_type_filter = self.request.GET.get("type")   # group | private
-
-        # ---------------------------------------------------------
-        # 1) GROUP SESSIONS
-        # ---------------------------------------------------------
-        group_qs = (
-            MentorGroupSessionParticipant.objects
-            .filter(
-                mentor_assignment__mentor=self.mentor,
-                mentor_assignment__enrollment__learner_id=self.learner_id,
-            )
-            .select_related(
-                "mentor_group_session_occurence",
-                "mentor_group_session_occurence__mentor_group_session",
-                "mentor_group_session_occurence__mentor_group_session__session_type",
-            )
+        # ✅ One UNION query per page, keyset-paginated on datetime (see courses/attendance.py)
+        records, self.next_cursor = attendance_timeline(
+            self.mentor,
+            self.learner_id,
+            presence=self.request.GET.get("presence"),   # present | absent
+            kind=self.request.GET.get("type"),           # group | private
+            cursor=self.request.GET.get("before"),
         )
-
-        if presence_filter in ("present", "absent"):
-            group_qs = group_qs.filter(
-                learner_was_present=(presence_filter == "present")
-            )
-
-        group_records = []
-        for p in group_qs:
-            occ = p.mentor_group_session_occurence
-            sess = occ.mentor_group_session
-
-            dt = occ.new_datetime if occ.occurence_datetime_changed else occ.occurence_datetime
-
-            group_records.append({
-                "datetime": dt,
-                "present": p.learner_was_present,
-                "type": "group",
-                "session_name": sess.session_type.name_fa,
-                "source": p,
-            })
-
-        # ---------------------------------------------------------
-        # 2) PRIVATE / CODE REVIEW SESSIONS
-        # ---------------------------------------------------------
-        private_qs = (
-            StepProgressSession.objects
-            .filter(
-                step_progress__mentor_assignment__mentor=self.mentor,
-                step_progress__mentor_assignment__enrollment__learner_id=self.learner_id,
-            )
-            .select_related(
-                "session_type",
-                "step_progress",
-                "step_progress__educational_step",
-            )
-        )
-
-        if presence_filter in ("present", "absent"):
-            private_qs = private_qs.filter(
-                present=(presence_filter == "present")
-            )
-
-        private_records = []
-        for s in private_qs:
-            private_records.append({
-                "datetime": s.datetime,
-                "present": s.present,
-                "type": "private",
-                "session_name": s.session_type.get_code_display(),
-                "source": s,
-            })
-
-        # ---------------------------------------------------------
-        # MERGE BOTH LISTS
-        # ---------------------------------------------------------
-        combined = group_records + private_records
-
-        # Filter by session type (optional)
-        if session_type_filter == "group":
-            combined = [r for r in combined if r["type"] == "group"]
-        elif session_type_filter == "private":
-            combined = [r for r in combined if r["type"] == "private"]
-
-        # Sort descending by datetime
-        combined.sort(key=lambda r: r["datetime"], reverse=True)
-
-        return combined
+        return records
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         ctx["learner"] = self.learner
         ctx["presence_filter"] = self.request.GET.get("presence", "")
         ctx["session_type_filter"] = self.request.GET.get("type", "")
+        ctx["next_cursor"] = self.next_cursor
+        ctx["is_first_page"] = not self.request.GET.get("before")
         return ctx
     
     def render_to_response(self, context, **response_kwargs):
@@ -1495,11 +1224,15 @@ class LearnerAttendanceHistoryView(LoginRequiredMixin, ListView):
         return super().render_to_response(context, **response_kwargs)
     
 
-class GroupSessionHistoryView(LoginRequiredMixin, DetailView):
+class GroupSessionHistoryView(CachedContextMixin, LoginRequiredMixin, DetailView):
     """Show attendance list for a single group session occurrence."""
     model = MentorGroupSessionOccurrence
     context_object_name = "occurrence"
     template_name = "courses/mentor/group_session_history.html"
+    cache_depends_on = (
+        MentorGroupSessionParticipant,
+        (CustomUser, {"first_name", "last_name", "email", "image"}),
+    )
 
     def get_queryset(self):
         # Preload everything needed by the template
@@ -1526,14 +1259,10 @@ class GroupSessionHistoryView(LoginRequiredMixin, DetailView):
 
         return super().dispatch(request, *args, **kwargs)
 
-    def get_context_data(self, **kwargs):
-        ctx = super().get_context_data(**kwargs)
-
-        occurrence = self.object
-
+    def get_cached_context(self):
         participants = (
             MentorGroupSessionParticipant.objects
-            .filter(mentor_group_session_occurence=occurrence)
+            .filter(mentor_group_session_occurence=self.object)
             .select_related(
                 "mentor_assignment",
                 "mentor_assignment__enrollment",
@@ -1542,5 +1271,4 @@ class GroupSessionHistoryView(LoginRequiredMixin, DetailView):
             )
         )
 
-        ctx["participants"] = participants
-        return ctx
\ No newline at end of file
+        return {"participants": list(participants)}
\ No newline at end of file
@@ -0,0 +1,38 @@
+"""
+Per-user unread counter and latest-N list, kept in Django's cache.
+
+Entries are dropped (after commit) whenever a user's notifications change:
+post_save/post_delete, ``create_batch`` and ``mark_notifications_as_read``.
+The next read rebuilds them with two small indexed queries.
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+
+LATEST_N = 8
+TIMEOUT = 300
+
+
+def _key(user_id):
+    return f"notifications:unread:{user_id}"
+
+
+def unread_summary(user_id):
+    """Return ``{"count": int, "latest": [{"id", "title", "created_at"}, ...]}``."""
+    summary = cache.get(_key(user_id))
+    if summary is None:
+        from .models import Notification
+
+        unread = Notification.objects.filter(user_id=user_id, is_read=False)
+        summary = {
+            "count": unread.count(),
+            "latest": list(unread.order_by("-created_at").values("id", "title", "created_at")[:LATEST_N]),
+        }
+        cache.set(_key(user_id), summary, TIMEOUT)
+    return summary
+
+
+def invalidate_unread(user_ids):
+    keys = [_key(uid) for uid in set(user_ids)]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
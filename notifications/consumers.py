@@ -1,35 +1,36 @@
-from channels.generic.websocket import WebsocketConsumer
-from asgiref.sync import async_to_sync
+from channels.generic.websocket import AsyncWebsocketConsumer
 from django.contrib.auth.models import AnonymousUser
 from django.template.loader import get_template
 
 GROUP_NAME_TEMPLATE = "notifications_user_{user_id}"
 
 
-class NotificationConsumer(WebsocketConsumer):
-    def connect(self):
+class NotificationConsumer(AsyncWebsocketConsumer):
+    group_name = None
+
+    async def connect(self):
         user = self.scope.get("user", None)
         if user is None or isinstance(user, AnonymousUser) or not user.is_authenticated:
             # Reject anonymous
-            self.close(code=4401)  # unauthorized
+            await self.close(code=4401)  # unauthorized
             return
         self.user = user
         self.group_name = GROUP_NAME_TEMPLATE.format(user_id=self.user.pk)
 
         # add to group
-        async_to_sync(self.channel_layer.group_add)(
-            self.group_name, self.channel_name
-        )
-        self.accept()
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
 
-    def disconnect(self, close_code):
-        if self.user or self.user.is_authenticated:
-            async_to_sync(self.channel_layer.group_discard)(
-                self.group_name, self.channel_name
-            )
+    async def disconnect(self, close_code):
+        if self.group_name:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
 
-    def notification_created(self, event):
-        html = get_template("notifications/notification_partial.html").render(
-            context={"message": event["text"]}
-        )
-        self.send(text_data=html)
\ No newline at end of file
+    async def notification_created(self, event):
+        # The sender (notifications.signals.push_internal) renders the fragment once;
+        # the fallback only covers events from older senders.
+        html = event.get("html")
+        if html is None:
+            html = get_template("notifications/notification_partial.html").render(
+                context={"message": event["text"]}
+            )
+        await self.send(text_data=html)
@@ -1,16 +1,22 @@
-from .models import Notification
-from asgiref.sync import sync_to_async, async_to_sync
+from .cache import unread_summary
+
 
 def unread_notifs(request):
+    """
+    Lazy values: templates call them only when they render the bell, so pages
+    without it cost nothing, and the cached summary is read at most once.
+    """
     if request.user.is_authenticated:
-        get_notifs_sync = lambda: list(
-            Notification.objects.filter(
-                user=request.user,
-                is_read=False
-            ).order_by('-created_at')[:8]
-        )
-        notifs = async_to_sync(sync_to_async(get_notifs_sync))()
-        notif_count = len(notifs)
+        user_id = request.user.pk
+        memo = {}
+
+        def summary():
+            if "value" not in memo:
+                memo["value"] = unread_summary(user_id)
+            return memo["value"]
 
-        return {"unread_notifs": notifs, "notif_count": notif_count}
-    return {}
\ No newline at end of file
+        return {
+            "unread_notifs": lambda: summary()["latest"],
+            "notif_count": lambda: summary()["count"],
+        }
+    return {}
@@ -0,0 +1,205 @@
+"""
+Channel layer that fans out across worker processes on one host, without Redis.
+
+Each process keeps its groups and queues in memory (``InMemoryChannelLayer``) and
+binds a Unix datagram socket ``<path>/<peer>.sock``. ``group_send`` delivers
+locally and sends one datagram to every other peer socket in the directory; each
+peer then delivers to its own group members. Process-specific channel names carry
+the peer id, so ``send`` to a consumer living in another worker goes straight to
+that worker's socket.
+
+Select it with ``CHANNEL_LAYER=unix`` in the environment (config/settings.py), which
+sets::
+
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "notifications.layers.UnixSocketChannelLayer",
+            "CONFIG": {"path": "/tmp/neurobit-channels"},
+        }
+    }
+
+All workers must share ``path`` (same host, same user). Sockets of dead workers
+are removed by the first sender that gets ``ECONNREFUSED``. AF_UNIX datagrams make it
+POSIX only.
+
+Limits:
+
+* ``group_send`` sends one datagram to *every* peer socket, whether or not that
+  worker has members in the group, so its cost grows with the number of workers.
+* Messages that pack to more than 200 KB (``MAX_DATAGRAM``) are dropped with only a
+  warning in the log; so are datagrams to a peer whose socket buffer is full
+  (counted in ``dropped``). Delivery is best effort, like a full channel.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import logging
+import os
+import random
+import socket
+import string
+import time
+
+import msgpack
+from channels.layers import InMemoryChannelLayer
+
+log = logging.getLogger(__name__)
+
+# Default SO_SNDBUF-sized datagrams on Linux; larger messages are dropped with a warning.
+MAX_DATAGRAM = 200 * 1024
+
+
+class _PeerProtocol(asyncio.DatagramProtocol):
+    def __init__(self, layer: "UnixSocketChannelLayer"):
+        self.layer = layer
+
+    def datagram_received(self, data, addr):
+        try:
+            kind, target, message = msgpack.unpackb(data)
+        except Exception:  # pragma: no cover - garbage on our socket
+            log.warning("Dropping undecodable channel datagram from %s", addr)
+            return
+        asyncio.ensure_future(self.layer._deliver_local(kind, target, message))
+
+
+class UnixSocketChannelLayer(InMemoryChannelLayer):
+    def __init__(self, path="/tmp/neurobit-channels", peer_refresh=1.0, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.peer_refresh = peer_refresh
+        self.peer_id = f"{os.getpid()}x{''.join(random.choices(string.ascii_lowercase, k=6))}"
+        self.socket_path = os.path.join(path, f"{self.peer_id}.sock")
+        self._transport = None
+        self._listen_lock = None
+        self._peers: list[str] = []
+        self._peers_at = 0.0
+        self._cleaned_at = 0.0
+        # Non-blocking send socket: a full peer buffer drops the datagram instead of
+        # stalling the event loop. Needs no loop, so sync callers (async_to_sync from
+        # signals, management commands) use it the same way.
+        self._out = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._out.setblocking(False)
+        self.dropped = 0
+
+    # ---- peer socket -------------------------------------------------------
+
+    async def _listen(self):
+        """Bind our socket on the running loop the first time we need to receive."""
+        if self._transport is not None and not self._transport.is_closing():
+            return
+        if self._listen_lock is None:
+            self._listen_lock = asyncio.Lock()
+        async with self._listen_lock:
+            if self._transport is not None and not self._transport.is_closing():
+                return
+            os.makedirs(self.path, mode=0o700, exist_ok=True)
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            loop = asyncio.get_running_loop()
+            self._transport, _ = await loop.create_datagram_endpoint(
+                lambda: _PeerProtocol(self), local_addr=self.socket_path, family=socket.AF_UNIX,
+            )
+            self._peers_at = 0.0
+            atexit.register(self._unlink)
+
+    def _other_peers(self) -> list[str]:
+        now = time.monotonic()
+        if now - self._peers_at > self.peer_refresh:
+            try:
+                names = os.listdir(self.path)
+            except FileNotFoundError:
+                names = []
+            self._peers = [n[:-5] for n in names if n.endswith(".sock") and n[:-5] != self.peer_id]
+            self._peers_at = now
+        return self._peers
+
+    def _send_to_peer(self, peer: str, kind: str, target: str, message: dict) -> None:
+        data = msgpack.packb((kind, target, message), use_bin_type=True)
+        if len(data) > MAX_DATAGRAM:
+            log.warning("Channel message for %s too large (%s bytes); dropped.", target, len(data))
+            return
+        try:
+            self._out.sendto(data, os.path.join(self.path, f"{peer}.sock"))
+        except BlockingIOError:
+            # Peer is not draining its socket; treat it like a full channel.
+            self.dropped += 1
+            log.debug("Channel datagram to %s dropped; peer buffer full (%s dropped so far).", peer, self.dropped)
+        except (ConnectionRefusedError, FileNotFoundError):
+            # Worker is gone; forget its socket.
+            try:
+                os.unlink(os.path.join(self.path, f"{peer}.sock"))
+            except FileNotFoundError:
+                pass
+            self._peers_at = 0.0
+        except OSError as e:
+            log.warning("Channel datagram to %s failed: %s", peer, e)
+
+    async def _deliver_local(self, kind, target, message):
+        try:
+            if kind == "group":
+                await super().group_send(target, message)
+            else:
+                await super().send(target, message)
+        except Exception as e:  # ChannelFull etc.; same as a local send would drop
+            log.debug("Local delivery to %s failed: %s", target, e)
+
+    def _clean_expired(self):
+        # The parent walks every queue and group on *each* receive(), which is
+        # quadratic with thousands of open sockets. Expiry is in seconds anyway.
+        now = time.monotonic()
+        if now - self._cleaned_at >= 1.0:
+            self._cleaned_at = now
+            super()._clean_expired()
+
+    # ---- channel layer API -------------------------------------------------
+
+    async def new_channel(self, prefix="specific."):
+        await self._listen()
+        return "%s.%s!%s" % (
+            prefix,
+            self.peer_id,
+            "".join(random.choice(string.ascii_letters) for i in range(12)),
+        )
+
+    @staticmethod
+    def _peer_of(channel: str):
+        if "!" not in channel:
+            return None
+        return channel.split("!", 1)[0].rsplit(".", 1)[-1]
+
+    async def send(self, channel, message):
+        peer = self._peer_of(channel)
+        if peer is None or peer == self.peer_id:
+            return await super().send(channel, message)
+        self.require_valid_channel_name(channel)
+        self._send_to_peer(peer, "send", channel, message)
+
+    async def receive(self, channel):
+        await self._listen()
+        return await super().receive(channel)
+
+    async def group_add(self, group, channel):
+        await self._listen()
+        await super().group_add(group, channel)
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), "message is not a dict"
+        self.require_valid_group_name(group)
+        if self.groups.get(group):
+            await super().group_send(group, message)
+        for peer in self._other_peers():
+            self._send_to_peer(peer, "group", group, message)
+
+    def _unlink(self):
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+    async def close(self):
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+        self._unlink()
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing as mp
+import shutil
+import statistics
+import tempfile
+import time
+
+from channels.layers import InMemoryChannelLayer
+from django.core.management.base import BaseCommand
+
+from notifications.layers import UnixSocketChannelLayer
+
+"""
+Benchmark the notification channel layers.
+
+  1. Throughput (one process): group_send N messages spread over G groups and
+     receive them all, for InMemoryChannelLayer and UnixSocketChannelLayer.
+  2. Fan-out latency (UnixSocketChannelLayer only, since the in-memory layer
+     cannot cross processes): W worker processes each join one group, the parent
+     broadcasts N messages, workers report send->receive latency.
+
+Usage:
+  python manage.py bench_channel_layer --messages 5000 --groups 100 --workers 4
+"""
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def _throughput(layer, messages, groups):
+    channels = []
+    for g in range(groups):
+        ch = await layer.new_channel()
+        await layer.group_add(f"bench_{g}", ch)
+        channels.append(ch)
+
+    start = time.perf_counter()
+    received = 0
+    per_round = groups
+    for i in range(0, messages, per_round):
+        n = min(per_round, messages - i)
+        for g in range(n):
+            await layer.group_send(f"bench_{g}", {"type": "bench", "i": i + g})
+        for g in range(n):
+            await layer.receive(channels[g])
+            received += 1
+    elapsed = time.perf_counter() - start
+    await layer.flush()
+    await layer.close()
+    return received / elapsed if elapsed else 0.0
+
+
+def _worker(path, messages, ready, results):
+    async def run():
+        layer = UnixSocketChannelLayer(path=path, capacity=messages + 10)
+        ch = await layer.new_channel()
+        await layer.group_add("bench_fanout", ch)
+        ready.set()
+        latencies = []
+        while len(latencies) < messages:
+            try:
+                msg = await asyncio.wait_for(layer.receive(ch), timeout=10)
+            except asyncio.TimeoutError:
+                break
+            latencies.append(time.time() - msg["ts"])
+        await layer.close()
+        results.put(latencies)
+
+    asyncio.run(run())
+
+
+class Command(BaseCommand):
+    help = "Measure channel layer throughput and cross-process fan-out latency."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=5000)
+        parser.add_argument("--groups", type=int, default=100)
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--rate", type=float, default=0, help="Broadcasts per second for fan-out (0 = as fast as possible).")
+
+    def handle(self, *args, **opts):
+        messages, groups = opts["messages"], opts["groups"]
+        path = tempfile.mkdtemp(prefix="bench-channels-")
+
+        for name, layer in (
+            ("InMemoryChannelLayer", InMemoryChannelLayer(capacity=messages)),
+            ("UnixSocketChannelLayer", UnixSocketChannelLayer(path=path, capacity=messages)),
+        ):
+            rate = asyncio.run(_throughput(layer, messages, groups))
+            self.stdout.write(f"{name:24} throughput: {rate:,.0f} msg/s ({messages} msgs, {groups} groups)")
+
+        try:
+            self.stdout.write(self._fanout(path, messages, opts["workers"], opts["rate"]))
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def _fanout(self, path, messages, workers, rate):
+        ctx = mp.get_context("fork")
+        results = ctx.Queue()
+        procs, events = [], []
+        for _ in range(workers):
+            ready = ctx.Event()
+            p = ctx.Process(target=_worker, args=(path, messages, ready, results))
+            p.start()
+            procs.append(p)
+            events.append(ready)
+        for ready in events:
+            ready.wait(10)
+
+        async def broadcast():
+            layer = UnixSocketChannelLayer(path=path, peer_refresh=0)
+            gap = 1.0 / rate if rate else 0
+            start = time.perf_counter()
+            for i in range(messages):
+                await layer.group_send("bench_fanout", {"type": "bench", "i": i, "ts": time.time()})
+                if gap:
+                    await asyncio.sleep(gap)
+                elif i % 100 == 0:
+                    await asyncio.sleep(0)  # let the kernel drain socket buffers
+            elapsed = time.perf_counter() - start
+            await layer.close()
+            return elapsed
+
+        elapsed = asyncio.run(broadcast())
+        latencies = []
+        for _ in procs:
+            latencies.extend(results.get(timeout=30))
+        for p in procs:
+            p.join(5)
+
+        delivered = len(latencies)
+        ms = [x * 1000 for x in latencies]
+        return self.style.SUCCESS(
+            f"UnixSocketChannelLayer fan-out: {workers} workers, {delivered}/{messages * workers} delivered, "
+            f"{messages / elapsed:,.0f} broadcasts/s; latency ms p50={statistics.median(ms) if ms else 0:.2f} "
+            f"p95={_percentile(ms, 95):.2f} p99={_percentile(ms, 99):.2f} max={max(ms) if ms else 0:.2f}"
+        )
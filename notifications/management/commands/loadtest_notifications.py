@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import asyncio
+import statistics
+import time
+from types import SimpleNamespace
+
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+
+from notifications.routing import websocket_urlpatterns
+from notifications.signals import PARTIAL_TEMPLATE
+
+"""
+Websocket load test for NotificationConsumer.
+
+Opens --connections in-process websocket connections (spread over --users user
+groups) against the real routing + consumer + configured channel layer, then
+broadcasts one notification to every user --rounds times and reports how long
+each socket took to receive it.
+
+--legacy drops the pre-rendered "html" from events so every socket renders the
+fragment itself (the old behaviour), for comparison.
+
+Usage:
+  python manage.py loadtest_notifications --connections 2000 --users 500 --rounds 5
+"""
+
+
+def _pct(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))] if values else 0.0
+
+
+class Command(BaseCommand):
+    help = "Open many websocket connections and measure notification broadcast latency."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--connections", type=int, default=2000)
+        parser.add_argument("--users", type=int, default=500)
+        parser.add_argument("--rounds", type=int, default=5)
+        parser.add_argument("--legacy", action="store_true", help="Send events without pre-rendered html.")
+
+    def handle(self, *args, **opts):
+        asyncio.run(self._run(opts))
+
+    async def _run(self, opts):
+        app = URLRouter(websocket_urlpatterns)
+        users = [SimpleNamespace(pk=900000 + i, is_authenticated=True) for i in range(opts["users"])]
+
+        start = time.perf_counter()
+        clients = []
+        for i in range(opts["connections"]):
+            comm = WebsocketCommunicator(app, "/ws/notifications/")
+            comm.scope["user"] = users[i % len(users)]
+            clients.append(comm)
+        results = await asyncio.gather(*(c.connect(timeout=30) for c in clients))
+        connected = sum(1 for ok, _ in results if ok)
+        self.stdout.write(f"Connected {connected}/{len(clients)} sockets in {time.perf_counter() - start:.2f}s")
+
+        layer = get_channel_layer()
+        latencies, rounds = [], []
+        for r in range(opts["rounds"]):
+            title = f"Load test {r}"
+            event = {"type": "notification_created", "text": title}
+            if not opts["legacy"]:
+                event["html"] = render_to_string(PARTIAL_TEMPLATE, {"message": title})
+
+            sent_at = time.perf_counter()
+
+            async def recv(comm):
+                await comm.receive_from(timeout=30)
+                return time.perf_counter() - sent_at
+
+            waiters = [asyncio.ensure_future(recv(c)) for c in clients]
+            for user in users:
+                await layer.group_send(f"notifications_user_{user.pk}", event)
+            got = await asyncio.gather(*waiters)
+            rounds.append(time.perf_counter() - sent_at)
+            latencies.extend(got)
+
+        await asyncio.gather(*(c.disconnect() for c in clients))
+
+        ms = [x * 1000 for x in latencies]
+        self.stdout.write(self.style.SUCCESS(
+            f"{'legacy' if opts['legacy'] else 'pre-rendered'}: {opts['rounds']} broadcasts to "
+            f"{len(users)} users / {len(clients)} sockets; round ms avg={statistics.mean(rounds) * 1000:.1f}; "
+            f"latency ms p50={statistics.median(ms):.1f} p95={_pct(ms, 95):.1f} p99={_pct(ms, 99):.1f}"
+        ))
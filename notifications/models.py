@@ -2,6 +2,8 @@ from django.conf import settings
 from django.db import models
 from django.utils import timezone
 
+from .cache import invalidate_unread
+
 class Event(models.TextChoices):
     OTHER = 'other', 'Other'
 
@@ -18,6 +20,28 @@ class Event(models.TextChoices):
     SUBSCRIPTION_FROZEN = 'subscription_frozen', 'Subscription frozen'
 
 
+class NotificationQuerySet(models.QuerySet):
+    def create_batch(self, notifications, batch_size=1000):
+        """
+        Insert notifications with bulk_create, skipping any whose (user, dedupe_key)
+        already exists. Returns the notifications that were new.
+        """
+        fresh, seen = [], set()
+        keys = {n.dedupe_key for n in notifications if n.dedupe_key}
+        if keys:
+            seen = set(self.filter(dedupe_key__in=keys).values_list("user_id", "dedupe_key"))
+        for n in notifications:
+            if n.dedupe_key:
+                if (n.user_id, n.dedupe_key) in seen:
+                    continue
+                seen.add((n.user_id, n.dedupe_key))
+            fresh.append(n)
+        # the unique constraint still guards against a concurrent run
+        self.bulk_create(fresh, batch_size=batch_size, ignore_conflicts=True)
+        invalidate_unread(n.user_id for n in fresh)
+        return fresh
+
+
 class Notification(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -32,6 +56,10 @@ class Notification(models.Model):
     event = models.CharField(max_length=50, choices=Event.choices, default=Event.OTHER)
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    # set by scheduled reminders so re-runs never notify the same user twice for the same thing
+    dedupe_key = models.CharField(max_length=100, blank=True, default="")
+
+    objects = NotificationQuerySet.as_manager()
 
     class Meta:
         ordering = ("-created_at",)
@@ -39,6 +67,13 @@ class Notification(models.Model):
             models.Index(fields=("user", "is_read", "created_at")),
             models.Index(fields=("user", "created_at")),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=("user", "dedupe_key"),
+                condition=~models.Q(dedupe_key=""),
+                name="notification_unique_dedupe_key",
+            ),
+        ]
 
     def mark_read(self):
         if not self.is_read:
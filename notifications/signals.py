@@ -1,17 +1,51 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
+from django.template.loader import render_to_string
 from .models import Notification
+from .cache import invalidate_unread
+
+PARTIAL_TEMPLATE = "notifications/notification_partial.html"
+
+
+def push_internal(notifications):
+    """
+    Send the websocket event for each internal notification.
+    Used directly for bulk-created rows, which never fire post_save.
+
+    The HTML fragment is rendered here, once per distinct title, and carried in
+    the event so consumers only forward it.
+    """
+    rendered = {}
+    events = []
+    for n in notifications:
+        if not n.send_internal:
+            continue
+        if n.title not in rendered:
+            rendered[n.title] = render_to_string(PARTIAL_TEMPLATE, {"message": n.title})
+        events.append((
+            f'notifications_user_{n.user_id}',
+            {"type": "notification_created", "text": n.title, "html": rendered[n.title]},
+        ))
+    if not events:
+        return
+    channel_layer = get_channel_layer()
+
+    async def send_all():
+        for group_name, event in events:
+            await channel_layer.group_send(group_name, event)
+
+    async_to_sync(send_all)()
 
 
 @receiver(post_save, sender=Notification)
 def notification_created(sender, instance, created, **kwargs):
-    if created and instance.send_internal:
-        channel_layer = get_channel_layer()
-        group_name = f'notifications_user_{instance.user.id}'
-        event = {
-            "type": "notification_created",
-            "text": instance.title
-        }
-        async_to_sync(channel_layer.group_send)(group_name, event)
\ No newline at end of file
+    invalidate_unread([instance.user_id])
+    if created:
+        push_internal([instance])
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted(sender, instance, **kwargs):
+    invalidate_unread([instance.user_id])
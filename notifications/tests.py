@@ -1,3 +1,44 @@
-from django.test import TestCase
+import asyncio
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from notifications.layers import UnixSocketChannelLayer
+
+
+class UnixSocketChannelLayerTests(SimpleTestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path, ignore_errors=True)
+
+    def test_group_send_reaches_other_peer(self):
+        async def run():
+            sender = UnixSocketChannelLayer(path=self.path, peer_refresh=0)
+            receiver = UnixSocketChannelLayer(path=self.path, peer_refresh=0)
+            try:
+                channel = await receiver.new_channel()
+                await receiver.group_add("learners", channel)
+                await sender.group_send("learners", {"type": "notify", "text": "hi"})
+                return await asyncio.wait_for(receiver.receive(channel), 1)
+            finally:
+                await sender.close()
+                await receiver.close()
+
+        self.assertEqual(asyncio.run(run()), {"type": "notify", "text": "hi"})
+
+    def test_full_peer_counts_drops_instead_of_blocking(self):
+        async def run():
+            sender = UnixSocketChannelLayer(path=self.path, peer_refresh=0)
+            receiver = UnixSocketChannelLayer(path=self.path, peer_refresh=0)
+            try:
+                await receiver.group_add("learners", await receiver.new_channel())
+                receiver._transport.pause_reading()
+                for _ in range(5000):
+                    await sender.group_send("learners", {"type": "notify", "text": "x" * 100})
+                return sender.dropped
+            finally:
+                await sender.close()
+                await receiver.close()
+
+        self.assertGreater(asyncio.run(run()), 0)
@@ -1,5 +1,6 @@
 from django.shortcuts import render
 from .models import Notification
+from .cache import invalidate_unread
 from django.views import View
 
 
@@ -7,6 +8,7 @@ def mark_notifications_as_read(request):
     if request.method == "POST":
         notifications = Notification.objects.filter(user=request.user, is_read=False)
         notifications.update(is_read=True)
+        invalidate_unread([request.user.pk])
         return render(request, 'notifications/clear_button.html')
     return render(request, 'notifications/clear_button.html')
 
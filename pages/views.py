@@ -3,37 +3,44 @@ from django.shortcuts import render, redirect
 from django.urls import reverse
 from django.views import generic
 
+from core.view_cache import CachedPageMixin
+
 from .models import Application
 
 IR_PHONE_REGEX = r'^(?:\+98|0)?9\d{9}$'
 ALLOWED_SOP_EXTENSIONS = ['pdf', 'docx']
 
 
-class HomeView(generic.TemplateView):
+class MarketingPageView(CachedPageMixin, generic.TemplateView):
+    # _base.html renders nothing per visitor, so one cached copy per language serves everyone
+    cache_public = True
+
+
+class HomeView(MarketingPageView):
     template_name = 'pages/home.html'
 
 
-class CoursesView(generic.TemplateView):
+class CoursesView(MarketingPageView):
     template_name = 'pages/learning_paths.html'
 
 
-class BackendCoursView(generic.TemplateView):
+class BackendCoursView(MarketingPageView):
     template_name = 'pages/learning_path_detail_backend.html'
 
 
-class FrontendCourseView(generic.TemplateView):
+class FrontendCourseView(MarketingPageView):
     template_name = 'pages/learning_path_detail_frontend.html'
 
 
-class AICourseView(generic.TemplateView):
+class AICourseView(MarketingPageView):
     template_name = 'pages/learning_path_detail_AI.html'
 
 
-class UIUXCourseView(generic.TemplateView):
+class UIUXCourseView(MarketingPageView):
     template_name = 'pages/learning_path_detail_UIUX.html'
 
 
-class GameDevCourseView(generic.TemplateView):
+class GameDevCourseView(MarketingPageView):
     template_name = 'pages/learning_path_detail_GameDevelopment.html'
 
 
@@ -99,9 +106,9 @@ class JoinView(generic.View):
         return redirect(reverse('home'))
 
 
-class MentoringView(generic.TemplateView):
+class MentoringView(MarketingPageView):
     template_name = 'pages/mentoring.html'
 
 
-class PricingView(generic.TemplateView):
+class PricingView(MarketingPageView):
     template_name = "pages/pricing.html"
\ No newline at end of file